@@ -1,11 +1,95 @@
-from flask import Flask
-from app.routes import bp
+import secrets
+from typing import Optional
 
+from dotenv import load_dotenv, find_dotenv
 
-def create_app():
+# Load environment variables from .env file before any app module reads its
+# settings at import time
+load_dotenv(find_dotenv())
+
+from flask import Flask  # noqa: E402
+from app.routes import bp  # noqa: E402
+from app.jobs import job_queue  # noqa: E402
+from app.publishing import outbox_sender  # noqa: E402
+from app.scheduler import newsletter_scheduler  # noqa: E402
+
+
+def create_app(start_background: bool = True):
+    """
+    Create the Flask application.
+
+    Args:
+        start_background (bool): Whether to warm up agents and start the scheduler
+            now. Servers that fork workers after loading the app pass False and call
+            `start_background_work` in each worker instead, since threads and
+            connections do not survive a fork.
+
+    Returns:
+        Flask: The application.
+    """
     app = Flask(__name__)
     app.config.from_object("config.Config")
+    if not app.secret_key:
+        # Sessions only last until a restart and only work within one host
+        # (or workers forked from one master) without a configured key
+        app.logger.warning("SECRET_KEY is not set; using a random key for session cookies")
+        app.secret_key = secrets.token_hex(32)
 
     app.register_blueprint(bp)
 
+    if start_background:
+        start_background_work(app)
+
     return app
+
+
+def start_background_work(app: Flask, run_scheduler: bool = True) -> None:
+    """
+    Warm up the agent pool and start the newsletter scheduler and the publishing
+    sender in this process.
+
+    Args:
+        app (Flask): The application.
+        run_scheduler (bool): Whether this process may run the scheduler, so that
+            only one of several workers pre-generates newsletters.
+    """
+    # Build agents up front so the first request does not pay for it
+    warm_up = app.config.get("AGENT_POOL_WARMUP", 0)
+    if warm_up:
+        from app.agents.newsletter_generator import (
+            NEWSLETTER_MODE,
+            PIPELINE,
+            newsletter_generator_pool,
+        )
+        from app.agents.pipeline import newsletter_writer_pool
+
+        try:
+            pool = (
+                newsletter_writer_pool
+                if NEWSLETTER_MODE == PIPELINE
+                else newsletter_generator_pool
+            )
+            pool.warm_up(warm_up)
+        except ValueError as e:
+            app.logger.warning("Skipping agent warm-up: %s", e)
+
+    # Pre-generate popular newsletters in the background
+    if run_scheduler and app.config.get("NEWSLETTER_SCHEDULER_ENABLED"):
+        newsletter_scheduler.start()
+
+    # Publish queued LinkedIn posts; every worker may send, one post at a time each
+    outbox_sender.start()
+
+
+def stop_background_work(timeout: Optional[float] = None) -> None:
+    """
+    Stop the scheduler and the publishing sender, and let queued and running
+    newsletter jobs finish. Queued posts stay in the outbox for the next sender.
+
+    Args:
+        timeout (float, optional): Maximum seconds to wait for the scheduler's
+            current preset and the sender's current post. Jobs are always drained.
+    """
+    newsletter_scheduler.stop(timeout)
+    outbox_sender.stop(timeout)
+    job_queue.shutdown(wait=True)
@@ -0,0 +1,66 @@
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from agno.models.google import Gemini
+from agno.models.message import Message
+
+from app.metrics import record_llm_tokens, span
+from app.ratelimit import GEMINI_REQUESTS, GEMINI_TOKENS, acquire, adjust
+from app.tools.compact import estimate_tokens
+
+# Output tokens reserved for each call until the real usage is known
+GEMINI_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("GEMINI_OUTPUT_TOKEN_ESTIMATE", "1024"))
+
+
+@dataclass
+class RateLimitedGemini(Gemini):
+    """
+    Gemini model whose calls draw on the shared Gemini request and token budgets.
+
+    Each call takes one request and an estimate of its tokens before it is sent,
+    waiting its turn in the caller's priority lane. Once the response reports
+    its usage, the token budget is charged or refunded the difference. Calls are
+    timed as "llm" spans named after `agent_name`, with their token counts.
+    """
+
+    # Name of the agent using the model, for metrics and traces
+    agent_name: str = "agent"
+
+    def invoke(self, messages: List[Message]):
+        with span("llm", self.agent_name) as attributes:
+            estimate = self._reserve(messages, attributes)
+            response = super().invoke(messages)
+            self._settle(estimate, response, attributes)
+        return response
+
+    def invoke_stream(self, messages: List[Message]):
+        with span("llm", self.agent_name) as attributes:
+            estimate = self._reserve(messages, attributes)
+            response = None
+            try:
+                for response in super().invoke_stream(messages):
+                    yield response
+            finally:
+                # The last chunk carries the usage for the whole response
+                self._settle(estimate, response, attributes)
+
+    def _reserve(self, messages: List[Message], attributes: dict) -> int:
+        estimate = GEMINI_OUTPUT_TOKEN_ESTIMATE + sum(
+            estimate_tokens(str(message.content or "")) for message in messages
+        )
+        waited = acquire(GEMINI_REQUESTS)
+        waited += acquire(GEMINI_TOKENS, estimate)
+        attributes["rate_limit_wait_seconds"] = round(waited, 6)
+        return estimate
+
+    def _settle(self, estimate: int, response: Optional[object], attributes: dict) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None)
+        if total:
+            adjust(GEMINI_TOKENS, total - estimate)
+        if usage is not None:
+            prompt_tokens = usage.prompt_token_count or 0
+            completion_tokens = usage.candidates_token_count or 0
+            record_llm_tokens(self.agent_name, prompt_tokens, completion_tokens)
+            attributes.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
@@ -1,7 +1,7 @@
 import os
 from app.tools.news_extractor import extract_live_news
 from agno.agent import Agent
-from agno.models.google import Gemini
+from app.agents.models import RateLimitedGemini
 
 
 def get_news_extractor():
@@ -28,8 +28,8 @@ def get_news_extractor():
         name="News Extractor",  # Descriptive name for the agent
         role="Fetches top stories from news APIs",  # Brief description of the agent's function
         tools=[extract_live_news],  # Assigning the tool used by the agent
-        model=Gemini(
-            id="gemini-1.5-flash", api_key=api_key
+        model=RateLimitedGemini(
+            id="gemini-1.5-flash", api_key=api_key, agent_name="news_extractor"
         ),  # Assigning the AI model (Gemini) and API key
         system_message=""" 
         Always include the source URL when extracting news stories.
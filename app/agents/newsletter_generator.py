@@ -1,7 +1,26 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
 from agno.agent import Agent
-from agno.models.google import Gemini
 from app.agents.news_extractor import get_news_extractor
+from app.agents.pipeline import (
+    build_summary_prompt,
+    fetch_articles,
+    newsletter_writer_pool,
+    parse_newsletter_request,
+)
+from app.agents.models import RateLimitedGemini
+from app.agents.pool import AgentPool
+from app.agents.result_cache import newsletter_cache, newsletter_cache_key
+from app.metrics import span
+
+# Generation modes: "agentic" lets the Newsletter Team delegate to the News Extractor,
+# "pipeline" fetches articles directly and makes a single summarization call
+AGENTIC = "agentic"
+PIPELINE = "pipeline"
+NEWSLETTER_MODE = os.getenv("NEWSLETTER_MODE", AGENTIC)
 
 
 def get_newsletter_generator():
@@ -27,8 +46,8 @@ def get_newsletter_generator():
     # Initialize the team of agents with their respective tasks
     agents_team = Agent(
         name="Newsletter Team",  # Descriptive name for the agent team
-        model=Gemini(
-            id="gemini-1.5-flash", api_key=api_key
+        model=RateLimitedGemini(
+            id="gemini-1.5-flash", api_key=api_key, agent_name="newsletter_team"
         ),  # Assign the Gemini model and API key
         team=[get_news_extractor()],  # Add the News Extractor agent to the team
         instructions=[  # Detailed instructions to guide the team's behavior
@@ -47,3 +66,184 @@ def get_newsletter_generator():
     )
 
     return agents_team
+
+
+# Process-wide pool of Newsletter Team agents, reused across requests
+newsletter_generator_pool = AgentPool(
+    get_newsletter_generator, max_idle=int(os.getenv("AGENT_POOL_MAX_IDLE", "8"))
+)
+
+
+# Running totals per generation mode
+_mode_stats: Dict[str, Dict[str, float]] = {}
+_mode_stats_lock = threading.Lock()
+
+
+def generate_newsletter(
+    command: str, mode: Optional[str] = None, use_cache: bool = True
+) -> Dict:
+    """
+    Generate a newsletter in the configured mode.
+
+    Results are cached on the normalized request. In pipeline mode the key also
+    fingerprints the articles covered, so repeating a request returns instantly
+    until the underlying articles change; agentic results are reused for
+    NEWSLETTER_CACHE_WINDOW seconds.
+
+    Args:
+        command (str): The user's newsletter request.
+        mode (str, optional): "agentic" or "pipeline". Defaults to NEWSLETTER_MODE.
+        use_cache (bool): Whether a cached newsletter may be returned. The new
+            result is stored either way.
+
+    Returns:
+        Dict: The markdown newsletter under "content" and run statistics under "stats".
+    """
+    started = time.perf_counter()
+    request, fetched, stats = _prepare_run(command, mode)
+    key = newsletter_cache_key(command, stats["mode"], fetched and fetched["articles"])
+
+    cached = newsletter_cache.get(key) if use_cache else None
+    if cached is not None:
+        stats.update(cached=True, llm_calls=0)
+        stats["latency_seconds"] = time.perf_counter() - started
+        return {"content": cached, "stats": stats}
+
+    with _newsletter_run(command, request, fetched, stats) as (agent, message):
+        response = agent.run(message, markdown=True)
+        stats["llm_calls"] = count_llm_calls(agent)
+    stats["latency_seconds"] = time.perf_counter() - started
+    newsletter_cache.set(key, response.content)
+    _record_run(stats)
+    return {"content": response.content, "stats": stats}
+
+
+def stream_newsletter(
+    command: str, mode: Optional[str] = None, use_cache: bool = True
+) -> Iterator[str]:
+    """
+    Generate a newsletter in the configured mode, yielding content as it is produced.
+
+    A cached newsletter is yielded in one piece.
+
+    Args:
+        command (str): The user's newsletter request.
+        mode (str, optional): "agentic" or "pipeline". Defaults to NEWSLETTER_MODE.
+        use_cache (bool): Whether a cached newsletter may be returned. The new
+            result is stored either way.
+
+    Yields:
+        str: Chunks of the markdown newsletter.
+    """
+    started = time.perf_counter()
+    request, fetched, stats = _prepare_run(command, mode)
+    key = newsletter_cache_key(command, stats["mode"], fetched and fetched["articles"])
+
+    cached = newsletter_cache.get(key) if use_cache else None
+    if cached is not None:
+        yield cached
+        return
+
+    chunks = []
+    with _newsletter_run(command, request, fetched, stats) as (agent, message):
+        for chunk in agent.run(message, stream=True, markdown=True):
+            if isinstance(chunk.content, str) and chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+        stats["llm_calls"] = count_llm_calls(agent)
+    stats["latency_seconds"] = time.perf_counter() - started
+    newsletter_cache.set(key, "".join(chunks))
+    _record_run(stats)
+
+
+def count_llm_calls(agent: Agent) -> int:
+    """
+    Count the model calls made by an agent and its team members in the current run.
+
+    Relies on the pool resetting model metrics before each run.
+
+    Args:
+        agent (Agent): The agent that just ran.
+
+    Returns:
+        int: Number of LLM calls.
+    """
+    calls = len(agent.model.metrics.get("response_times", [])) if agent.model else 0
+    return calls + sum(count_llm_calls(member) for member in agent.team or [])
+
+
+def mode_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Summarize LLM call counts and latency for each generation mode.
+
+    Returns:
+        Dict: Per mode, the number of runs and the average LLM calls and latency per run.
+    """
+    with _mode_stats_lock:
+        return {
+            mode: {
+                "runs": totals["runs"],
+                "avg_llm_calls": totals["llm_calls"] / totals["runs"],
+                "avg_latency_seconds": totals["latency_seconds"] / totals["runs"],
+            }
+            for mode, totals in _mode_stats.items()
+        }
+
+
+def _prepare_run(command: str, mode: Optional[str]) -> Tuple[Dict, Optional[Dict], Dict]:
+    # The pipeline fetches the articles behind the request up front, summarizes
+    # them directly and fingerprints them for the result cache. The agentic
+    # team fetches its own through tool calls, so nothing is fetched for it here.
+    mode = mode or NEWSLETTER_MODE
+    if mode not in (AGENTIC, PIPELINE):
+        raise ValueError(f"Unknown newsletter mode {mode!r}. Use {AGENTIC!r} or {PIPELINE!r}.")
+
+    request = parse_newsletter_request(command)
+    stats: Dict = {"mode": mode, "cached": False}
+    if mode == AGENTIC:
+        return request, None, stats
+
+    fetch_started = time.perf_counter()
+    with span("fetch", "articles"):
+        fetched = fetch_articles(request)
+    stats.update(
+        fetch_seconds=time.perf_counter() - fetch_started,
+        articles=fetched["input"],
+        clusters=fetched["clusters"],
+        duplicates=fetched["duplicates"],
+    )
+    return request, fetched, stats
+
+
+@contextmanager
+def _newsletter_run(
+    command: str, request: Dict, fetched: Dict, stats: Dict
+) -> Iterator[Tuple[Agent, str]]:
+    if stats["mode"] == AGENTIC:
+        with newsletter_generator_pool.acquire() as agent:
+            yield agent, command
+        return
+
+    summary = build_summary_prompt(
+        command,
+        fetched["articles"],
+        query=request["live"]["q"],
+        count=request["live"]["page_size"],
+    )
+    stats["articles_ranked"] = summary["ranking"]["candidates"]
+    stats["ranking_seconds"] = summary["ranking"]["seconds"]
+    stats["prompt_tokens"] = summary["packing"]["tokens"]
+    stats["prompt_tokens_saved"] = summary["packing"]["tokens_saved"]
+    stats["articles_dropped"] = summary["packing"]["dropped"]
+    with newsletter_writer_pool.acquire() as agent:
+        yield agent, summary["prompt"]
+
+
+def _record_run(stats: Dict) -> None:
+    with _mode_stats_lock:
+        totals = _mode_stats.setdefault(
+            stats["mode"], {"runs": 0, "llm_calls": 0, "latency_seconds": 0.0}
+        )
+        totals["runs"] += 1
+        totals["llm_calls"] += stats["llm_calls"]
+        totals["latency_seconds"] += stats["latency_seconds"]
@@ -0,0 +1,243 @@
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from agno.agent import Agent
+from app.agents.models import RateLimitedGemini
+from app.agents.pool import AgentPool
+from app.tools.compact import pack_articles
+from app.tools.dedup import cluster_articles
+from app.tools.fanout import fan_out
+from app.tools.ranking import RANKING_CANDIDATES, rank_articles
+
+DEFAULT_QUERY = "Artificial Intelligence OR Data Science"
+DEFAULT_CATEGORY = "technology"
+DEFAULT_ARTICLE_COUNT = 10
+DEFAULT_DAYS = 7
+
+NEWS_CATEGORIES = (
+    "business",
+    "entertainment",
+    "general",
+    "health",
+    "science",
+    "sports",
+    "technology",
+)
+MONTHS = {
+    month: index
+    for index, month in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"],
+        start=1,
+    )
+}
+
+# "2025-02-08"
+ISO_DATE = r"(\d{4})-(\d{2})-(\d{2})"
+# "8 Feb 2025", "8th February, 2025"
+DAY_MONTH_YEAR = r"(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3,9})\.?,?\s+(\d{4})"
+# "Feb 8, 2025", "February 8th 2025"
+MONTH_DAY_YEAR = r"([A-Za-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})"
+DATE_PATTERN = re.compile(f"{ISO_DATE}|{DAY_MONTH_YEAR}|{MONTH_DAY_YEAR}")
+
+COUNT_PATTERN = re.compile(
+    r"\b(\d{1,3})\s+(?:\w+\s+){0,3}?(?:news|articles|stories|headlines|items)\b", re.I
+)
+LAST_DAYS_PATTERN = re.compile(r"\b(?:last|past)\s+(\d{1,3})\s+days?\b", re.I)
+TOPIC_PATTERN = re.compile(
+    r"\b(?:on|about|regarding|covering|in)\s+(.+?)"
+    r"(?=\s+(?:from|between|since|for|over|during|this|last|past)\b|[.;]|$)",
+    re.I,
+)
+
+
+def parse_newsletter_request(command: str) -> Dict:
+    """
+    Pull the topic, date range and article count out of a newsletter request.
+
+    Anything the request does not mention falls back to the same defaults
+    `extract_live_news` uses: AI and Data Science over the past week.
+
+    Args:
+        command (str): The user's newsletter request,
+            e.g. "10 popular news on robotics from 8 Feb 2025 to 16 Feb 2025".
+
+    Returns:
+        Dict: Query parameters for `get_live_articles` under "live" and for
+        `get_top_articles` under "top".
+    """
+    today = datetime.utcnow().date()
+
+    dates = [_parse_date(match) for match in DATE_PATTERN.finditer(command)]
+    dates = sorted(date for date in dates if date is not None)
+    if dates:
+        from_date, to_date = dates[0], dates[-1]
+    else:
+        last_days = LAST_DAYS_PATTERN.search(command)
+        days = int(last_days.group(1)) if last_days else DEFAULT_DAYS
+        from_date, to_date = today - timedelta(days=days), today
+
+    count = COUNT_PATTERN.search(command)
+    page_size = min(int(count.group(1)), 100) if count else DEFAULT_ARTICLE_COUNT
+
+    lowered = command.lower()
+    if "latest" in lowered or "recent" in lowered:
+        sort_by = "publishedAt"
+    elif "relevant" in lowered:
+        sort_by = "relevancy"
+    else:
+        sort_by = "popularity"
+
+    category = next(
+        (name for name in NEWS_CATEGORIES if re.search(rf"\b{name}\b", lowered)),
+        DEFAULT_CATEGORY,
+    )
+
+    return {
+        "live": {
+            "q": _parse_topic(command) or DEFAULT_QUERY,
+            "from_param": from_date.strftime("%Y-%m-%d"),
+            "to": to_date.strftime("%Y-%m-%d"),
+            "language": "en",
+            "sort_by": sort_by,
+            "page_size": page_size,
+        },
+        "top": {
+            "category": category,
+            "language": "en",
+            "country": "us",
+            "page_size": page_size,
+        },
+    }
+
+
+def fetch_articles(request: Dict) -> Dict:
+    """
+    Fetch live news and top stories in parallel, merge them and collapse near-duplicates.
+
+    At least RANKING_CANDIDATES articles are fetched from each source, so that
+    `build_summary_prompt` has more to choose from than the request asks for.
+
+    Args:
+        request (Dict): The output of `parse_newsletter_request`.
+
+    Returns:
+        Dict: One representative per story under "articles" (live news first, then
+        top stories), plus the "input", "clusters" and "duplicates" counts.
+    """
+    live, top = request["live"], request["top"]
+    result = fan_out(
+        queries=[live["q"]],
+        categories=[top["category"]],
+        windows=[(live["from_param"], live["to"])],
+        language=live["language"],
+        country=top["country"],
+        sort_by=live["sort_by"],
+        page_size=max(live["page_size"], RANKING_CANDIDATES),
+    )
+    return cluster_articles(result["articles"])
+
+
+def build_summary_prompt(
+    command: str, articles: List[Dict], query: str = None, count: int = None
+) -> Dict:
+    """
+    Build the single prompt that asks the writer agent for the newsletter.
+
+    The `count` articles most relevant to the request are picked by
+    `rank_articles`, then compacted and packed into the prompt token budget in
+    that order.
+
+    Args:
+        command (str): The user's newsletter request.
+        articles (List[Dict]): The candidate articles, in ranking order.
+        query (str, optional): The search query, used to rank articles.
+        count (int, optional): Number of articles to pick. Defaults to all of them.
+
+    Returns:
+        Dict: The prompt text under "prompt", the packing report from
+        `pack_articles` under "packing" and the ranking from `rank_articles`
+        under "ranking".
+    """
+    ranking = rank_articles(articles, f"{query or ''} {command}", k=count)
+    # Keep the relevance and diversity order from the ranking
+    packed = pack_articles(ranking["articles"], query=query, keep_order=True)
+    prompt = (
+        f"Newsletter request: {command}\n\n"
+        f"Write the newsletter from these {packed['articles']} articles:\n"
+        f"{packed['text']}"
+    )
+    return {"prompt": prompt, "packing": packed, "ranking": ranking}
+
+
+def get_newsletter_writer():
+    """
+    Creates and returns an instance of the Newsletter Writer agent.
+
+    Unlike the Newsletter Team, this agent has no tools or team members. The
+    articles are fetched up front and passed in the prompt, so writing the
+    newsletter takes exactly one LLM call.
+
+    Returns:
+        Agent: The configured Newsletter Writer agent instance.
+    """
+
+    # Retrieve the Google API key from environment variables (ensure it is set before running the app)
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError(
+            "Google API key is missing. Please set the GOOGLE_API_KEY environment variable."
+        )
+
+    newsletter_writer = Agent(
+        name="Newsletter Writer",  # Descriptive name for the agent
+        model=RateLimitedGemini(
+            id="gemini-1.5-flash", api_key=api_key, agent_name="newsletter_writer"
+        ),  # Assign the Gemini model and API key
+        instructions=[  # Detailed instructions to guide the agent's behavior
+            "Write a newsletter covering the articles provided in the message.",
+            "Provide thoughtful and engaging details of each article's content.",
+            "Retain the article title.",
+            "Make the title a clickable link to the source URL.",
+        ],
+        markdown=True,  # Enable markdown formatting in the output
+        telemetry=True,  # Enable telemetry for tracking performance and usage
+        monitoring=True,  # Enable monitoring for ensuring the agent operates correctly
+    )
+
+    return newsletter_writer
+
+
+# Process-wide pool of Newsletter Writer agents, reused across requests
+newsletter_writer_pool = AgentPool(
+    get_newsletter_writer, max_idle=int(os.getenv("AGENT_POOL_MAX_IDLE", "8"))
+)
+
+
+def _parse_date(match: re.Match):
+    groups = match.groups()
+    try:
+        if groups[0]:
+            year, month, day = int(groups[0]), int(groups[1]), int(groups[2])
+        elif groups[3]:
+            day, month, year = int(groups[3]), MONTHS[groups[4][:3].lower()], int(groups[5])
+        else:
+            month, day, year = MONTHS[groups[6][:3].lower()], int(groups[7]), int(groups[8])
+        return datetime(year, month, day).date()
+    except (KeyError, ValueError):
+        return None
+
+
+def _parse_topic(command: str):
+    for match in TOPIC_PATTERN.finditer(command):
+        topic = match.group(1).strip(" ,")
+        # Skip phrases like "in the last week" and dates
+        if not topic or DATE_PATTERN.search(topic):
+            continue
+        if topic.split()[0].lower() in ("the", "a", "an"):
+            continue
+        # Turn "AI/Data Science" or "AI, robotics or chips" into a NewsAPI OR query
+        terms = re.split(r"\s*(?:/|,|\bor\b|\band\b)\s*", topic, flags=re.I)
+        return " OR ".join(term for term in terms if term)
+    return None
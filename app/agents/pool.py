@@ -0,0 +1,118 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+from agno.agent import Agent
+from agno.memory.agent import AgentMemory
+
+
+class AgentPool:
+    """
+    Keeps fully built agents around so they can be reused across requests.
+
+    Building an agent constructs its Gemini client and turns every tool's
+    docstring into a function schema. The pool does that once per agent
+    instance and hands each run an instance of its own, with fresh memory and
+    session state, so concurrent runs never share conversation history.
+
+    Args:
+        factory (Callable[[], Agent]): Builds a new agent when the pool is empty.
+        max_idle (int): Maximum number of idle agents kept for reuse.
+    """
+
+    def __init__(self, factory: Callable[[], Agent], max_idle: int = 8):
+        self.factory = factory
+        self.max_idle = max_idle
+        self._idle: List[Agent] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self) -> Iterator[Agent]:
+        """
+        Check out an agent for a single run and return it to the pool afterwards.
+
+        Yields:
+            Agent: An agent with clean per-run state, used by no other caller.
+        """
+        with self._lock:
+            agent = self._idle.pop() if self._idle else None
+        if agent is None:
+            agent = self._build()
+
+        reset_agent_state(agent)
+        try:
+            yield agent
+        finally:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(agent)
+
+    def warm_up(self, count: int = 1) -> None:
+        """
+        Build agents ahead of the first request.
+
+        Args:
+            count (int): Number of agents to have idle in the pool.
+        """
+        with self._lock:
+            missing = min(count, self.max_idle) - len(self._idle)
+        for _ in range(missing):
+            agent = self._build()
+            with self._lock:
+                self._idle.append(agent)
+
+    def _build(self) -> Agent:
+        agent = self.factory()
+        prepare_agent(agent)
+        return agent
+
+
+def prepare_agent(agent: Agent) -> None:
+    """
+    Build an agent's tool schemas and model client up front.
+
+    Agno does this lazily on the first run; doing it here moves the cost out
+    of the request path. Team members are prepared as well.
+
+    Args:
+        agent (Agent): The agent to prepare.
+    """
+    for member in agent.team or []:
+        prepare_agent(member)
+
+    # Tools must be registered on the model before the client is created,
+    # because the Gemini client captures the function declarations.
+    agent.update_model()
+    if hasattr(agent.model, "get_client"):
+        agent.model.get_client()
+
+
+def reset_agent_state(agent: Agent) -> None:
+    """
+    Clear the per-run state of an agent and its team members.
+
+    Args:
+        agent (Agent): The agent to reset.
+    """
+    agent.memory = AgentMemory()
+    agent.session_id = None
+    agent.session_name = None
+    agent.session_state = None
+    agent.agent_session = None
+    agent.team_data = None
+    agent.run_id = None
+    agent.run_input = None
+    agent.run_messages = None
+    agent.run_response = None
+    # agno keeps a streamed run's flags on the agent, so the next run would
+    # return only its first chunk
+    agent.stream = None
+    agent.stream_intermediate_steps = False
+    if agent.model is not None:
+        agent.model.session_id = None
+        agent.model.metrics = {}
+        # Tool calls of earlier runs, results included
+        agent.model._function_call_stack = None
+
+    for member in agent.team or []:
+        reset_agent_state(member)
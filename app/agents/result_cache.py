@@ -0,0 +1,171 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.tools.cache import TieredCache
+
+# Generated newsletters, keyed on the normalized request and the article set.
+# Entries never need to expire on their own: when the articles behind a
+# request change, so does the key.
+newsletter_cache = TieredCache(
+    path=os.getenv("NEWSLETTER_CACHE_PATH", ".cache/newsletters.sqlite3") or None,
+    namespace="newsletters",
+    max_entries=int(os.getenv("NEWSLETTER_CACHE_MAX_ENTRIES", "128")),
+    max_disk_entries=int(os.getenv("NEWSLETTER_CACHE_MAX_DISK_ENTRIES", "1000")),
+    default_ttl=float(os.getenv("NEWSLETTER_CACHE_TTL", "604800")),
+)
+# The agentic team fetches its own articles, so there is no article set to key
+# its newsletters on; they are reused within windows of this many seconds instead
+NEWSLETTER_CACHE_WINDOW = float(os.getenv("NEWSLETTER_CACHE_WINDOW", "1800"))
+
+
+def normalize_command(command: str) -> str:
+    """
+    Normalize a newsletter request so trivially different phrasings share a key.
+
+    Lowercases the text, collapses whitespace and drops punctuation other than
+    characters that carry meaning in dates and topics.
+
+    Args:
+        command (str): The user's newsletter request.
+
+    Returns:
+        str: The normalized request.
+    """
+    command = re.sub(r"[^\w\s/\-.,]", " ", command.lower())
+    return " ".join(command.split()).strip(" .,")
+
+
+def fingerprint_articles(articles: List[Dict]) -> str:
+    """
+    Fingerprint an article set by its URLs and publication times.
+
+    Args:
+        articles (List[Dict]): The articles a newsletter is generated from.
+
+    Returns:
+        str: Hex digest that changes whenever an article is added, removed or updated.
+    """
+    digest = hashlib.sha256()
+    for url, published_at in sorted(
+        (article.get("url") or "", article.get("publishedAt") or "") for article in articles
+    ):
+        digest.update(f"{url}\t{published_at}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def newsletter_cache_key(command: str, mode: str, articles: Optional[List[Dict]]) -> str:
+    """
+    Build the cache key for a generated newsletter.
+
+    Args:
+        command (str): The user's newsletter request.
+        mode (str): The generation mode.
+        articles (List[Dict], optional): The articles the newsletter is generated
+            from, or None if they are not known up front. The key then changes
+            every NEWSLETTER_CACHE_WINDOW seconds instead.
+
+    Returns:
+        str: The cache key.
+    """
+    if articles is None:
+        version = {"window": int(time.time() // NEWSLETTER_CACHE_WINDOW)}
+    else:
+        version = {"articles": fingerprint_articles(articles)}
+    return TieredCache.make_key(
+        "newsletter", {"command": normalize_command(command), "mode": mode, **version}
+    )
+
+
+class PresetStore:
+    """
+    Newsletters pre-generated for popular requests, served without fetching or generating.
+
+    Only registered presets are looked up, and each lookup counts as a hit or a
+    miss, so the store reports how often pre-generation actually paid off.
+
+    Args:
+        cache (TieredCache): Where pre-generated newsletters are stored.
+        ttl (float): Seconds a pre-generated newsletter stays servable.
+    """
+
+    def __init__(self, cache: TieredCache, ttl: float):
+        self.cache = cache
+        self.ttl = ttl
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, command: str) -> None:
+        """
+        Mark a request as a preset so matching requests are looked up.
+
+        Args:
+            command (str): The preset newsletter request.
+        """
+        with self._lock:
+            self._counters.setdefault(normalize_command(command), {"hits": 0, "misses": 0})
+
+    def get(self, command: str) -> Optional[Dict]:
+        """
+        Return the pre-generated newsletter for a request, if it matches a preset.
+
+        Args:
+            command (str): The user's newsletter request.
+
+        Returns:
+            Dict: The markdown newsletter under "content", when it was generated
+            under "generated_at" and the generation statistics under "stats",
+            or None if the request is not a preset or nothing is stored yet.
+        """
+        normalized = normalize_command(command)
+        with self._lock:
+            counters = self._counters.get(normalized)
+        if counters is None:
+            return None
+        preset = self.cache.get(self._key(normalized))
+        with self._lock:
+            counters["hits" if preset is not None else "misses"] += 1
+        return preset
+
+    def put(self, command: str, content: str, stats: Dict) -> None:
+        """
+        Store a pre-generated newsletter.
+
+        Args:
+            command (str): The preset newsletter request.
+            content (str): The markdown newsletter.
+            stats (Dict): The generation statistics.
+        """
+        self.cache.set(
+            self._key(normalize_command(command)),
+            {"content": content, "generated_at": time.time(), "stats": stats},
+            ttl=self.ttl,
+        )
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Report lookups for each preset.
+
+        Returns:
+            Dict[str, Dict]: Per normalized preset request, its hits, misses and hit rate.
+        """
+        with self._lock:
+            counters = {command: dict(counts) for command, counts in self._counters.items()}
+        for counts in counters.values():
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = counts["hits"] / lookups if lookups else None
+        return counters
+
+    @staticmethod
+    def _key(normalized: str) -> str:
+        return TieredCache.make_key("preset", {"command": normalized})
+
+
+# Pre-generated newsletters live alongside the regular newsletter cache and are
+# replaced by the scheduler well before they expire
+preset_store = PresetStore(
+    newsletter_cache, ttl=float(os.getenv("NEWSLETTER_PRESET_TTL", "90000"))
+)
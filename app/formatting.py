@@ -0,0 +1,144 @@
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+# Unicode sans-serif bold equivalents of ASCII letters and digits
+NORMAL_CHARACTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+BOLD_CHARACTERS = "𝗔𝗕𝗖𝗗𝗘𝗙𝗚𝗛𝗜𝗝𝗞𝗟𝗠𝗡𝗢𝗣𝗤𝗥𝗦𝗧𝗨𝗩𝗪𝗫𝗬𝗭𝗮𝗯𝗰𝗱𝗲𝗳𝗴𝗵𝗶𝗝𝗸𝗹𝗺𝗻𝗼𝗽𝗾𝗿𝘀𝘁𝘂𝘃𝘄𝘅𝘆𝘇𝟬𝟭𝟮𝟯𝟰𝟱𝟲𝟳𝟴𝟵"
+BOLD_TABLE = str.maketrans(NORMAL_CHARACTERS, BOLD_CHARACTERS)
+
+# Text directly inside these tags is bolded
+BOLD_TAGS = frozenset(["h1", "h2", "h3", "h4", "strong"])
+# These tags start a new paragraph
+PARAGRAPH_TAGS = frozenset(["br", "p", "h1", "h2", "h3", "h4"])
+LIST_TAGS = frozenset(["ul", "ol"])
+# Tags that never have content, so they are never left open
+VOID_TAGS = frozenset(
+    "area base basefont bgsound br col command embed frame hr image img input "
+    "isindex keygen link menuitem meta nextid param source spacer track wbr".split()
+)
+
+
+def bold_text(text: str) -> str:
+    """
+    Convert a given text to bold using Unicode bold characters.
+
+    Args:
+        text (str): The input text to be converted.
+
+    Returns:
+        str: The text converted to bold using Unicode characters.
+    """
+    return text.translate(BOLD_TABLE)
+
+
+def parse_html(html: str) -> str:
+    """
+    Parse HTML content and extract text while preserving structure.
+    Text inside header tags (h1-h4) will be bolded.
+
+    The HTML is converted in a single pass over the parser's events, tracking
+    open tags on a stack so list depth is known without searching ancestors.
+
+    Args:
+        html (str): The HTML content to be parsed.
+
+    Returns:
+        str: The parsed and formatted text with bold headers.
+    """
+    parser = _LinkedInTextParser()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+class _LinkedInTextParser(HTMLParser):
+    """
+    Turns HTML parser events into LinkedIn-friendly plain text.
+
+    Events are handled in document order, the same order a parsed tree's
+    descendants are visited in: each start tag and each run of text counts as
+    one element, and `_previous` holds the tag name of the element just seen
+    (None after text).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._data: List[str] = []
+        self._open: List[str] = []
+        self._list_depth = 0
+        self._previous: Optional[str] = None
+
+    def text(self) -> str:
+        self._end_data()
+        return "".join(self._parts).strip()
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self._end_data()
+        self._element(tag)
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+            if tag in LIST_TAGS:
+                self._list_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        self._end_data()
+        # Close the most recent matching tag and anything left open inside it;
+        # stray end tags are ignored
+        if tag not in self._open:
+            return
+        while True:
+            closed = self._open.pop()
+            if closed in LIST_TAGS:
+                self._list_depth -= 1
+            if closed == tag:
+                break
+
+    def handle_data(self, data: str) -> None:
+        self._data.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        self._end_data()
+        self._string(data)
+
+    def handle_decl(self, decl: str) -> None:
+        self._end_data()
+        self._string(decl[len("DOCTYPE ") :])
+
+    def unknown_decl(self, data: str) -> None:
+        self._end_data()
+        if data.upper().startswith("CDATA["):
+            data = data[len("CDATA[") :]
+        self._string(data)
+
+    def handle_pi(self, data: str) -> None:
+        self._end_data()
+        self._string(data)
+
+    def _end_data(self) -> None:
+        if self._data:
+            data = "".join(self._data)
+            self._data = []
+            self._string(data)
+
+    def _string(self, data: str) -> None:
+        stripped_text = data.strip()
+        if stripped_text:
+            # Apply bold_text to text directly inside <strong>, <h1>, <h2>, <h3>, <h4>
+            if self._previous in BOLD_TAGS:
+                self._parts.append(bold_text(stripped_text))
+            else:
+                self._parts.append(stripped_text)
+        self._previous = None
+
+    def _element(self, name: str) -> None:
+        if name in PARAGRAPH_TAGS:
+            if self._previous not in PARAGRAPH_TAGS:
+                self._parts.append("\n\n")
+        elif name == "li":
+            self._parts.append("\n" + "  " * (self._list_depth - 1) + "- ")
+        elif name == "tr":
+            self._parts.append("\n")
+        elif name in ("th", "td"):
+            self._parts.append("\t")
+        self._previous = name
@@ -0,0 +1,251 @@
+import contextvars
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobQueueClosed(JobQueueFull):
+    """Raised when a job is submitted after the queue has been shut down."""
+
+
+class Job:
+    """
+    A unit of background work and its bookkeeping.
+
+    Attributes:
+        id (str): Unique job identifier.
+        name (str): Short label describing the work.
+        status (str): One of queued, running, done or failed.
+        result (Any): Return value of the job once done.
+        error (str): Error message once failed.
+        submitted_at (float): Epoch seconds when the job was queued.
+        started_at (float): Epoch seconds when a worker picked the job up.
+        finished_at (float): Epoch seconds when the job finished.
+    """
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+
+    @property
+    def queue_seconds(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def run_seconds(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        """
+        Serialize the job for JSON responses.
+
+        Args:
+            include_result (bool): Whether to include the job's result.
+
+        Returns:
+            dict: The job's state and timings.
+        """
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_seconds": self.queue_seconds,
+            "run_seconds": self.run_seconds,
+        }
+        if include_result and self.status == DONE:
+            data["result"] = self.result
+        return data
+
+
+class JobQueue:
+    """
+    A bounded pool of worker threads with a job table.
+
+    Work submitted to the queue runs on at most `max_workers` threads. At most
+    `max_pending` further jobs may wait for a free worker; beyond that
+    `submit` raises `JobQueueFull` so callers can shed load instead of piling up.
+
+    Args:
+        max_workers (int): Number of worker threads.
+        max_pending (int): Number of jobs allowed to wait for a worker.
+        max_finished (int): Number of finished jobs kept in the table for status lookups.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, max_finished: int = 256):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._closed = False
+
+    def submit(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queue `fn(*args, **kwargs)` for execution on a worker thread.
+
+        Args:
+            name (str): Short label describing the work.
+            fn (Callable): The function to run.
+            *args: Positional arguments for `fn`.
+            **kwargs: Keyword arguments for `fn`.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            JobQueueFull: If all workers are busy and the pending queue is full.
+            JobQueueClosed: If the queue has been shut down.
+        """
+        job = Job(name)
+        with self._lock:
+            if self._closed:
+                raise JobQueueClosed("Job queue is shut down.")
+            if self._active >= self.max_workers + self.max_pending:
+                raise JobQueueFull(
+                    f"Job queue is full ({self._active} jobs queued or running)."
+                )
+            self._active += 1
+            self._jobs[job.id] = job
+            self._prune()
+            executor = self._get_executor()
+
+        # Run in a copy of the caller's context so context variables such as
+        # the rate limit lane follow the job onto the worker thread
+        context = contextvars.copy_context()
+        job.future = executor.submit(context.run, self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job by id.
+
+        Args:
+            job_id (str): The job identifier.
+
+        Returns:
+            Job: The job, or None if it is unknown or has been pruned.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job: Job, timeout: Optional[float] = None) -> Any:
+        """
+        Block until a job finishes and return its result.
+
+        Args:
+            job (Job): The job to wait for.
+            timeout (float, optional): Maximum number of seconds to wait.
+
+        Returns:
+            Any: The job's result.
+
+        Raises:
+            concurrent.futures.TimeoutError: If the job does not finish in time.
+            Exception: Whatever the job itself raised.
+        """
+        return job.future.result(timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Count jobs in the table by state.
+
+        Returns:
+            dict: Number of jobs per state plus worker settings.
+        """
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        counts["max_workers"] = self.max_workers
+        counts["max_pending"] = self.max_pending
+        return counts
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting work and optionally wait for in-flight jobs to finish.
+
+        Args:
+            wait (bool): Whether to block until queued and running jobs finish.
+        """
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads do not survive a fork, so build the pool lazily per process
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="job"
+            )
+            self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = DONE
+            return job.result
+        except Exception as e:
+            job.error = str(e) or e.__class__.__name__
+            job.status = FAILED
+            traceback.print_exc()
+            raise
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._active -= 1
+
+    def _prune(self) -> None:
+        # Drop the oldest finished jobs once the table grows past its limit
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in (DONE, FAILED)
+        ]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+# Shared queue for newsletter generation
+job_queue = JobQueue(
+    max_workers=int(os.getenv("NEWSLETTER_WORKERS", "4")),
+    max_pending=int(os.getenv("NEWSLETTER_MAX_PENDING", "32")),
+)
@@ -0,0 +1,47 @@
+import os
+from typing import Dict
+
+from app.transport import get_session
+
+# LinkedIn app credentials
+CLIENT_ID = os.getenv("CLIENT_ID")
+CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+OAUTH2_REDIRECT_URL = os.getenv("OAUTH2_REDIRECT_URL")
+
+# LinkedIn API clients, created on first use
+_linkedin_clients: Dict[str, object] = {}
+
+
+def get_auth_client():
+    """
+    Return the LinkedIn OAuth client, creating it on first use.
+
+    Returns:
+        AuthClient: The client, sending its requests through the shared session.
+    """
+    client = _linkedin_clients.get("auth")
+    if client is None:
+        from linkedin_api.clients.auth.client import AuthClient
+
+        client = _linkedin_clients["auth"] = AuthClient(
+            client_id=CLIENT_ID, client_secret=CLIENT_SECRET, redirect_url=OAUTH2_REDIRECT_URL
+        )
+    # Route LinkedIn calls through the shared keep-alive session as well
+    client.session = get_session()
+    return client
+
+
+def get_restli_client():
+    """
+    Return the LinkedIn Rest.li client, creating it on first use.
+
+    Returns:
+        RestliClient: The client, sending its requests through the shared session.
+    """
+    client = _linkedin_clients.get("restli")
+    if client is None:
+        from linkedin_api.clients.restli.client import RestliClient
+
+        client = _linkedin_clients["restli"] = RestliClient()
+    client.session = get_session()
+    return client
@@ -0,0 +1,325 @@
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Finished traces kept for /metrics/traces/<trace_id>
+TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", "100"))
+
+
+class Histogram:
+    """
+    A Prometheus-style histogram with cumulative buckets, split by label values.
+
+    Args:
+        name (str): The metric name.
+        help (str): One-line description for the exposition format.
+        labelnames (Sequence[str]): Names of the labels each observation carries.
+        buckets (Sequence[float]): Upper bounds of the buckets, in ascending order.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label values: [count per bucket (the last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """
+        Record one observation.
+
+        Args:
+            value (float): The observed value.
+            *labelvalues (str): Values for the labels, in `labelnames` order.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        """
+        Render the histogram in the Prometheus text exposition format.
+
+        Returns:
+            List[str]: The exposition lines.
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labelvalues, (counts, total) in sorted(series.items()):
+            labels = _format_labels(self.labelnames, labelvalues)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    """
+    A Prometheus-style counter, split by label values.
+
+    Args:
+        name (str): The metric name.
+        help (str): One-line description for the exposition format.
+        labelnames (Sequence[str]): Names of the labels each increment carries.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float, *labelvalues: str) -> None:
+        """
+        Add to the counter.
+
+        Args:
+            amount (float): The amount to add.
+            *labelvalues (str): Values for the labels, in `labelnames` order.
+        """
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        """
+        Render the counter in the Prometheus text exposition format.
+
+        Returns:
+            List[str]: The exposition lines.
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labelvalues, value in sorted(values.items()):
+            lines.append(f"{self.name}{{{_format_labels(self.labelnames, labelvalues)}}} {value}")
+        return lines
+
+
+class Trace:
+    """
+    The spans recorded while serving one request.
+
+    A trace is shared by every thread that copies the request's context, so
+    spans from job queue workers and fan-out threads end up in it too.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.spans: List[Dict] = []
+        self.token = None
+
+    def add(self, span: Dict) -> None:
+        self.spans.append(span)
+
+    def offset(self, moment: float) -> float:
+        return moment - self._started
+
+    def to_dict(self) -> Dict:
+        """
+        Convert the trace to a JSON-serializable dict.
+
+        Returns:
+            Dict: The trace id, its start time and its spans ordered by start offset.
+        """
+        return {
+            "id": self.id,
+            "started_at": self.started_at,
+            "spans": sorted(self.spans, key=lambda span: span["start"]),
+        }
+
+
+stage_seconds = Histogram(
+    "newsletter_stage_seconds",
+    "Time spent in each stage of serving a request.",
+    ("stage", "name"),
+)
+llm_tokens = Counter(
+    "newsletter_llm_tokens_total",
+    "Tokens sent to and received from the LLM.",
+    ("agent", "kind"),
+)
+span_errors = Counter(
+    "newsletter_stage_errors_total",
+    "Stages that raised an exception.",
+    ("stage", "name"),
+)
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_traces: "OrderedDict[str, Trace]" = OrderedDict()
+_traces_lock = threading.Lock()
+
+
+@contextmanager
+def span(stage: str, name: str = "") -> Iterator[Dict]:
+    """
+    Time the enclosed block as one stage.
+
+    The duration is recorded in `stage_seconds` and, when a trace is active,
+    added to it. The yielded dict can be filled with attributes, such as token
+    counts, that are kept on the trace's span.
+
+    Args:
+        stage (str): The kind of work, e.g. "llm", "tool" or "markdown".
+        name (str): Which instance of it, e.g. the agent or tool name.
+
+    Yields:
+        Dict: Attributes to attach to the span.
+    """
+    attributes: Dict = {}
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except GeneratorExit:
+        # A streaming caller stopped early, which is not a failure
+        raise
+    except BaseException as e:
+        error = e.__class__.__name__
+        span_errors.inc(1, stage, name)
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        stage_seconds.observe(seconds, stage, name)
+        trace = _trace.get()
+        if trace is not None:
+            trace.add(
+                {
+                    "stage": stage,
+                    "name": name,
+                    "start": round(trace.offset(started), 6),
+                    "seconds": round(seconds, 6),
+                    "thread": threading.current_thread().name,
+                    "error": error,
+                    **attributes,
+                }
+            )
+
+
+def traced(stage: str, name: Optional[str] = None) -> Callable:
+    """
+    Decorate a function so every call to it is timed as a span.
+
+    The wrapper keeps the function's name, docstring and signature, so it can
+    still be registered as an agent tool.
+
+    Args:
+        stage (str): The kind of work, e.g. "tool".
+        name (str, optional): The span name. Defaults to the function's name.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage, name or fn.__name__):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def start_trace() -> Trace:
+    """
+    Start recording spans for the current context.
+
+    Returns:
+        Trace: The new trace; pass it to `finish_trace` when the request is done.
+    """
+    trace = Trace()
+    trace.token = _trace.set(trace)
+    return trace
+
+
+def finish_trace(trace: Trace) -> None:
+    """
+    Stop recording spans and keep the trace for later retrieval.
+
+    Args:
+        trace (Trace): The trace returned by `start_trace`.
+    """
+    try:
+        _trace.reset(trace.token)
+    except ValueError:
+        # Finished from a different context, e.g. at the end of a streamed response
+        _trace.set(None)
+    with _traces_lock:
+        _traces[trace.id] = trace
+        while len(_traces) > TRACE_HISTORY:
+            _traces.popitem(last=False)
+
+
+def get_trace(trace_id: str) -> Optional[Dict]:
+    """
+    Look up a recent trace.
+
+    Args:
+        trace_id (str): The trace id.
+
+    Returns:
+        Dict: The trace, or None if it is unknown or has been pruned.
+    """
+    with _traces_lock:
+        trace = _traces.get(trace_id)
+    return trace.to_dict() if trace else None
+
+
+def record_llm_tokens(agent: str, prompt_tokens: int, completion_tokens: int) -> None:
+    """
+    Count the tokens of one LLM call.
+
+    Args:
+        agent (str): The agent that made the call.
+        prompt_tokens (int): Tokens in the prompt.
+        completion_tokens (int): Tokens in the completion.
+    """
+    llm_tokens.inc(prompt_tokens, agent, "prompt")
+    llm_tokens.inc(completion_tokens, agent, "completion")
+
+
+def render_metrics() -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Returns:
+        str: The exposition text.
+    """
+    lines = []
+    for metric in (stage_seconds, span_errors, llm_tokens):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    return ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
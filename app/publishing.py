@@ -0,0 +1,522 @@
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from app.linkedin import get_restli_client
+from app.metrics import span
+from app.ratelimit import LINKEDIN_POSTS, RateLimitExceeded, acquire
+
+# SQLite file holding posts waiting to be published, shared by every worker
+PUBLISH_OUTBOX_PATH = os.getenv("PUBLISH_OUTBOX_PATH", ".cache/outbox.sqlite3")
+# Attempts before a post that keeps failing with 429/5xx is given up on
+PUBLISH_MAX_ATTEMPTS = int(os.getenv("PUBLISH_MAX_ATTEMPTS", "5"))
+# Exponential backoff between attempts, in seconds
+PUBLISH_BACKOFF_BASE = float(os.getenv("PUBLISH_BACKOFF_BASE", "30"))
+PUBLISH_BACKOFF_MAX = float(os.getenv("PUBLISH_BACKOFF_MAX", "3600"))
+# Seconds the sender sleeps when nothing is due (enqueuing wakes it early)
+PUBLISH_POLL_INTERVAL = float(os.getenv("PUBLISH_POLL_INTERVAL", "5"))
+# Seconds after which a post left "sending" by a worker that died is picked up again
+PUBLISH_CLAIM_TIMEOUT = float(os.getenv("PUBLISH_CLAIM_TIMEOUT", "300"))
+
+LIFECYCLE_STATE = os.getenv("lifecycleState")
+UGC_POSTS_RESOURCE = "/ugcPosts"
+COMMENTS_RESOURCE = "/socialActions/{id}/comments"
+MAX_POST_LENGTH = 2500
+# LinkedIn rejects comments longer than this
+MAX_COMMENT_LENGTH = 1250
+# Ends the first post of a newsletter that continues in comments
+CONTINUED_MARKER = "\n\n(continued in the comments)"
+
+# Post states
+QUEUED = "queued"
+SENDING = "sending"
+PUBLISHED = "published"
+FAILED = "failed"
+
+
+class PublishError(Exception):
+    """
+    Raised when LinkedIn does not accept part of a post.
+
+    Args:
+        message (str): What went wrong.
+        retryable (bool): Whether sending it again later may succeed.
+        retry_after (float, optional): Seconds LinkedIn asked us to wait.
+    """
+
+    def __init__(self, message: str, retryable: bool, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def split_post(
+    text: str, first_limit: int = MAX_POST_LENGTH, rest_limit: int = MAX_COMMENT_LENGTH
+) -> List[str]:
+    """
+    Split a newsletter into a first post and follow-up comments.
+
+    Paragraphs are kept whole and packed into as few parts as the limits allow.
+    A paragraph longer than a comment is split at its last line break, sentence
+    or word that fits. When the text is split, the first post says so.
+
+    Args:
+        text (str): The newsletter as LinkedIn text.
+        first_limit (int): Maximum length of the post.
+        rest_limit (int): Maximum length of each comment.
+
+    Returns:
+        List[str]: The post followed by its comments, in order.
+    """
+    text = text.strip()
+    if len(text) <= first_limit:
+        return [text]
+
+    first_limit -= len(CONTINUED_MARKER)
+    piece_limit = min(first_limit, rest_limit)
+    parts: List[str] = []
+    current, limit = "", first_limit
+    for paragraph in text.split("\n\n"):
+        for piece in _split_paragraph(paragraph.strip(), piece_limit):
+            if not piece:
+                continue
+            candidate = f"{current}\n\n{piece}" if current else piece
+            if len(candidate) <= limit:
+                current = candidate
+                continue
+            parts.append(current)
+            current, limit = piece, rest_limit
+    parts.append(current)
+    parts[0] += CONTINUED_MARKER
+    return parts
+
+
+def _split_paragraph(paragraph: str, limit: int) -> List[str]:
+    pieces = []
+    while len(paragraph) > limit:
+        for separator in ("\n", ". ", " "):
+            cut = paragraph.rfind(separator, 0, limit)
+            if cut > 0:
+                # Keep a full stop with its sentence
+                cut += len(separator.rstrip())
+                break
+        else:
+            cut = limit
+        pieces.append(paragraph[:cut].rstrip())
+        paragraph = paragraph[cut:].lstrip()
+    pieces.append(paragraph)
+    return pieces
+
+
+class Outbox:
+    """
+    A persistent queue of LinkedIn posts, shared by every worker through SQLite.
+
+    Each post is stored with its parts (the post and its follow-up comments), the
+    time it may be published and its delivery state. A post is claimed by one
+    sender at a time, and the id of every part LinkedIn accepts is recorded
+    straight away, so a retry carries on from the first unpublished part instead
+    of posting again.
+
+    Posts are deduplicated on an idempotency key per author, so submitting the
+    same request twice returns the first post instead of queuing a second one.
+    Submitting a post that failed queues it again, carrying on from the parts
+    already published.
+
+    Args:
+        path (str): Location of the SQLite file.
+        claim_timeout (float): Seconds before an unfinished claim is given up.
+    """
+
+    def __init__(self, path: str, claim_timeout: float = PUBLISH_CLAIM_TIMEOUT):
+        self.path = path
+        self.claim_timeout = claim_timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS posts ("
+                "id TEXT PRIMARY KEY, idempotency_key TEXT NOT NULL, author TEXT NOT NULL, "
+                "access_token TEXT, parts TEXT NOT NULL, urns TEXT NOT NULL, "
+                "status TEXT NOT NULL, publish_at REAL NOT NULL, next_attempt_at REAL NOT NULL, "
+                "attempts INTEGER NOT NULL, last_error TEXT, claim TEXT, claimed_at REAL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "UNIQUE (author, idempotency_key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS posts_due ON posts (status, next_attempt_at)"
+            )
+
+    def enqueue(
+        self,
+        author: str,
+        access_token: str,
+        text: str,
+        publish_at: Optional[float] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> Tuple[Dict, bool]:
+        """
+        Queue a post, or return the one already queued under the same key.
+
+        A post under the same key that has failed is queued again with the new
+        access token and a fresh set of attempts.
+
+        Args:
+            author (str): The author's URN, e.g. "urn:li:person:abc".
+            access_token (str): The author's access token, used to publish.
+            text (str): The text to publish, split into a post and comments if long.
+            publish_at (float, optional): Unix time to publish at. Defaults to now.
+            idempotency_key (str, optional): Key identifying the request. Defaults
+                to a hash of the author and text.
+
+        Returns:
+            Tuple[Dict, bool]: The post and whether it was newly queued (or requeued).
+        """
+        now = time.time()
+        publish_at = now if publish_at is None else publish_at
+        key = idempotency_key or hashlib.sha256(f"{author}\n{text}".encode("utf-8")).hexdigest()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO posts (id, idempotency_key, author, access_token, parts, "
+                "urns, status, publish_at, next_attempt_at, attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, '[]', ?, ?, ?, 0, ?, ?)",
+                (
+                    uuid.uuid4().hex, key, author, access_token, json.dumps(split_post(text)),
+                    QUEUED, publish_at, publish_at, now, now,
+                ),
+            )
+            queued = cursor.rowcount == 1
+            if not queued:
+                cursor = conn.execute(
+                    "UPDATE posts SET access_token = ?, status = ?, publish_at = ?, "
+                    "next_attempt_at = ?, attempts = 0, last_error = NULL, claim = NULL, "
+                    "claimed_at = NULL, updated_at = ? "
+                    "WHERE author = ? AND idempotency_key = ? AND status = ?",
+                    (access_token, QUEUED, publish_at, publish_at, now, author, key, FAILED),
+                )
+                queued = cursor.rowcount == 1
+            row = conn.execute(
+                "SELECT * FROM posts WHERE author = ? AND idempotency_key = ?", (author, key)
+            ).fetchone()
+        return self._to_dict(row), queued
+
+    def get(self, post_id: str) -> Optional[Dict]:
+        """
+        Return a post's state, without its access token or claim.
+
+        Args:
+            post_id (str): The post id returned by `enqueue`.
+
+        Returns:
+            Dict: The post, or None if it is unknown.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM posts WHERE id = ?", (post_id,)).fetchone()
+        if row is None:
+            return None
+        post = self._to_dict(row)
+        del post["access_token"], post["claim"]
+        return post
+
+    def claim(self) -> Optional[Dict]:
+        """
+        Claim the next due post for this sender.
+
+        Posts whose sender stopped part-way (a claim older than `claim_timeout`)
+        are due again.
+
+        Returns:
+            Dict: The claimed post, including its access token, or None if no post is due.
+        """
+        now = time.time()
+        claim = uuid.uuid4().hex
+        with self._connect() as conn:
+            # A single UPDATE is atomic, so two senders never claim the same post
+            conn.execute(
+                "UPDATE posts SET status = ?, claim = ?, claimed_at = ?, updated_at = ? "
+                "WHERE id = (SELECT id FROM posts WHERE (status = ? AND next_attempt_at <= ?) "
+                "OR (status = ? AND claimed_at <= ?) ORDER BY next_attempt_at LIMIT 1)",
+                (SENDING, claim, now, now, QUEUED, now, SENDING, now - self.claim_timeout),
+            )
+            row = conn.execute("SELECT * FROM posts WHERE claim = ?", (claim,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def record_part(self, post: Dict) -> None:
+        """
+        Save the URNs of the parts published so far.
+
+        Args:
+            post (Dict): The claimed post, with its `urns` updated.
+        """
+        self._update(post, urns=json.dumps(post["urns"]), claimed_at=time.time())
+
+    def retry(self, post: Dict, delay: float, error: str, attempts: int) -> None:
+        """
+        Return a claimed post to the queue to be tried again later.
+
+        Args:
+            post (Dict): The claimed post.
+            delay (float): Seconds to wait before the next attempt.
+            error (str): Why this attempt did not finish.
+            attempts (int): Failed attempts so far.
+        """
+        self._update(
+            post, status=QUEUED, next_attempt_at=time.time() + delay, attempts=attempts,
+            last_error=error, claim=None,
+        )
+
+    def finish(self, post: Dict, status: str, error: Optional[str] = None) -> None:
+        """
+        Mark a claimed post as published or failed.
+
+        The access token is dropped; a failed post submitted again brings a new one.
+
+        Args:
+            post (Dict): The claimed post.
+            status (str): PUBLISHED or FAILED.
+            error (str, optional): Why the post failed.
+        """
+        self._update(post, status=status, last_error=error, access_token=None, claim=None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Count posts by state, and those due now.
+
+        Returns:
+            Dict: State name to number of posts, plus "due".
+        """
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM posts GROUP BY status"))
+            counts["due"] = conn.execute(
+                "SELECT COUNT(*) FROM posts WHERE status = ? AND next_attempt_at <= ?",
+                (QUEUED, time.time()),
+            ).fetchone()[0]
+        return {state: counts.get(state, 0) for state in (QUEUED, SENDING, PUBLISHED, FAILED, "due")}
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation is safe from worker threads
+        # and from forked processes
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _update(self, post: Dict, **columns) -> None:
+        columns["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._connect() as conn:
+            # Only the sender holding the claim may update the post
+            conn.execute(
+                f"UPDATE posts SET {assignments} WHERE id = ? AND claim = ?",
+                (*columns.values(), post["id"], post["claim"]),
+            )
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        post = dict(row)
+        post["parts"] = json.loads(post["parts"])
+        post["urns"] = json.loads(post["urns"])
+        post["url"] = (
+            f"https://www.linkedin.com/feed/update/{post['urns'][0]}/" if post["urns"] else None
+        )
+        return post
+
+
+class OutboxSender:
+    """
+    Publishes due posts from the outbox on a background thread.
+
+    Parts are sent one at a time within the LinkedIn post budget. When the
+    budget is spent the post waits for it, without counting an attempt. Posts
+    that fail with 429, 5xx or a network error are retried with exponential
+    backoff (or after LinkedIn's Retry-After) up to PUBLISH_MAX_ATTEMPTS times;
+    other errors fail the post straight away.
+
+    Every worker may run a sender: claims make sure each post is sent by one.
+
+    Args:
+        outbox (Outbox): The queue to drain.
+        poll_interval (float): Seconds to sleep when nothing is due.
+    """
+
+    def __init__(self, outbox: Outbox, poll_interval: float = PUBLISH_POLL_INTERVAL):
+        self.outbox = outbox
+        self.poll_interval = poll_interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = {"parts_sent": 0, "published": 0, "retries": 0, "throttled": 0, "failed": 0}
+
+    def start(self) -> None:
+        """
+        Start the sender thread, if it is not already running.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="outbox-sender", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the sender thread after the part it is sending, if any.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for the thread.
+        """
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def wake(self) -> None:
+        """
+        Check for due posts now instead of at the next poll.
+        """
+        self._wake.set()
+
+    def send_next(self) -> bool:
+        """
+        Claim the next due post and publish what is left of it.
+
+        Returns:
+            bool: Whether a post was due.
+        """
+        post = self.outbox.claim()
+        if post is None:
+            return False
+
+        try:
+            for position in range(len(post["urns"]), len(post["parts"])):
+                acquire(LINKEDIN_POSTS, timeout=0)
+                post["urns"].append(_publish_part(post, position))
+                self.outbox.record_part(post)
+                self._count("parts_sent")
+        except RateLimitExceeded as e:
+            # Not the post's fault, so it does not count as an attempt
+            self.outbox.retry(post, e.retry_after, str(e), post["attempts"])
+            self._count("throttled")
+        except PublishError as e:
+            attempts = post["attempts"] + 1
+            if e.retryable and attempts < PUBLISH_MAX_ATTEMPTS:
+                delay = e.retry_after if e.retry_after is not None else _backoff(attempts)
+                self.outbox.retry(post, delay, str(e), attempts)
+                self._count("retries")
+            else:
+                self.outbox.finish(post, FAILED, str(e))
+                self._count("failed")
+        except Exception as e:
+            traceback.print_exc()
+            self.outbox.finish(post, FAILED, str(e) or e.__class__.__name__)
+            self._count("failed")
+        else:
+            self.outbox.finish(post, PUBLISHED)
+            self._count("published")
+        return True
+
+    def stats(self) -> Dict:
+        """
+        Report the outbox by state and the sender's counters.
+
+        Returns:
+            Dict: Whether the sender is running, its counters and the outbox counts.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        stats["running"] = self._thread is not None and self._thread.is_alive()
+        stats["outbox"] = self.outbox.stats()
+        return stats
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.send_next():
+                    continue
+            except Exception:
+                traceback.print_exc()
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+
+def _publish_part(post: Dict, position: int) -> str:
+    # The first part is the post itself; the rest are comments on it
+    text = post["parts"][position]
+    client = get_restli_client()
+    try:
+        if position == 0:
+            with span("linkedin", "create_post"):
+                response = client.create(
+                    resource_path=UGC_POSTS_RESOURCE,
+                    entity=_ugc_post(post["author"], text),
+                    access_token=post["access_token"],
+                )
+        else:
+            with span("linkedin", "create_comment"):
+                response = client.create(
+                    resource_path=COMMENTS_RESOURCE,
+                    path_keys={"id": post["urns"][0]},
+                    entity={
+                        "actor": post["author"],
+                        "object": post["urns"][0],
+                        "message": {"text": text},
+                    },
+                    access_token=post["access_token"],
+                )
+    except requests.RequestException as e:
+        raise PublishError(f"LinkedIn request failed: {e}", retryable=True)
+
+    if response.status_code >= 300:
+        retry_after = response.headers.get("Retry-After")
+        raise PublishError(
+            f"LinkedIn returned {response.status_code} for part {position + 1} of {len(post['parts'])}",
+            retryable=response.status_code == 429 or response.status_code >= 500,
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
+    return response.entity_id or ""
+
+
+def _ugc_post(author: str, text: str) -> Dict:
+    return {
+        "author": author,
+        "lifecycleState": LIFECYCLE_STATE,
+        "specificContent": {
+            "com.linkedin.ugc.ShareContent": {
+                "shareCommentary": {"text": text},
+                "shareMediaCategory": "NONE",
+            }
+        },
+        "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"},
+    }
+
+
+def _backoff(attempts: int) -> float:
+    # Random jitter on top of the exponential delay spreads out retries of many posts
+    delay = min(PUBLISH_BACKOFF_MAX, PUBLISH_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay + random.uniform(0, PUBLISH_BACKOFF_BASE)
+
+
+# Process-wide outbox and its sender
+outbox = Outbox(PUBLISH_OUTBOX_PATH)
+outbox_sender = OutboxSender(outbox)
@@ -0,0 +1,361 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Priority lanes: interactive requests are served before batch pre-generation
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Named budgets for each upstream
+NEWSAPI_REQUESTS = "newsapi_requests"
+GEMINI_REQUESTS = "gemini_requests"
+GEMINI_TOKENS = "gemini_tokens"
+LINKEDIN_POSTS = "linkedin_posts"
+
+# Share of each budget batch callers must leave for interactive ones
+RATE_LIMIT_BATCH_RESERVE = float(os.getenv("RATE_LIMIT_BATCH_RESERVE", "0.2"))
+# How long a caller waits for its turn before being rejected, per lane
+MAX_WAIT = {
+    INTERACTIVE: float(os.getenv("RATE_LIMIT_INTERACTIVE_MAX_WAIT", "10")),
+    BATCH: float(os.getenv("RATE_LIMIT_BATCH_MAX_WAIT", "300")),
+}
+
+# SQLite file holding every budget's level, shared by all worker processes on the
+# host and kept across restarts; empty to keep budgets in each process's memory
+RATE_LIMIT_STATE_PATH = os.getenv("RATE_LIMIT_STATE_PATH", ".cache/ratelimits.sqlite3")
+
+_lane: ContextVar[str] = ContextVar("rate_limit_lane", default=INTERACTIVE)
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a budget cannot grant a request within the caller's maximum wait.
+
+    Args:
+        budget (str): Name of the exhausted budget.
+        retry_after (float): Seconds until the request could be granted.
+    """
+
+    def __init__(self, budget: str, retry_after: float):
+        super().__init__(
+            f"Rate limit for {budget} exceeded. Retry in {retry_after:.1f} seconds."
+        )
+        self.budget = budget
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket that refills continuously up to its capacity.
+
+    Callers take tokens with `acquire`, waiting for the bucket to refill if it
+    is short. A caller whose wait would exceed its maximum is rejected straight
+    away rather than after sleeping. Batch callers may not take the bucket below
+    its reserve and step aside while any interactive caller in the process is waiting.
+
+    With a `path`, the level lives in SQLite and every change is made in one
+    transaction, so all processes on the host spend from the same bucket and a
+    restarted process carries on from the level its predecessor left.
+
+    Args:
+        name (str): The budget name, used in errors and stats.
+        limit (float): Tokens granted per period, which is also the burst capacity.
+        period (float): Length of the period in seconds.
+        reserve (float): Fraction of the capacity reserved for interactive callers.
+        path (str, optional): SQLite file to share the level through. Kept in memory when None.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: float,
+        period: float,
+        reserve: float = RATE_LIMIT_BATCH_RESERVE,
+        path: Optional[str] = None,
+    ):
+        self.name = name
+        self.capacity = float(limit)
+        self.rate = limit / period
+        self.reserve = reserve
+        self.path = path
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+        self._waiting = {INTERACTIVE: 0, BATCH: 0}
+        self._counters = {"granted": 0, "rejected": 0, "waited_seconds": 0.0}
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=10)
+            try:
+                # Readers and the single writer do not block each other
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+            with self._transaction() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS buckets "
+                    "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+                )
+                # A bucket starts full only the first time it is created
+                conn.execute(
+                    "INSERT OR IGNORE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (name, self.capacity, time.time()),
+                )
+
+    def acquire(self, amount: float = 1.0, lane: Optional[str] = None, timeout: Optional[float] = None) -> float:
+        """
+        Take tokens from the bucket, waiting for them if necessary.
+
+        Requests larger than the capacity wait for a full bucket and then drive
+        it negative, so the overdraft is paid back by later callers.
+
+        Args:
+            amount (float): Number of tokens to take.
+            lane (str, optional): INTERACTIVE or BATCH. Defaults to the current lane.
+            timeout (float, optional): Maximum seconds to wait. Defaults to the lane's MAX_WAIT.
+
+        Returns:
+            float: Seconds spent waiting.
+
+        Raises:
+            RateLimitExceeded: If the tokens will not be available within `timeout`.
+        """
+        lane = lane or current_lane()
+        timeout = MAX_WAIT[lane] if timeout is None else timeout
+        floor = self.reserve * self.capacity if lane == BATCH else 0.0
+        needed = min(amount, self.capacity - floor)
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._condition:
+            self._waiting[lane] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    yielding = lane == BATCH and self._waiting[INTERACTIVE] > 0
+
+                    def take(tokens: float) -> Tuple[float, Optional[float]]:
+                        if not yielding and tokens - needed >= floor:
+                            return tokens - amount, None
+                        return tokens, max(0.0, (needed + floor - tokens) / self.rate)
+
+                    shortfall = self._change(take)
+                    if shortfall is None:
+                        waited = now - started
+                        self._counters["granted"] += 1
+                        self._counters["waited_seconds"] += waited
+                        return waited
+
+                    if now + shortfall > deadline:
+                        self._counters["rejected"] += 1
+                        raise RateLimitExceeded(self.name, shortfall)
+                    if yielding:
+                        # Woken when the interactive caller is served
+                        self._condition.wait(deadline - now)
+                    else:
+                        self._condition.wait(min(shortfall, deadline - now))
+            finally:
+                self._waiting[lane] -= 1
+                self._condition.notify_all()
+
+    def adjust(self, amount: float) -> None:
+        """
+        Charge (or refund, if negative) tokens without waiting.
+
+        Used to settle a request whose real cost is only known after it completes.
+
+        Args:
+            amount (float): Number of tokens to charge.
+        """
+        with self._condition:
+            self._change(lambda tokens: (min(self.capacity, tokens - amount), None))
+            self._condition.notify_all()
+
+    def level(self) -> Dict:
+        """
+        Report the bucket's current level and counters.
+
+        Returns:
+            Dict: Available tokens, capacity, refill rate, waiting callers per lane
+            and granted/rejected counts.
+        """
+        with self._condition:
+            available = self._change(lambda tokens: (tokens, tokens))
+            return {
+                "available": round(available, 3),
+                "capacity": self.capacity,
+                "refill_per_second": self.rate,
+                "waiting": dict(self._waiting),
+                **self._counters,
+            }
+
+    def scale(self, factor: float) -> None:
+        """
+        Scale the bucket's capacity, refill rate and current level.
+
+        Args:
+            factor (float): The multiplier, e.g. 1/4 for one of four worker processes.
+        """
+        with self._condition:
+            self._refill(time.monotonic())
+            self.capacity *= factor
+            self.rate *= factor
+            self._tokens *= factor
+
+    def _change(self, change: Callable[[float], Tuple[float, Any]]) -> Any:
+        # Refill the level, then replace it with the first value `change`
+        # returns; the second is passed back to the caller
+        if not self.path:
+            self._refill(time.monotonic())
+            self._tokens, result = change(self._tokens)
+            return result
+        with self._transaction() as conn:
+            tokens, updated = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            # Wall-clock time, since the level is shared between processes
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            tokens, result = change(tokens)
+            conn.execute(
+                "UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?", (tokens, now, self.name)
+            )
+        self._tokens = tokens
+        return result
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per change is safe in forked workers;
+        # BEGIN IMMEDIATE takes the write lock before the level is read
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            # With WAL, skipping the sync on each commit cannot corrupt the file
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+def _bucket(name: str, limit: str, period: float) -> Optional[TokenBucket]:
+    # A limit of 0 disables the budget
+    limit = float(limit)
+    return TokenBucket(name, limit, period, path=RATE_LIMIT_STATE_PATH or None) if limit > 0 else None
+
+
+budgets: Dict[str, Optional[TokenBucket]] = {
+    # NewsAPI's developer plan allows 100 requests a day
+    NEWSAPI_REQUESTS: _bucket(NEWSAPI_REQUESTS, os.getenv("NEWSAPI_REQUESTS_PER_DAY", "100"), 86400),
+    GEMINI_REQUESTS: _bucket(GEMINI_REQUESTS, os.getenv("GEMINI_REQUESTS_PER_MINUTE", "15"), 60),
+    GEMINI_TOKENS: _bucket(GEMINI_TOKENS, os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"), 60),
+    # LinkedIn caps how much a member may post a day; one app-wide budget keeps
+    # the publishing sender under it
+    LINKEDIN_POSTS: _bucket(LINKEDIN_POSTS, os.getenv("LINKEDIN_POSTS_PER_DAY", "150"), 86400),
+}
+
+
+def current_lane() -> str:
+    """
+    Return the priority lane of the current context.
+
+    Returns:
+        str: INTERACTIVE (the default) or BATCH.
+    """
+    return _lane.get()
+
+
+@contextmanager
+def priority(lane: str) -> Iterator[None]:
+    """
+    Run the enclosed calls in the given priority lane.
+
+    The lane is stored in a context variable, so it follows the code into job
+    queue workers and fan-out threads that copy the caller's context.
+
+    Args:
+        lane (str): INTERACTIVE or BATCH.
+    """
+    if lane not in MAX_WAIT:
+        raise ValueError(f"Unknown lane {lane!r}. Use {INTERACTIVE!r} or {BATCH!r}.")
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def acquire(name: str, amount: float = 1.0, timeout: Optional[float] = None) -> float:
+    """
+    Take tokens from a named budget in the current lane.
+
+    Args:
+        name (str): The budget name.
+        amount (float): Number of tokens to take.
+        timeout (float, optional): Maximum seconds to wait.
+
+    Returns:
+        float: Seconds spent waiting (0 if the budget is disabled).
+
+    Raises:
+        RateLimitExceeded: If the tokens will not be available in time.
+    """
+    bucket = budgets[name]
+    if bucket is None:
+        return 0.0
+    return bucket.acquire(amount, timeout=timeout)
+
+
+def adjust(name: str, amount: float) -> None:
+    """
+    Charge or refund tokens on a named budget without waiting.
+
+    Args:
+        name (str): The budget name.
+        amount (float): Number of tokens to charge; negative to refund.
+    """
+    bucket = budgets[name]
+    if bucket is not None:
+        bucket.adjust(amount)
+
+
+def share_budgets(processes: int) -> None:
+    """
+    Give this process an equal share of every budget kept in memory.
+
+    Budgets shared through RATE_LIMIT_STATE_PATH are left alone, since every
+    process already spends from the same level. Budgets kept in memory are not
+    shared, so each of several worker processes serving the same API keys must
+    only spend its share of the upstream quotas.
+
+    Args:
+        processes (int): Number of processes sharing the budgets.
+    """
+    for bucket in budgets.values():
+        if bucket is not None and not bucket.path:
+            bucket.scale(1 / processes)
+
+
+def ratelimit_stats() -> Dict[str, Optional[Dict]]:
+    """
+    Report the current level of every budget.
+
+    Returns:
+        Dict: Per budget, its level and counters, or None if it is disabled.
+    """
+    return {name: bucket.level() if bucket else None for name, bucket in budgets.items()}
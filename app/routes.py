@@ -1,14 +1,33 @@
 import os
 import sys
+import time
+from datetime import datetime
 from typing import Dict, Optional
-from flask import Flask, redirect, request, render_template
-from dotenv import load_dotenv, find_dotenv
-from linkedin_api.clients.auth.client import AuthClient
-from linkedin_api.clients.restli.client import RestliClient
-from app.agents.newsletter_generator import get_newsletter_generator
-from agno.agent import RunResponse
-import markdown
-from bs4 import BeautifulSoup
+from concurrent.futures import TimeoutError as JobTimeoutError
+from flask import (
+    Flask,
+    Response,
+    g,
+    redirect,
+    request,
+    render_template,
+    jsonify,
+    stream_with_context,
+    url_for,
+)
+from app.agents.result_cache import newsletter_cache, preset_store
+from app.formatting import parse_html
+from app.jobs import job_queue, JobQueueFull
+from app.linkedin import get_auth_client, get_restli_client
+from app.metrics import finish_trace, get_trace, render_metrics, span, stage_seconds, start_trace
+from app.publishing import outbox, outbox_sender
+from app.ratelimit import RateLimitExceeded, ratelimit_stats
+from app.scheduler import newsletter_scheduler
+from app.sessions import get_access_token, get_userinfo, session_stats, sign_in
+from app.tools.article_index import article_index
+from app.tools.compact import compaction_stats
+from app.transport import transport_stats
+from app.streaming import IncrementalMarkdown, render_markdown, sse_event
 from flask import Blueprint
 
 
@@ -17,21 +36,9 @@ bp = Blueprint("linkedin", __name__)
 # Add the parent directory to the Python path for imports
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-# Load environment variables from .env file
-load_dotenv(find_dotenv())
 TEMPLATE = "index.html"
-# Constants for LinkedIn API and post configuration
-CLIENT_ID = os.getenv("CLIENT_ID")
-CLIENT_SECRET = os.getenv("CLIENT_SECRET")
-OAUTH2_REDIRECT_URL = os.getenv("OAUTH2_REDIRECT_URL")
-LIFECYCLE_STATE = os.getenv("lifecycleState")
-UGC_POSTS_RESOURCE = "/ugcPosts"
-MAX_POST_LENGTH = 2500
-
-
-# Global variables for LinkedIn access and user information
-access_token: Optional[str] = None
-entity: Optional[Dict] = None
+# Seconds the synchronous /newsletter route waits for its background job
+NEWSLETTER_JOB_TIMEOUT = float(os.getenv("NEWSLETTER_JOB_TIMEOUT", "300"))
 
 # Author information for rendering in templates
 author = {
@@ -40,159 +47,363 @@ author = {
     "github": "https://github.com/shubhamshah207",
 }
 
-# Initialize LinkedIn API clients
-auth_client = AuthClient(
-    client_id=CLIENT_ID, client_secret=CLIENT_SECRET, redirect_url=OAUTH2_REDIRECT_URL
-)
-restli_client = RestliClient()
 
+def _refresh_access_token(refresh_token: str):
+    return get_auth_client().exchange_refresh_token_for_access_token(refresh_token)
+
+
+def _fetch_userinfo(access_token: str) -> Dict:
+    return get_restli_client().get(resource_path="/userinfo", access_token=access_token).entity
 
-def bold_text(text: str) -> str:
+
+def _mode_stats() -> Dict:
+    # Nothing has been generated until the agents are loaded, and loading them
+    # just to report that would defeat importing them lazily
+    generator = sys.modules.get("app.agents.newsletter_generator")
+    return generator.mode_stats() if generator else {}
+
+
+def _ranking_stats() -> Dict:
+    # Ranking loads numpy, so it is only imported with the pipeline
+    ranking = sys.modules.get("app.tools.ranking")
+    return ranking.ranking_stats() if ranking else {}
+
+
+def _use_cache() -> bool:
+    """
+    Check the request for the cache bypass flag ("nocache=1" in the form or query string).
     """
-    Convert a given text to bold using Unicode bold characters.
+    return request.values.get("nocache", "").lower() not in ("1", "true", "yes", "on")
 
-    Args:
-        text (str): The input text to be converted.
 
-    Returns:
-        str: The text converted to bold using Unicode characters.
+@bp.before_request
+def start_request_trace():
+    """
+    Time every request, and record a trace of its spans when `trace=1` is sent.
     """
-    normal = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
-    bold = "𝗔𝗕𝗖𝗗𝗘𝗙𝗚𝗛𝗜𝗝𝗞𝗟𝗠𝗡𝗢𝗣𝗤𝗥𝗦𝗧𝗨𝗩𝗪𝗫𝗬𝗭𝗮𝗯𝗰𝗱𝗲𝗳𝗴𝗵𝗶𝗝𝗸𝗹𝗺𝗻𝗼𝗽𝗾𝗿𝘀𝘁𝘂𝘃𝘄𝘅𝘆𝘇𝟬𝟭𝟮𝟯𝟰𝟱𝟲𝟳𝟴𝟵"
-    bold_mapping = str.maketrans(normal, bold)
-    return text.translate(bold_mapping)
+    g.request_started = time.perf_counter()
+    if request.values.get("trace") == "1" or request.headers.get("X-Trace") == "1":
+        g.trace = start_trace()
 
 
-def parse_html(html: str) -> str:
+@bp.after_request
+def record_request_time(response: Response) -> Response:
     """
-    Parse HTML content and extract text while preserving structure.
-    Text inside header tags (h1-h4) will be bolded.
+    Record the request's latency and return its trace id, if it is traced.
+    """
+    stage_seconds.observe(
+        time.perf_counter() - g.request_started, "request", request.endpoint or ""
+    )
+    trace = g.get("trace")
+    if trace is not None:
+        response.headers["X-Trace-Id"] = trace.id
+    return response
 
-    Args:
-        html (str): The HTML content to be parsed.
 
-    Returns:
-        str: The parsed and formatted text with bold headers.
-    """
-    soup = BeautifulSoup(html, features="html.parser")
-    text = []
-    prev_element = None
-
-    for element in soup.descendants:
-        if isinstance(element, str):
-            stripped_text = element.strip()
-            if stripped_text:
-                # Apply bold_text to text inside <strong>, <h1>, <h2>, <h3>, <h4>
-                if prev_element in ["h1", "h2", "h3", "h4", "strong"]:  # Bold headers
-                    text.append(bold_text(stripped_text))
-                else:
-                    text.append(stripped_text)
-        elif element.name in ["br", "p", "h1", "h2", "h3", "h4"]:
-            if prev_element not in ["br", "p", "h1", "h2", "h3", "h4"]:
-                text.append("\n\n")
-        elif element.name == "li":
-            depth = len(element.find_parents("ul")) + len(element.find_parents("ol"))
-            text.append("\n" + "  " * (depth - 1) + "- ")
-        elif element.name in ["tr"]:
-            text.append("\n")
-        elif element.name in ["th", "td"]:
-            text.append("\t")
-
-        prev_element = element.name
-
-    return "".join(text).strip()
+@bp.teardown_request
+def finish_request_trace(error: Optional[BaseException] = None) -> None:
+    """
+    Stop tracing once the request is over, even if it failed.
+    """
+    trace = g.pop("trace", None)
+    if trace is not None:
+        finish_trace(trace)
 
 
 @bp.route("/linkedin_access", methods=["GET"])
 def linkedin_access():
     """
     Handle LinkedIn access and authentication. Redirects to LinkedIn authentication if
-    access token is not available, else retrieves user information and renders the dashboard.
+    the visitor has no access token, else retrieves their user information and renders
+    the dashboard.
     """
-    global access_token, entity
+    access_token = get_access_token(refresh=_refresh_access_token)
     if access_token is None:
         return redirect(
-            auth_client.generate_member_auth_url(
+            get_auth_client().generate_member_auth_url(
                 scopes=["w_member_social", "openid", "profile"]
             )
         )
     else:
-        entity = restli_client.get(
-            resource_path="/userinfo", access_token=access_token
-        ).entity
+        entity = get_userinfo(access_token, fetch=_fetch_userinfo)
         return render_template(TEMPLATE, entity=entity, author=author)
 
 
 @bp.route("/linkedin_post", methods=["POST"])
 def linkedin_post():
     """
-    Create a LinkedIn post with the provided content.
+    Queue the provided content to be published on LinkedIn as the signed-in member.
+
+    Long newsletters are split into a post and follow-up comments. Send
+    `publish_at` (Unix time or ISO 8601, local time) to schedule the post, and an
+    `Idempotency-Key` header (or `idempotency_key` field) to make retried requests
+    safe; by default the same member posting the same text is only published once.
+    Returns at once with the post's id and status URL.
     """
-    global entity, access_token
-    if entity is None or access_token is None:
+    access_token = get_access_token(refresh=_refresh_access_token)
+    if access_token is None:
         return redirect("/linkedin_access")
+    entity = get_userinfo(access_token, fetch=_fetch_userinfo)
+
+    try:
+        publish_at = _parse_publish_at(request.form.get("publish_at"))
+    except ValueError:
+        return "publish_at must be a Unix time or an ISO 8601 date and time.", 400
 
     post_content = request.form["post"]
-    text = parse_html(post_content)
-    print(text)
-
-    # Prepare the LinkedIn post
-    ugc_post = {
-        "author": f"urn:li:person:{entity['sub']}",
-        "lifecycleState": LIFECYCLE_STATE,
-        "specificContent": {
-            "com.linkedin.ugc.ShareContent": {
-                "shareCommentary": {"text": text[:MAX_POST_LENGTH]},
-                "shareMediaCategory": "NONE",
-            }
-        },
-        "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"},
-    }
+    with span("parse_html"):
+        text = parse_html(post_content)
 
-    # Send the post creation request
-    ugc_posts_create_response = restli_client.create(
-        resource_path=UGC_POSTS_RESOURCE,
-        entity=ugc_post,
+    post, created = outbox.enqueue(
+        author=f"urn:li:person:{entity['sub']}",
         access_token=access_token,
+        text=text,
+        publish_at=publish_at,
+        idempotency_key=request.headers.get("Idempotency-Key") or request.form.get("idempotency_key"),
     )
+    outbox_sender.wake()
+    return jsonify(_post_status(post)), 202 if created else 200
+
+
+@bp.route("/linkedin_post/<post_id>", methods=["GET"])
+def linkedin_post_status(post_id: str):
+    """
+    Return the delivery state of a queued post and, once published, its URL.
+    """
+    post = outbox.get(post_id)
+    if post is None:
+        return jsonify({"error": f"Unknown post {post_id}"}), 404
+    return jsonify(_post_status(post))
+
+
+def _parse_publish_at(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _post_status(post: Dict) -> Dict:
+    status = {
+        key: post[key]
+        for key in ("id", "status", "publish_at", "attempts", "last_error", "url", "urns")
+    }
+    status["parts"] = len(post["parts"])
+    status["status_url"] = url_for("linkedin.linkedin_post_status", post_id=post["id"])
+    return status
+
+
+def get_preset_newsletter(command: str) -> Optional[Dict]:
+    """
+    Return the pre-generated newsletter for a request that matches a preset.
+
+    Args:
+        command (str): The user's newsletter request.
 
-    # Redirect to the new post URL
-    return redirect(
-        f"https://www.linkedin.com/feed/update/{ugc_posts_create_response.entity_id}/"
+    Returns:
+        Dict: The markdown newsletter under "content" and its statistics under
+        "stats", or None if no pre-generated newsletter matches.
+    """
+    preset = preset_store.get(command)
+    if preset is None:
+        return None
+    stats = dict(preset["stats"], cached=True, preset=True, generated_at=preset["generated_at"])
+    return {"content": preset["content"], "stats": stats}
+
+
+def render_newsletter(command: str, use_cache: bool = True) -> Dict:
+    """
+    Generate a newsletter and render its markdown output as HTML.
+
+    Requests matching a preset are served from the pre-generated newsletter.
+
+    Args:
+        command (str): The user's newsletter request.
+        use_cache (bool): Whether a cached or pre-generated newsletter may be returned.
+
+    Returns:
+        Dict: The generated HTML under "response", the original command under "input"
+        and the generation statistics under "stats".
+    """
+    newsletter = get_preset_newsletter(command) if use_cache else None
+    if newsletter is None:
+        # Loads agno and Gemini on the first newsletter that is not pre-generated
+        from app.agents.newsletter_generator import generate_newsletter
+
+        newsletter = generate_newsletter(command, use_cache=use_cache)
+    with span("markdown", "newsletter"):
+        html_content = render_markdown(newsletter["content"])
+    return {
+        "response": html_content,
+        "input": command,
+        "stats": newsletter["stats"],
+    }
+
+
+@bp.route("/newsletter/jobs", methods=["POST"])
+def submit_newsletter_job():
+    """
+    Queue newsletter generation in the background and return the job id immediately.
+    """
+    command = request.form["text"]
+    try:
+        job = job_queue.submit("newsletter", render_newsletter, command, _use_cache())
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+
+    return (
+        jsonify(
+            {
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": url_for("linkedin.newsletter_job", job_id=job.id),
+            }
+        ),
+        202,
+    )
+
+
+@bp.route("/newsletter/jobs/<job_id>", methods=["GET"])
+def newsletter_job(job_id: str):
+    """
+    Return the state, timings and (once done) the result of a newsletter job.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+
+@bp.route("/newsletter/stats", methods=["GET"])
+def newsletter_stats():
+    """
+    Report LLM call counts and latency for each generation mode, job queue state,
+    prompt tokens saved by compaction, HTTP pool and retry metrics, the
+    remaining NewsAPI, Gemini and LinkedIn rate limit budgets, preset
+    pre-generation, signed-in sessions, the publishing outbox, the local
+    article index and relevance ranking.
+    """
+    return jsonify(
+        {
+            "modes": _mode_stats(),
+            "jobs": job_queue.stats(),
+            "compaction": compaction_stats(),
+            "newsletter_cache": newsletter_cache.stats(),
+            "transport": transport_stats(),
+            "ratelimits": ratelimit_stats(),
+            "presets": newsletter_scheduler.stats(),
+            "sessions": session_stats(),
+            "publishing": outbox_sender.stats(),
+            "article_index": article_index.stats() if article_index else None,
+            "ranking": _ranking_stats(),
+        }
     )
 
 
+@bp.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Export per-stage latency histograms and LLM token counts in the Prometheus text format.
+    """
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+@bp.route("/metrics/traces/<trace_id>", methods=["GET"])
+def metrics_trace(trace_id: str):
+    """
+    Return the spans recorded for a traced request.
+    """
+    trace = get_trace(trace_id)
+    if trace is None:
+        return jsonify({"error": f"Unknown trace {trace_id}"}), 404
+    return jsonify(trace)
+
+
 @bp.route("/newsletter", methods=["POST"])
 def newsletter():
     """
     Generate a newsletter based on user input and return the HTML content.
     """
     command = request.form["text"]
-    agent = get_newsletter_generator()
-
-    # Run the newsletter generation agent
-    response: RunResponse = agent.run(command, markdown=True)
-    html_content = markdown.markdown(response.content)
-    result = {
-        "response": html_content,
-        "input": command,
-    }
+    try:
+        job = job_queue.submit("newsletter", render_newsletter, command, _use_cache())
+    except JobQueueFull as e:
+        return str(e), 503
+
+    try:
+        result = job_queue.wait(job, timeout=NEWSLETTER_JOB_TIMEOUT)
+    except JobTimeoutError:
+        return (
+            f"Newsletter generation is still running. "
+            f"Check {url_for('linkedin.newsletter_job', job_id=job.id)} for the result.",
+            504,
+        )
+    except RateLimitExceeded as e:
+        return str(e), 429, {"Retry-After": str(int(e.retry_after) + 1)}
     return render_template(TEMPLATE, result=result, author=author)
 
 
+@bp.route("/newsletter/stream", methods=["GET", "POST"])
+def newsletter_stream():
+    """
+    Stream a newsletter as Server-Sent Events while the agent generates it.
+
+    Each completed markdown block is sent as an "html" event as soon as it is
+    available. A final "done" event carries the whole newsletter rendered in one
+    piece, which replaces the streamed blocks and fills the LinkedIn post form.
+    """
+    command = request.values["text"]
+    use_cache = _use_cache()
+
+    def generate():
+        # Send something straight away so the client knows the stream is open
+        yield ": stream opened\n\n"
+
+        converter = IncrementalMarkdown()
+        texts = []
+        preset = get_preset_newsletter(command) if use_cache else None
+        try:
+            if preset:
+                chunks = [preset["content"]]
+            else:
+                from app.agents.newsletter_generator import stream_newsletter
+
+                chunks = stream_newsletter(command, use_cache=use_cache)
+            for text in chunks:
+                texts.append(text)
+                for html in converter.feed(text):
+                    yield sse_event("html", {"html": html})
+            for html in converter.flush():
+                yield sse_event("html", {"html": html})
+        except Exception as e:
+            yield sse_event("error", {"error": str(e)})
+            return
+
+        # Blockquotes, reference-style links and HTML blocks can render
+        # differently once the rest of the document is known
+        yield sse_event("done", {"response": render_markdown("".join(texts)), "input": command})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @bp.route("/oauth", methods=["GET"])
 def oauth():
     """
-    Handle OAuth callback and token exchange.
+    Handle OAuth callback and token exchange, signing the visitor in.
     """
-    global access_token
-
     auth_code = request.args.get("code")
 
     if auth_code:
-        token_response = auth_client.exchange_auth_code_for_access_token(auth_code)
-        access_token = token_response.access_token
-        print(f"Access token: {access_token[:10]}...")
+        token_response = get_auth_client().exchange_auth_code_for_access_token(auth_code)
+        if not token_response.access_token:
+            return "LinkedIn sign-in failed. Please try again.", 502
+        sign_in(token_response)
         return redirect("/linkedin_access")
 
 
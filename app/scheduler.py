@@ -0,0 +1,254 @@
+import os
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from app.agents.result_cache import PresetStore, normalize_command, preset_store
+from app.ratelimit import BATCH, priority
+
+# Requests to pre-generate, separated by ";"
+NEWSLETTER_PRESETS = os.getenv(
+    "NEWSLETTER_PRESETS", "10 popular news on AI/Data Science from the last 7 days"
+)
+# Standard five-field cron expression (minute hour day month weekday), local time
+NEWSLETTER_SCHEDULE = os.getenv("NEWSLETTER_SCHEDULE", "0 4 * * *")
+# Seconds over which the presets of one scheduled run are spread out
+NEWSLETTER_SCHEDULE_SPREAD = float(os.getenv("NEWSLETTER_SCHEDULE_SPREAD", "3600"))
+
+# (minimum, maximum) of each cron field
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+class CronSchedule:
+    """
+    A five-field cron expression: minute, hour, day of month, month and day of week.
+
+    Each field accepts "*", single values, ranges ("1-5"), steps ("*/15", "0-30/10")
+    and comma-separated lists of these. Day of week runs from 0 (Sunday) to 6,
+    with 7 also meaning Sunday. As in cron, when both day fields are restricted a
+    time matches if either one does.
+
+    Args:
+        expression (str): The cron expression.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(
+                f"Cron expression {expression!r} must have {len(CRON_FIELDS)} fields."
+            )
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        Return the first matching minute strictly after `moment`.
+
+        Args:
+            moment (datetime): The time to search from.
+
+        Returns:
+            datetime: The next scheduled time.
+        """
+        current = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Every valid expression matches at least once in a four-year leap cycle
+        limit = current + timedelta(days=4 * 366)
+        while current < limit:
+            if current.month not in self.months:
+                current = (current.replace(day=1) + timedelta(days=32)).replace(
+                    day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(current):
+                current = current.replace(hour=0, minute=0) + timedelta(days=1)
+            elif current.hour not in self.hours:
+                current = current.replace(minute=0) + timedelta(hours=1)
+            elif current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+            else:
+                return current
+        raise ValueError(f"Cron expression {self.expression!r} never matches.")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        # datetime counts weekdays from Monday = 0, cron from Sunday = 0
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday
+        if self._any_weekday:
+            return day
+        return day or weekday
+
+
+def _parse_field(field: str, low: int, high: int) -> Set[int]:
+    values = set()
+    for part in field.split(","):
+        spec, _, step = part.partition("/")
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(value) for value in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+            if step:
+                end = high
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron field {field!r} is outside {low}-{high}.")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class NewsletterScheduler:
+    """
+    Pre-generates preset newsletters on a cron schedule so they can be served instantly.
+
+    At each scheduled time the presets are generated one after another, spread
+    evenly over `spread` seconds so the work does not land in a single burst.
+    Generation runs in the batch rate limit lane, so it never takes quota ahead of
+    interactive requests, and goes through the article and newsletter caches,
+    warming both. Each result is stored in the preset store.
+
+    Args:
+        presets (List[str]): The newsletter requests to pre-generate.
+        schedule (str): Cron expression for the runs.
+        spread (float): Seconds over which the presets of one run are spread.
+        store (PresetStore): Where pre-generated newsletters are stored.
+    """
+
+    def __init__(
+        self,
+        presets: List[str],
+        schedule: str = NEWSLETTER_SCHEDULE,
+        spread: float = NEWSLETTER_SCHEDULE_SPREAD,
+        store: PresetStore = preset_store,
+    ):
+        self.presets = list(presets)
+        self.schedule = CronSchedule(schedule)
+        self.spread = spread
+        self.store = store
+        self.next_run: Optional[datetime] = None
+        self._runs: Dict[str, Dict] = {}
+        for command in self.presets:
+            store.register(command)
+            self._runs[normalize_command(command)] = {
+                "runs": 0,
+                "failures": 0,
+                "last_run_at": None,
+                "last_seconds": None,
+                "total_seconds": 0.0,
+                "last_error": None,
+            }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start the background scheduling thread, if it is not already running.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="newsletter-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the scheduling thread after the preset it is generating, if any.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for the thread.
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def run_preset(self, command: str) -> bool:
+        """
+        Generate one preset newsletter now and store it.
+
+        Args:
+            command (str): The preset newsletter request.
+
+        Returns:
+            bool: Whether generation succeeded.
+        """
+        # Imported here so loading the app does not load agno and Gemini
+        from app.agents.newsletter_generator import generate_newsletter
+
+        runs = self._runs[normalize_command(command)]
+        started = time.perf_counter()
+        error = None
+        try:
+            with priority(BATCH):
+                newsletter = generate_newsletter(command)
+            self.store.put(command, newsletter["content"], newsletter["stats"])
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            traceback.print_exc()
+
+        seconds = time.perf_counter() - started
+        with self._lock:
+            runs["runs"] += 1
+            runs["failures"] += error is not None
+            runs["last_run_at"] = time.time()
+            runs["last_seconds"] = seconds
+            runs["total_seconds"] += seconds
+            runs["last_error"] = error
+        return error is None
+
+    def stats(self) -> Dict:
+        """
+        Report the schedule and, per preset, generation timings and lookup hit rate.
+
+        Returns:
+            Dict: The schedule, whether it is running, the next run time and per-preset stats.
+        """
+        lookups = self.store.stats()
+        with self._lock:
+            presets = {}
+            for command, runs in self._runs.items():
+                preset = dict(runs)
+                preset["avg_seconds"] = (
+                    runs["total_seconds"] / runs["runs"] if runs["runs"] else None
+                )
+                preset.update(lookups.get(command, {}))
+                presets[command] = preset
+        return {
+            "schedule": self.schedule.expression,
+            "spread_seconds": self.spread,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "presets": presets,
+        }
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.next_run = self.schedule.next_after(datetime.now())
+            for index, command in enumerate(self.presets):
+                offset = timedelta(seconds=self.spread * index / len(self.presets))
+                if self._sleep_until(self.next_run + offset):
+                    return
+                self.run_preset(command)
+            if not self.presets and self._sleep_until(self.next_run):
+                return
+
+    def _sleep_until(self, moment: datetime) -> bool:
+        # Returns True if the scheduler was stopped while sleeping
+        return self._stop.wait(max(0.0, (moment - datetime.now()).total_seconds()))
+
+
+newsletter_scheduler = NewsletterScheduler(
+    [preset.strip() for preset in NEWSLETTER_PRESETS.split(";") if preset.strip()]
+)
@@ -0,0 +1,438 @@
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from flask import session
+
+# Where signed-in members' LinkedIn tokens are kept: "memory" (this process
+# only), "sqlite" or "file" (both shared by every worker on the host)
+SESSION_STORE = os.getenv("SESSION_STORE", "sqlite")
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH")
+# Seconds a member's /userinfo response is reused before it is fetched again
+LINKEDIN_USERINFO_TTL = float(os.getenv("LINKEDIN_USERINFO_TTL", "3600"))
+# Access tokens are refreshed this many seconds before they expire
+LINKEDIN_TOKEN_REFRESH_MARGIN = float(os.getenv("LINKEDIN_TOKEN_REFRESH_MARGIN", "86400"))
+
+# Key of the session id in Flask's signed session cookie
+SESSION_ID_KEY = "sid"
+
+DEFAULT_PATHS = {
+    "sqlite": ".cache/sessions.sqlite3",
+    "file": ".cache/sessions",
+}
+
+
+class TokenStore(ABC):
+    """
+    Base class for stores of signed-in members' session records.
+
+    Records are JSON-serializable dicts kept until their expiry time. They are
+    stored under a hash of the session id, so the ids in the session cookies
+    never appear in the store itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "deletes": 0}
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """
+        Return the record for a session if it has not expired.
+
+        Args:
+            session_id (str): The session id from the session cookie.
+
+        Returns:
+            Dict: The record, or None if there is none or it has expired.
+        """
+        key = self._key(session_id)
+        entry = self._load(key)
+        if entry is None:
+            self._count("misses")
+            return None
+        record, expires_at = entry
+        if time.time() >= expires_at:
+            self._delete(key)
+            self._count("expired")
+            return None
+        self._count("hits")
+        return record
+
+    def put(self, session_id: str, record: Dict, expires_at: float) -> None:
+        """
+        Store a session's record until `expires_at`.
+
+        Args:
+            session_id (str): The session id from the session cookie.
+            record (Dict): JSON-serializable record.
+            expires_at (float): Unix time after which the record is discarded.
+        """
+        self._save(self._key(session_id), record, expires_at)
+        self._count("writes")
+
+    def delete(self, session_id: str) -> None:
+        """
+        Remove a session's record.
+
+        Args:
+            session_id (str): The session id from the session cookie.
+        """
+        self._delete(self._key(session_id))
+        self._count("deletes")
+
+    def stats(self) -> Dict:
+        """
+        Return hit/miss/write counters and the number of stored sessions.
+
+        Returns:
+            Dict: Counter name to value.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        stats["backend"] = self.backend
+        stats["sessions"] = self._size()
+        return stats
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    @abstractmethod
+    def _load(self, key: str) -> Optional[tuple]:
+        """Return `(record, expires_at)` for a key, or None if it is missing."""
+
+    @abstractmethod
+    def _save(self, key: str, record: Dict, expires_at: float) -> None:
+        """Store a record under a key until `expires_at`."""
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        """Remove a key if it is present."""
+
+    @abstractmethod
+    def _size(self) -> int:
+        """Return the number of records held."""
+
+
+class MemoryTokenStore(TokenStore):
+    """
+    Keeps session records in this process.
+
+    Only suitable for a single process: other workers cannot see its sessions.
+    """
+
+    backend = "memory"
+
+    def __init__(self):
+        super().__init__()
+        # key -> (record, expires_at)
+        self._records: Dict[str, tuple] = {}
+
+    def _load(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            return self._records.get(key)
+
+    def _save(self, key: str, record: Dict, expires_at: float) -> None:
+        now = time.time()
+        with self._lock:
+            # Drop expired sessions so the store does not grow without bound
+            for expired in [k for k, (_, at) in self._records.items() if at <= now]:
+                del self._records[expired]
+            self._records[key] = (json.loads(json.dumps(record)), expires_at)
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+    def _size(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+
+class SQLiteTokenStore(TokenStore):
+    """
+    Keeps session records in a SQLite file shared by every worker on the host.
+
+    Args:
+        path (str): Location of the SQLite file.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "key TEXT PRIMARY KEY, record TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation is safe from worker threads
+        # and from forked processes
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _load(self, key: str) -> Optional[tuple]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT record, expires_at FROM sessions WHERE key = ?", (key,)
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _save(self, key: str, record: Dict, expires_at: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (key, record, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(record), expires_at),
+            )
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+
+    def _delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+    def _size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class FileTokenStore(TokenStore):
+    """
+    Keeps each session record in its own JSON file in a shared directory.
+
+    Files are replaced atomically, so workers (or hosts mounting the same
+    directory) never read a partly written record.
+
+    Args:
+        directory (str): Directory holding the session files.
+    """
+
+    backend = "file"
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        # The records hold access tokens, so keep them private to this user
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load(self, key: str) -> Optional[tuple]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry["record"], entry["expires_at"]
+
+    def _save(self, key: str, record: Dict, expires_at: float) -> None:
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as f:
+                json.dump({"record": record, "expires_at": expires_at}, f)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def _delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _size(self) -> int:
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+
+
+def make_token_store(backend: str, path: Optional[str] = None) -> TokenStore:
+    """
+    Build a token store.
+
+    Args:
+        backend (str): "memory", "sqlite" or "file".
+        path (str, optional): SQLite file or directory for the shared backends.
+            Defaults to a location under .cache.
+
+    Returns:
+        TokenStore: The store.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend == "memory":
+        return MemoryTokenStore()
+    if backend == "sqlite":
+        return SQLiteTokenStore(path or DEFAULT_PATHS["sqlite"])
+    if backend == "file":
+        return FileTokenStore(path or DEFAULT_PATHS["file"])
+    raise ValueError(f"Unknown session store {backend!r}. Use 'memory', 'sqlite' or 'file'.")
+
+
+# Process-wide store of signed-in members' tokens and profiles
+token_store = make_token_store(SESSION_STORE, SESSION_STORE_PATH)
+
+_counters = {"refreshes": 0, "refresh_errors": 0, "userinfo_hits": 0, "userinfo_fetches": 0}
+_counters_lock = threading.Lock()
+# Only one thread per process refreshes a token at a time
+_refresh_lock = threading.Lock()
+
+
+def current_session_id() -> Optional[str]:
+    """
+    Return the session id from the signed session cookie.
+
+    Returns:
+        str: The session id, or None if the visitor has not signed in.
+    """
+    return session.get(SESSION_ID_KEY)
+
+
+def sign_in(token_response) -> None:
+    """
+    Start a new session for a member who has just authorized the app.
+
+    A fresh session id is issued on every sign-in, so an id set before
+    authorization can never be used to reach the member's tokens.
+
+    Args:
+        token_response (AccessToken3LResponse): The response of the authorization
+            code exchange.
+    """
+    session_id = secrets.token_urlsafe(32)
+    session.clear()
+    session[SESSION_ID_KEY] = session_id
+    session.permanent = True
+    _save(session_id, _token_record(token_response))
+
+
+def get_access_token(refresh: Callable[[str], object]) -> Optional[str]:
+    """
+    Return the signed-in member's access token, refreshing it ahead of expiry.
+
+    Tokens within LINKEDIN_TOKEN_REFRESH_MARGIN seconds of expiring are
+    exchanged for new ones if the member has a refresh token. A failed refresh
+    is retried on the next call while the current token is still valid.
+
+    Args:
+        refresh (Callable): Exchanges a refresh token for a new token response.
+
+    Returns:
+        str: The access token, or None if the visitor is not signed in or their
+        token has expired.
+    """
+    session_id = current_session_id()
+    record = token_store.get(session_id) if session_id else None
+    if record is None:
+        return None
+
+    if time.time() >= record["expires_at"] - LINKEDIN_TOKEN_REFRESH_MARGIN and _can_refresh(record):
+        with _refresh_lock:
+            # Another thread may have refreshed it while this one waited
+            record = token_store.get(session_id) or record
+            if time.time() >= record["expires_at"] - LINKEDIN_TOKEN_REFRESH_MARGIN:
+                try:
+                    refreshed = _token_record(refresh(record["refresh_token"]))
+                    record = dict(record, **refreshed)
+                    _save(session_id, record)
+                    _count("refreshes")
+                except Exception:
+                    _count("refresh_errors")
+                    traceback.print_exc()
+
+    if time.time() >= record["expires_at"]:
+        token_store.delete(session_id)
+        return None
+    return record["access_token"]
+
+
+def get_userinfo(access_token: str, fetch: Callable[[str], Dict]) -> Dict:
+    """
+    Return the signed-in member's profile, fetching it at most once per
+    LINKEDIN_USERINFO_TTL seconds.
+
+    Args:
+        access_token (str): The member's access token, from `get_access_token`.
+        fetch (Callable): Fetches /userinfo with the given access token.
+
+    Returns:
+        Dict: The member's /userinfo response.
+    """
+    session_id = current_session_id()
+    record = token_store.get(session_id) if session_id else None
+    if record and record.get("userinfo") and time.time() < record["userinfo_expires_at"]:
+        _count("userinfo_hits")
+        return record["userinfo"]
+
+    userinfo = fetch(access_token)
+    _count("userinfo_fetches")
+    if record is not None:
+        record.update(userinfo=userinfo, userinfo_expires_at=time.time() + LINKEDIN_USERINFO_TTL)
+        _save(session_id, record)
+    return userinfo
+
+
+def session_stats() -> Dict:
+    """
+    Report the token store's counters and token refresh and /userinfo cache counts.
+
+    Returns:
+        Dict: Counter name to value.
+    """
+    with _counters_lock:
+        stats = dict(_counters)
+    stats["store"] = token_store.stats()
+    return stats
+
+
+def _token_record(token_response) -> Dict:
+    now = time.time()
+    record = {
+        "access_token": token_response.access_token,
+        "expires_at": now + token_response.expires_in,
+    }
+    # Refresh tokens are only issued to apps LinkedIn has approved for them
+    refresh_token = getattr(token_response, "refresh_token", None)
+    if refresh_token:
+        record["refresh_token"] = refresh_token
+        record["refresh_expires_at"] = now + token_response.refresh_token_expires_in
+    return record
+
+
+def _can_refresh(record: Dict) -> bool:
+    return bool(record.get("refresh_token")) and time.time() < record.get("refresh_expires_at", 0)
+
+
+def _save(session_id: str, record: Dict) -> None:
+    # Keep the record for as long as either of its tokens can be used
+    expires_at = max(record["expires_at"], record.get("refresh_expires_at", 0))
+    token_store.put(session_id, record, expires_at)
+
+
+def _count(name: str) -> None:
+    with _counters_lock:
+        _counters[name] += 1
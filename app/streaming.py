@@ -0,0 +1,115 @@
+import json
+import re
+from typing import List
+
+from app.metrics import span
+
+# Matches the start of a markdown list item ("- ", "* ", "+ ", "1. ")
+LIST_ITEM = re.compile(r"^\s{0,3}([-*+]|\d+[.)])\s")
+
+
+class IncrementalMarkdown:
+    """
+    Convert a stream of markdown text to HTML one completed block at a time.
+
+    A block is complete once a blank line is followed by a line that cannot
+    continue it. Indented lines and list items that follow a list are kept in
+    the same block so lists and code blocks render the same as a one-shot
+    `markdown.markdown` call. Blocks that depend on the rest of the document,
+    such as reference-style links, blockquotes split by blank lines and raw
+    HTML blocks, may still render differently, so the output is a preview to be
+    replaced by the whole document rendered once the stream ends.
+    """
+
+    def __init__(self):
+        self._partial = ""
+        self._block: List[str] = []
+        self._saw_blank = False
+        self._has_list = False
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text and return HTML for any blocks it completed.
+
+        Args:
+            text (str): The next chunk of markdown.
+
+        Returns:
+            List[str]: HTML fragments for the newly completed blocks, in order.
+        """
+        self._partial += text
+        *lines, self._partial = self._partial.split("\n")
+
+        html = []
+        for line in lines:
+            if not line.strip():
+                self._saw_blank = True
+                self._block.append(line)
+                continue
+
+            if self._saw_blank and self._has_content() and not self._continues(line):
+                html.append(self._render())
+
+            self._saw_blank = False
+            self._has_list = self._has_list or bool(LIST_ITEM.match(line))
+            self._block.append(line)
+        return html
+
+    def flush(self) -> List[str]:
+        """
+        Render whatever is left once the stream has ended.
+
+        Returns:
+            List[str]: HTML for the remaining blocks, if there are any.
+        """
+        html = self.feed("\n") if self._partial else []
+        if self._has_content():
+            html.append(self._render())
+        return html
+
+    def _continues(self, line: str) -> bool:
+        if line[:1] in (" ", "\t"):
+            return True
+        return self._has_list and bool(LIST_ITEM.match(line))
+
+    def _has_content(self) -> bool:
+        return any(line.strip() for line in self._block)
+
+    def _render(self) -> str:
+        with span("markdown", "stream_block"):
+            html = render_markdown("\n".join(self._block))
+        self._block = []
+        self._has_list = False
+        return html
+
+
+def render_markdown(text: str) -> str:
+    """
+    Convert markdown to HTML.
+
+    The markdown package is imported on first use, so importing the app does not
+    pay for it.
+
+    Args:
+        text (str): The markdown text.
+
+    Returns:
+        str: The rendered HTML.
+    """
+    import markdown
+
+    return markdown.markdown(text)
+
+
+def sse_event(event: str, data: dict) -> str:
+    """
+    Format a Server-Sent Event with a JSON payload.
+
+    Args:
+        event (str): The event name.
+        data (dict): The JSON-serializable payload.
+
+    Returns:
+        str: The event, ready to be written to the response stream.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,611 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional
+
+# SQLite file holding every article fetched from NewsAPI; empty to disable the index
+ARTICLE_INDEX_PATH = os.getenv("ARTICLE_INDEX_PATH", ".cache/article_index.sqlite3")
+# Seconds a query is answered from the index alone before NewsAPI is asked for newer articles
+ARTICLE_INDEX_REFRESH = float(os.getenv("ARTICLE_INDEX_REFRESH", "600"))
+# Articles requested per NewsAPI call, so one call fills the index for later, larger requests
+ARTICLE_INDEX_FETCH_SIZE = int(os.getenv("ARTICLE_INDEX_FETCH_SIZE", "100"))
+# Most pages fetched for one query, either to page through its window or to catch up
+ARTICLE_INDEX_MAX_PAGES = int(os.getenv("ARTICLE_INDEX_MAX_PAGES", "5"))
+# Articles published longer ago than this are dropped from the index
+ARTICLE_INDEX_RETENTION_DAYS = float(os.getenv("ARTICLE_INDEX_RETENTION_DAYS", "30"))
+
+# NewsAPI query operators, which mean the same in SQLite full-text queries
+OPERATORS = frozenset(["AND", "OR", "NOT"])
+# Quoted phrases, parentheses and everything else up to the next space
+QUERY_TOKEN = re.compile(r'"[^"]*"|[()]|[^\s()"]+')
+WORD = re.compile(r"\w+")
+
+# Parameters that select a window of a query's results rather than a different query
+WINDOW_PARAMS = frozenset(["from_param", "to", "page_size", "page"])
+# NewsAPI's page size when none is given
+DEFAULT_PAGE_SIZE = 100
+
+
+def to_fts_query(q: str) -> str:
+    """
+    Translate a NewsAPI search query into an SQLite FTS5 query.
+
+    AND, OR, NOT, parentheses and quoted phrases carry over; every other term
+    becomes a quoted phrase of its words, so punctuation such as "AI/ML" cannot
+    break the query. "-term" excludes a term and "+term" requires it, as in NewsAPI.
+    Operators and parentheses that would leave the query invalid are dropped.
+
+    Args:
+        q (str): The NewsAPI query.
+
+    Returns:
+        str: The FTS5 query, or "" if `q` has no searchable words.
+    """
+    parts: List[str] = []
+    depth = 0
+    negate_next = False
+    for token in QUERY_TOKEN.findall(q):
+        previous = parts[-1] if parts else None
+        follows_term = previous is not None and previous not in OPERATORS and previous != "("
+        if token in OPERATORS:
+            if follows_term:
+                parts.append(token)
+            elif token == "NOT" and previous is None:
+                # FTS5 has no leading NOT, so a leading exclusion is skipped
+                negate_next = True
+            continue
+        if token == "(":
+            if follows_term:
+                parts.append("AND")
+            parts.append(token)
+            depth += 1
+            continue
+        if token == ")":
+            if depth and follows_term:
+                parts.append(token)
+                depth -= 1
+            continue
+
+        words = WORD.findall(token)
+        if not words:
+            continue
+        if negate_next or (token.startswith("-") and not follows_term):
+            negate_next = False
+            continue
+        phrase = '"' + " ".join(words) + '"'
+        if token.startswith("-"):
+            parts.append("NOT")
+        elif follows_term:
+            parts.append("AND")
+        parts.append(phrase)
+
+    while parts and (parts[-1] in OPERATORS or parts[-1] == "("):
+        if parts.pop() == "(":
+            depth -= 1
+    return " ".join(parts + [")"] * depth)
+
+
+class ArticleIndex:
+    """
+    A local store of NewsAPI articles with a full-text index, filled incrementally.
+
+    Articles are upserted by URL into SQLite, with an FTS5 index over their
+    title, description and content for keyword and date-range search. Each
+    NewsAPI query (its search terms and sort order, without the date window or
+    paging) remembers which articles it returned, in NewsAPI's order, the dates
+    it has been fetched for, how many pages and the newest `publishedAt` seen
+    (its watermark).
+
+    A repeated query is answered from the index, a page at a time, fetching
+    further pages from NewsAPI when the index holds too few articles. Every
+    fetch asks for `fetch_size` articles, so later, larger requests are still
+    answered locally. Once a query is older than `refresh` seconds, a query
+    sorted by "publishedAt" is brought up to date by paging through the
+    articles published since its watermark; popularity and relevance change as
+    articles come in, so other queries are fetched afresh. A query reaching
+    outside the dates it has been fetched for is fetched in full.
+
+    Args:
+        path (str): Location of the SQLite file.
+        refresh (float): Seconds before a query is checked for newer articles.
+        fetch_size (int): Articles requested per NewsAPI call.
+        max_pages (int): Most pages fetched for one query, per window or catch-up.
+        retention_days (float): Days after publication an article is kept.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        refresh: float = ARTICLE_INDEX_REFRESH,
+        fetch_size: int = ARTICLE_INDEX_FETCH_SIZE,
+        max_pages: int = ARTICLE_INDEX_MAX_PAGES,
+        retention_days: float = ARTICLE_INDEX_RETENTION_DAYS,
+    ):
+        self.path = path
+        self.refresh = refresh
+        self.fetch_size = fetch_size
+        self.max_pages = max_pages
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._counters = {
+            "local_answers": 0,
+            "full_fetches": 0,
+            "delta_fetches": 0,
+            "page_fetches": 0,
+            "fetch_errors": 0,
+            "articles_fetched": 0,
+            "articles_added": 0,
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS articles (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL UNIQUE,
+                    title TEXT, description TEXT, content TEXT, language TEXT,
+                    published_at TEXT NOT NULL, article TEXT NOT NULL, ingested_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS articles_published ON articles (published_at);
+                CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                    title, description, content, content='articles', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                    INSERT INTO articles_fts (rowid, title, description, content)
+                    VALUES (new.id, new.title, new.description, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                    INSERT INTO articles_fts (articles_fts, rowid, title, description, content)
+                    VALUES ('delete', old.id, old.title, old.description, old.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+                    INSERT INTO articles_fts (articles_fts, rowid, title, description, content)
+                    VALUES ('delete', old.id, old.title, old.description, old.content);
+                    INSERT INTO articles_fts (rowid, title, description, content)
+                    VALUES (new.id, new.title, new.description, new.content);
+                END;
+                CREATE TABLE IF NOT EXISTS query_articles (
+                    query_key TEXT NOT NULL, article_id INTEGER NOT NULL, rank INTEGER NOT NULL,
+                    PRIMARY KEY (query_key, article_id)
+                );
+                DROP TABLE IF EXISTS watermarks;
+                CREATE TABLE IF NOT EXISTS query_state (
+                    query_key TEXT PRIMARY KEY, fetch_params TEXT NOT NULL,
+                    pages INTEGER NOT NULL, exhausted INTEGER NOT NULL,
+                    covered_from TEXT, covered_to TEXT, newest_published_at TEXT,
+                    fetched_at REAL NOT NULL
+                );
+                """
+            )
+
+    def everything(self, params: Dict, fetch: Callable[[Dict], List[Dict]]) -> List[Dict]:
+        """
+        Answer a NewsAPI /everything query from the index, fetching only what it lacks.
+
+        Args:
+            params (Dict): Normalized keyword arguments for `NewsApiClient.get_everything`.
+            fetch (Callable): Calls /everything with the given arguments and returns its articles.
+
+        Returns:
+            List[Dict]: Page `page` of `page_size` articles published within the
+            query's dates, in NewsAPI's order, or newest first when sorted by "publishedAt".
+        """
+        key = self._query_key("everything", params)
+        since = _start_of(params.get("from_param"))
+        until = _end_of(params.get("to"))
+        by_date = str(params.get("sort_by", "")).lower() == "publishedat"
+        page, page_size = params.get("page", 1), params.get("page_size", DEFAULT_PAGE_SIZE)
+        state = self._state(key)
+
+        covered = state is not None and (since or "") >= (state["covered_from"] or "") and (
+            state["covered_to"] is None or (until is not None and until <= state["covered_to"])
+        )
+        stale = state is not None and time.time() - state["fetched_at"] >= self.refresh
+        if stale and by_date and (state["covered_to"] or "9999") < _isoformat(datetime.now(timezone.utc)):
+            # Nothing new can be published within a window that has ended
+            stale = False
+        if not covered:
+            # Never fetched for this window: fetch it in full
+            state = self._fetch_window(key, params, since, until, fetch)
+        elif stale and by_date:
+            state = self._fetch_delta(key, state, fetch)
+        elif stale:
+            # Popularity and relevance change as articles come in, and only
+            # NewsAPI can rank them again, so the window is fetched afresh
+            state = self._refetch_window(key, state, fetch)
+        else:
+            self._count("local_answers")
+
+        if state is not None:
+            self._fetch_more(key, state, fetch, page * page_size, since, until)
+        return self.search(
+            since=since,
+            until=until,
+            query_key=key,
+            order="published" if by_date else "rank",
+            limit=page_size,
+            offset=(page - 1) * page_size,
+        )
+
+    def top_headlines(self, params: Dict, fetch: Callable[[Dict], List[Dict]]) -> List[Dict]:
+        """
+        Answer a NewsAPI /top-headlines query from the index, refetching it once stale.
+
+        Top headlines are a snapshot with no date range, so there is no delta to
+        fetch: the latest snapshot is served until it is `refresh` seconds old.
+
+        Args:
+            params (Dict): Normalized keyword arguments for `NewsApiClient.get_top_headlines`.
+            fetch (Callable): Calls /top-headlines with the given arguments and returns its articles.
+
+        Returns:
+            List[Dict]: Page `page` of `page_size` articles in NewsAPI's order.
+        """
+        key = self._query_key("top_headlines", params)
+        page, page_size = params.get("page", 1), params.get("page_size", DEFAULT_PAGE_SIZE)
+        state = self._state(key)
+        if state is None:
+            state = self._fetch_window(key, params, None, None, fetch)
+        elif time.time() - state["fetched_at"] >= self.refresh:
+            state = self._refetch_window(key, state, fetch)
+        else:
+            self._count("local_answers")
+
+        self._fetch_more(key, state, fetch, page * page_size)
+        return self.search(
+            query_key=key, order="rank", limit=page_size, offset=(page - 1) * page_size
+        )
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        language: Optional[str] = None,
+        query_key: Optional[str] = None,
+        order: str = "relevance",
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[Dict]:
+        """
+        Search the indexed articles by keywords and publication date.
+
+        Args:
+            q (str, optional): Keywords in NewsAPI query syntax.
+            since (str, optional): Earliest publication time, ISO 8601.
+            until (str, optional): Latest publication time, ISO 8601.
+            language (str, optional): Language the articles were fetched in.
+            query_key (str, optional): Only articles a NewsAPI query returned.
+            order (str): "relevance" (best keyword match first), "published"
+                (newest first) or "rank" (NewsAPI's order for `query_key`).
+            limit (int): Maximum number of articles.
+            offset (int): Number of matching articles to skip, for paging.
+
+        Returns:
+            List[Dict]: The matching articles, as NewsAPI returned them.
+        """
+        since, until = _start_of(since), _end_of(until)
+        joins, clauses, args = [], [], []
+        if query_key:
+            joins.append("JOIN query_articles q ON q.article_id = a.id AND q.query_key = ?")
+            args.append(query_key)
+        match = to_fts_query(q) if q else ""
+        if match:
+            joins.append("JOIN articles_fts ON articles_fts.rowid = a.id")
+            clauses.append("articles_fts MATCH ?")
+            args.append(match)
+        if since:
+            clauses.append("a.published_at >= ?")
+            args.append(since)
+        if until:
+            clauses.append("a.published_at <= ?")
+            args.append(until)
+        if language:
+            clauses.append("a.language = ?")
+            args.append(language)
+
+        if order == "rank" and query_key:
+            order_by = "q.rank"
+        elif order == "relevance" and match:
+            order_by = "bm25(articles_fts)"
+        else:
+            order_by = "a.published_at DESC"
+        sql = (
+            f"SELECT a.article FROM articles a {' '.join(joins)} "
+            f"{'WHERE ' + ' AND '.join(clauses) if clauses else ''} "
+            f"ORDER BY {order_by} LIMIT ? OFFSET ?"
+        )
+        with self._connect() as conn:
+            rows = conn.execute(sql, (*args, limit, offset)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return how queries were answered and the size of the index.
+
+        Returns:
+            Dict: Counter name to value, plus the numbers of articles and queries indexed.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        with self._connect() as conn:
+            stats["articles"] = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            stats["queries"] = conn.execute("SELECT COUNT(*) FROM query_state").fetchone()[0]
+        return stats
+
+    def _fetch_window(
+        self,
+        key: str,
+        params: Dict,
+        since: Optional[str],
+        until: Optional[str],
+        fetch: Callable[[Dict], List[Dict]],
+    ) -> Dict:
+        # Fetch the first page of a query's window; further pages are fetched
+        # by `_fetch_more` when a request needs them
+        state = {
+            "fetch_params": dict(
+                {name: value for name, value in params.items() if name != "page"},
+                page_size=self.fetch_size,
+            ),
+            "pages": 0,
+            "exhausted": False,
+            "covered_from": since,
+            "covered_to": until,
+            "newest_published_at": None,
+            "fetched_at": time.time(),
+        }
+        self._fetch_page(key, state, fetch)
+        self._count("full_fetches")
+        return state
+
+    def _refetch_window(self, key: str, state: Dict, fetch: Callable[[Dict], List[Dict]]) -> Dict:
+        # Start the window over from its first page. Until that succeeds, the
+        # articles already indexed are served
+        fresh = dict(state, pages=0, exhausted=False, fetched_at=time.time())
+        try:
+            self._fetch_page(key, fresh, fetch)
+        except Exception:
+            traceback.print_exc()
+            self._count("fetch_errors")
+            return state
+        self._count("full_fetches")
+        return fresh
+
+    def _fetch_delta(
+        self, key: str, state: Dict, fetch: Callable[[Dict], List[Dict]]
+    ) -> Optional[Dict]:
+        # Page through the articles published since the watermark, newest first,
+        # until a short page shows nothing is left between them and the watermark.
+        # Returns the updated state, or None if the query must be fetched afresh
+        newest = state["newest_published_at"] or state["covered_from"]
+        delta = {
+            name: value
+            for name, value in state["fetch_params"].items()
+            if name not in ("from_param", "sort_by")
+        }
+        # newsapi-python only accepts "YYYY-MM-DDTHH:MM:SS", which NewsAPI reads as UTC
+        if newest:
+            delta["from_param"] = newest[:19]
+        delta.update(sort_by="publishedAt", page_size=self.fetch_size)
+        fetched_at = time.time()
+        try:
+            for page in range(1, self.max_pages + 1):
+                articles = fetch(dict(delta, page=page))
+                self._ingest(key, articles, delta.get("language"))
+                if len(articles) < self.fetch_size:
+                    break
+            else:
+                raise RuntimeError(f"More than {self.max_pages} pages of new articles")
+        except Exception:
+            # The gap up to the watermark cannot be closed, so the next request
+            # fetches the window afresh; this one is served what is indexed
+            traceback.print_exc()
+            self._count("fetch_errors")
+            with self._connect() as conn:
+                conn.execute("DELETE FROM query_state WHERE query_key = ?", (key,))
+            return None
+        state.update(newest_published_at=self._newest(key), fetched_at=fetched_at)
+        self._save_state(key, state)
+        self._count("delta_fetches")
+        return state
+
+    def _fetch_more(
+        self,
+        key: str,
+        state: Dict,
+        fetch: Callable[[Dict], List[Dict]],
+        needed: int,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> None:
+        # Fetch further pages of the window until the index holds `needed`
+        # articles within the dates or NewsAPI has no more
+        while (
+            not state["exhausted"]
+            and state["pages"] < self.max_pages
+            and self._linked(key, since, until) < needed
+        ):
+            try:
+                self._fetch_page(key, state, fetch)
+            except Exception:
+                traceback.print_exc()
+                self._count("fetch_errors")
+                return
+            self._count("page_fetches")
+
+    def _fetch_page(self, key: str, state: Dict, fetch: Callable[[Dict], List[Dict]]) -> None:
+        page = state["pages"] + 1
+        articles = fetch(dict(state["fetch_params"], page=page))
+        # The first page starts the query's articles over, in NewsAPI's new order
+        self._ingest(key, articles, state["fetch_params"].get("language"), replace=page == 1)
+        state.update(
+            pages=page,
+            exhausted=len(articles) < self.fetch_size,
+            newest_published_at=self._newest(key),
+        )
+        self._save_state(key, state)
+
+    def _ingest(
+        self,
+        key: str,
+        articles: List[Dict],
+        language: Optional[str],
+        replace: bool = False,
+    ) -> None:
+        now = time.time()
+        added = 0
+        with self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM query_articles WHERE query_key = ?", (key,))
+            next_rank = conn.execute(
+                "SELECT COALESCE(MAX(rank) + 1, 0) FROM query_articles WHERE query_key = ?", (key,)
+            ).fetchone()[0]
+            for article in articles:
+                url = article.get("url")
+                if not url:
+                    continue
+                known = conn.execute("SELECT 1 FROM articles WHERE url = ?", (url,)).fetchone()
+                conn.execute(
+                    "INSERT INTO articles (url, title, description, content, language, "
+                    "published_at, article, ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (url) DO UPDATE SET title = excluded.title, "
+                    "description = excluded.description, content = excluded.content, "
+                    "language = COALESCE(articles.language, excluded.language), "
+                    "published_at = excluded.published_at, article = excluded.article",
+                    (
+                        url, article.get("title"), article.get("description"), article.get("content"),
+                        language, _published_at(article), json.dumps(article), now,
+                    ),
+                )
+                added += known is None
+                article_id = conn.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()[0]
+                # An article already linked keeps its first rank
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO query_articles (query_key, article_id, rank) VALUES (?, ?, ?)",
+                    (key, article_id, next_rank),
+                )
+                next_rank += cursor.rowcount
+            self._prune(conn)
+
+        with self._lock:
+            self._counters["articles_fetched"] += len(articles)
+            self._counters["articles_added"] += added
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        cutoff = _isoformat(datetime.now(timezone.utc) - timedelta(days=self.retention_days))
+        conn.execute(
+            "DELETE FROM query_articles WHERE article_id IN "
+            "(SELECT id FROM articles WHERE published_at < ?)",
+            (cutoff,),
+        )
+        conn.execute("DELETE FROM articles WHERE published_at < ?", (cutoff,))
+
+    def _state(self, key: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT fetch_params, pages, exhausted, covered_from, covered_to, "
+                "newest_published_at, fetched_at FROM query_state WHERE query_key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "fetch_params": json.loads(row[0]),
+            "pages": row[1],
+            "exhausted": bool(row[2]),
+            "covered_from": row[3],
+            "covered_to": row[4],
+            "newest_published_at": row[5],
+            "fetched_at": row[6],
+        }
+
+    def _save_state(self, key: str, state: Dict) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_state (query_key, fetch_params, pages, exhausted, "
+                "covered_from, covered_to, newest_published_at, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key, json.dumps(state["fetch_params"], default=str), state["pages"],
+                    int(state["exhausted"]), state["covered_from"], state["covered_to"],
+                    state["newest_published_at"], state["fetched_at"],
+                ),
+            )
+
+    def _linked(self, key: str, since: Optional[str], until: Optional[str]) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM articles a JOIN query_articles q ON q.article_id = a.id "
+                "WHERE q.query_key = ? AND a.published_at >= ? AND a.published_at <= ?",
+                (key, since or "", until or "9999"),
+            ).fetchone()[0]
+
+    def _newest(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT MAX(a.published_at) FROM articles a JOIN query_articles q "
+                "ON q.article_id = a.id WHERE q.query_key = ?",
+                (key,),
+            ).fetchone()[0]
+
+    @staticmethod
+    def _query_key(endpoint: str, params: Dict) -> str:
+        query = {name: value for name, value in params.items() if name not in WINDOW_PARAMS}
+        payload = json.dumps({"endpoint": endpoint, "query": query}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation is safe from worker threads
+        # and from forked processes
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+
+def _isoformat(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _published_at(article: Dict) -> str:
+    # NewsAPI sends "2025-02-08T12:00:00Z", sometimes with fractional seconds
+    published = article.get("publishedAt") or ""
+    try:
+        return _isoformat(datetime.fromisoformat(published.replace("Z", "+00:00")).astimezone(timezone.utc))
+    except ValueError:
+        return _isoformat(datetime.now(timezone.utc))
+
+
+def _start_of(value: Optional[str]) -> Optional[str]:
+    # Dates cover the whole day, as they do for NewsAPI
+    if not value:
+        return None
+    return f"{value}T00:00:00Z" if len(value) == 10 else _published_at({"publishedAt": value})
+
+
+def _end_of(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return f"{value}T23:59:59Z" if len(value) == 10 else _published_at({"publishedAt": value})
+
+
+# Process-wide article index, shared by every worker through its SQLite file
+article_index = ArticleIndex(ARTICLE_INDEX_PATH) if ARTICLE_INDEX_PATH else None
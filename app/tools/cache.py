@@ -0,0 +1,299 @@
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+class TieredCache:
+    """
+    A content-addressed cache with an in-process LRU tier and an optional
+    on-disk SQLite tier that survives restarts.
+
+    Entries are keyed on a hash of the endpoint name and its normalized
+    parameters. Each endpoint can have its own TTL. Once an entry's TTL has
+    passed it is still served for a further `stale_ttl` seconds while a
+    background thread refreshes it (stale-while-revalidate).
+
+    Args:
+        path (str, optional): Location of the SQLite file. Disables the disk tier when None.
+        namespace (str): Table name used for this cache inside the SQLite file.
+        max_entries (int): Maximum number of entries held in memory.
+        max_disk_entries (int, optional): Maximum number of entries kept on disk.
+        ttls (dict, optional): Per-endpoint TTLs in seconds.
+        default_ttl (float): TTL in seconds for endpoints missing from `ttls`.
+        stale_ttl (float): Seconds an expired entry may still be served while refreshing.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        namespace: str = "cache",
+        max_entries: int = 256,
+        max_disk_entries: Optional[int] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 3600,
+        stale_ttl: float = 0,
+    ):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+
+        # key -> (value, expires_at)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.namespace} ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                    "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+        """
+        Build a stable cache key from an endpoint name and its parameters.
+
+        Args:
+            endpoint (str): Name of the upstream endpoint.
+            params (dict): Normalized request parameters.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        payload = json.dumps(
+            {"endpoint": endpoint, "params": params}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_or_fetch(
+        self, endpoint: str, params: Dict[str, Any], fetch: Callable[[], Any]
+    ) -> Any:
+        """
+        Return the cached value for a request, calling `fetch` on a miss.
+
+        Fresh entries are returned as-is. Expired entries that are still inside
+        the stale window are returned immediately and refreshed in the background.
+
+        Args:
+            endpoint (str): Name of the upstream endpoint, used to pick the TTL.
+            params (dict): Normalized request parameters.
+            fetch (Callable): Zero-argument callable producing a JSON-serializable value.
+
+        Returns:
+            Any: The cached or freshly fetched value.
+        """
+        key = self.make_key(endpoint, params)
+        ttl = self.ttls.get(endpoint, self.default_ttl)
+        entry = self._lookup(key)
+        now = time.time()
+
+        if entry is not None:
+            value, expires_at = entry
+            if now < expires_at:
+                self._count("hits")
+                return value
+            if now < expires_at + self.stale_ttl:
+                self._count("stale_hits")
+                self._refresh_in_background(key, ttl, fetch)
+                return value
+
+        self._count("misses")
+        value = fetch()
+        self.set(key, value, ttl)
+        return value
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Return the value stored under `key` if it has not expired.
+
+        Args:
+            key (str): Cache key as produced by `make_key`.
+
+        Returns:
+            Any: The cached value, or None on a miss.
+        """
+        entry = self._lookup(key)
+        if entry is None or time.time() >= entry[1]:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value in both tiers.
+
+        Args:
+            key (str): Cache key as produced by `make_key`.
+            value (Any): JSON-serializable value to store.
+            ttl (float, optional): Lifetime in seconds. Uses `default_ttl` when None.
+        """
+        expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+        self._remember(key, value, expires_at)
+
+        if self.path:
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.namespace} "
+                    "(key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires_at, now),
+                )
+                self._trim_disk(conn)
+
+    def invalidate(self, key: str) -> None:
+        """
+        Remove a single entry from both tiers.
+
+        Args:
+            key (str): Cache key as produced by `make_key`.
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(f"DELETE FROM {self.namespace} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """
+        Remove every entry from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(f"DELETE FROM {self.namespace}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return hit/miss/eviction counters and the current tier sizes.
+
+        Returns:
+            dict: Counter name to value.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+        if self.path:
+            with self._connect() as conn:
+                stats["disk_entries"] = conn.execute(
+                    f"SELECT COUNT(*) FROM {self.namespace}"
+                ).fetchone()[0]
+        return stats
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation keeps the disk tier safe to
+        # use from worker threads and from forked processes.
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _lookup(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        # An expired entry may have been replaced on disk by another process
+        if entry is not None and (not self.path or time.time() < entry[1]):
+            return entry
+
+        if not self.path:
+            return None
+
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT value, expires_at FROM {self.namespace} WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                # Still usable within the stale window
+                return entry
+            conn.execute(
+                f"UPDATE {self.namespace} SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+
+        # Promote the disk entry into the memory tier
+        entry = (json.loads(row[0]), row[1])
+        self._remember(key, *entry)
+        self._count("disk_hits")
+        return entry
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _trim_disk(self, conn: sqlite3.Connection) -> None:
+        if not self.max_disk_entries:
+            return
+        cursor = conn.execute(
+            f"DELETE FROM {self.namespace} WHERE key IN ("
+            f"SELECT key FROM {self.namespace} ORDER BY accessed_at DESC "
+            "LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        if cursor.rowcount > 0:
+            with self._lock:
+                self._counters["disk_evictions"] += cursor.rowcount
+
+    def _refresh_in_background(
+        self, key: str, ttl: float, fetch: Callable[[], Any]
+    ) -> None:
+        with self._lock:
+            # Only one refresh per key at a time
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.set(key, fetch(), ttl)
+                self._count("refreshes")
+            except Exception:
+                self._count("refresh_errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        # Run in a copy of the caller's context so the rate limit lane and the
+        # trace follow the refresh onto its thread
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(refresh,), daemon=True).start()
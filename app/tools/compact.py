@@ -0,0 +1,193 @@
+import json
+import math
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from app.tools.dedup import TRUNCATION_MARKER
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+# "tsv" for tab-separated rows with a header, "json" for minimal JSON
+PROMPT_FORMAT = os.getenv("PROMPT_FORMAT", "tsv")
+
+# Rough size of a Gemini token in characters for English text
+CHARS_PER_TOKEN = 4
+TSV_FIELDS = ("title", "source", "author", "published", "url", "summary", "also_in")
+WORD = re.compile(r"\w+")
+
+# Running totals across every packed prompt
+_totals = {"prompts": 0, "raw_tokens": 0, "packed_tokens": 0, "dropped_articles": 0}
+_totals_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate how many model tokens a piece of text costs.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def compact_article(article: Dict) -> Dict:
+    """
+    Reduce a NewsAPI article to the fields the model needs.
+
+    Drops the image URL, source id and empty authors, removes the
+    "[+1234 chars]" truncation suffix, normalizes whitespace and merges the
+    description and content snippet into a single summary.
+
+    Args:
+        article (Dict): A raw NewsAPI article.
+
+    Returns:
+        Dict: The compact article.
+    """
+    description = _clean(article.get("description"))
+    content = _clean(TRUNCATION_MARKER.sub("", article.get("content") or ""))
+    if not content or content[:40] in description:
+        summary = description
+    elif description and description[:40] in content:
+        # The snippet repeats the description and carries on from there
+        summary = content
+    else:
+        summary = f"{description} {content}".strip()
+
+    compact = {
+        "title": _clean(article.get("title")),
+        "source": _clean((article.get("source") or {}).get("name")),
+        "published": (article.get("publishedAt") or "")[:10],
+        "url": article.get("url") or "",
+        "summary": summary,
+    }
+    if article.get("author"):
+        compact["author"] = _clean(article["author"])
+    alternates = dict.fromkeys(
+        source["name"]
+        for source in article.get("alternate_sources") or []
+        if source.get("name") and source["name"] != compact["source"]
+    )
+    if alternates:
+        compact["also_in"] = ", ".join(alternates)
+    return compact
+
+
+def pack_articles(
+    articles: List[Dict],
+    query: Optional[str] = None,
+    budget: Optional[int] = None,
+    format: Optional[str] = None,
+    keep_order: bool = False,
+) -> Dict:
+    """
+    Rank compacted articles and pack as many as fit into a token budget.
+
+    Articles are ranked by their position in the NewsAPI response (popularity),
+    how many other outlets carried the story, and how many query terms they
+    mention. The highest ranked articles are packed first; any that would push
+    the prompt over the budget are dropped. With `keep_order`, articles that are
+    already ranked are packed in the order given.
+
+    Args:
+        articles (List[Dict]): Raw NewsAPI articles in ranking order.
+        query (str, optional): The search query, used for relevance scoring.
+        budget (int, optional): Token budget. Defaults to PROMPT_TOKEN_BUDGET.
+        format (str, optional): "tsv" or "json". Defaults to PROMPT_FORMAT.
+        keep_order (bool): Pack the articles in the order given instead of re-ranking them.
+
+    Returns:
+        Dict: The packed text under "text", plus "articles", "dropped", "tokens",
+        "raw_tokens" and "tokens_saved".
+    """
+    budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+    format = format or PROMPT_FORMAT
+    if format not in ("tsv", "json"):
+        raise ValueError(f"Unknown prompt format {format!r}. Use 'tsv' or 'json'.")
+
+    if keep_order:
+        ranked = list(enumerate(articles))
+    else:
+        query_terms = set(WORD.findall((query or "").lower())) - {"or", "and", "not"}
+        ranked = sorted(
+            enumerate(articles),
+            key=lambda item: _score(item[1], item[0], query_terms),
+            reverse=True,
+        )
+
+    header = "\t".join(TSV_FIELDS) if format == "tsv" else ""
+    tokens = estimate_tokens(header) + 1
+    packed = []
+    for _, article in ranked:
+        compact = compact_article(article)
+        line = _format_row(compact) if format == "tsv" else _format_json(compact)
+        cost = estimate_tokens(line) + 1
+        if tokens + cost > budget:
+            continue
+        tokens += cost
+        packed.append((line, compact))
+
+    if format == "tsv":
+        text = "\n".join([header] + [line for line, _ in packed])
+    else:
+        text = "[" + ",".join(line for line, _ in packed) + "]"
+
+    raw_tokens = estimate_tokens(json.dumps(articles))
+    report = {
+        "text": text,
+        "articles": len(packed),
+        "dropped": len(articles) - len(packed),
+        "tokens": estimate_tokens(text),
+        "raw_tokens": raw_tokens,
+        "tokens_saved": raw_tokens - estimate_tokens(text),
+    }
+    with _totals_lock:
+        _totals["prompts"] += 1
+        _totals["raw_tokens"] += report["raw_tokens"]
+        _totals["packed_tokens"] += report["tokens"]
+        _totals["dropped_articles"] += report["dropped"]
+    return report
+
+
+def compaction_stats() -> Dict[str, int]:
+    """
+    Report how many prompt tokens compaction has saved since the process started.
+
+    Returns:
+        Dict[str, int]: Prompts packed, raw and packed token totals, tokens saved
+        and articles dropped for budget.
+    """
+    with _totals_lock:
+        stats = dict(_totals)
+    stats["tokens_saved"] = stats["raw_tokens"] - stats["packed_tokens"]
+    return stats
+
+
+def _clean(text: Optional[str]) -> str:
+    return " ".join((text or "").split())
+
+
+def _score(article: Dict, position: int, query_terms: set) -> float:
+    # Earlier articles are more popular; syndication is a further popularity signal
+    score = 1.0 / (1 + position)
+    score += 0.1 * len(article.get("alternate_sources") or [])
+    if query_terms:
+        words = set(
+            WORD.findall(
+                f"{article.get('title') or ''} {article.get('description') or ''}".lower()
+            )
+        )
+        score += len(query_terms & words) / len(query_terms)
+    return score
+
+
+def _format_row(compact: Dict) -> str:
+    return "\t".join(compact.get(field, "").replace("\t", " ") for field in TSV_FIELDS)
+
+
+def _format_json(compact: Dict) -> str:
+    return json.dumps(compact, separators=(",", ":"), ensure_ascii=False)
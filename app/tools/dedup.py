@@ -0,0 +1,155 @@
+import re
+from operator import eq
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+# Matches NewsAPI's truncation marker, e.g. "... [+1234 chars]"
+TRUNCATION_MARKER = re.compile(r"\s*\[\+\d+ chars\]\s*$")
+WORD = re.compile(r"\w+")
+
+# Number of MinHash slots per signature and how they are split into LSH bands.
+# 16 bands of 4 rows puts the LSH threshold at roughly (1/16) ** (1/4) = 0.5.
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 3
+EMPTY = -1
+
+
+def cluster_articles(
+    articles: List[Dict],
+    threshold: float = 0.5,
+    num_perm: int = NUM_PERM,
+    bands: int = BANDS,
+) -> Dict:
+    """
+    Collapse near-duplicate articles, such as one wire story syndicated across outlets.
+
+    Each article's title, description and content are turned into word shingles
+    and summarized with a one-permutation MinHash signature. Signatures are
+    banded into an LSH index, so an article is only compared with the first
+    article of each cluster it shares a bucket with, and joins that cluster if
+    their estimated Jaccard similarity reaches `threshold`. The first article
+    of each cluster (the highest ranked, as NewsAPI returns them in sort order)
+    is kept and the others are listed under its "alternate_sources".
+
+    Args:
+        articles (List[Dict]): NewsAPI articles in ranking order.
+        threshold (float): Minimum estimated Jaccard similarity for two articles to be merged.
+        num_perm (int): Number of MinHash slots per signature.
+        bands (int): Number of LSH bands. Must divide `num_perm`.
+
+    Returns:
+        Dict: The representatives under "articles", plus "input", "clusters"
+        and "duplicates" counts.
+    """
+    if num_perm % bands:
+        raise ValueError("num_perm must be a multiple of bands")
+    rows = num_perm // bands
+
+    signatures = [_signature(_article_text(article), num_perm) for article in articles]
+    parent = list(range(len(articles)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            # Keep the earlier (higher ranked) article as the root
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    # Identical URLs are duplicates regardless of their text
+    by_url: Dict[str, int] = {}
+    for index, article in enumerate(articles):
+        url = article.get("url")
+        if url in by_url:
+            union(by_url[url], index)
+        elif url:
+            by_url[url] = index
+
+    # Each bucket holds only articles that merged into nothing when they were
+    # added, so a story repeated many times is compared against one copy
+    buckets = defaultdict(list)
+    for index, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        keys = [(band, tuple(signature[band * rows : (band + 1) * rows])) for band in range(bands)]
+        for key in keys:
+            for other in buckets[key]:
+                if find(other) != find(index) and (
+                    _similarity(signatures[other], signature) >= threshold
+                ):
+                    union(other, index)
+        if find(index) == index:
+            for key in keys:
+                buckets[key].append(index)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for index in range(len(articles)):
+        clusters[find(index)].append(index)
+
+    representatives = []
+    for root in sorted(clusters):
+        representative = dict(articles[root])
+        representative["alternate_sources"] = [
+            {
+                "name": (articles[index].get("source") or {}).get("name"),
+                "url": articles[index].get("url"),
+            }
+            for index in clusters[root][1:]
+        ]
+        representatives.append(representative)
+
+    return {
+        "articles": representatives,
+        "input": len(articles),
+        "clusters": len(clusters),
+        "duplicates": len(articles) - len(clusters),
+    }
+
+
+def _article_text(article: Dict) -> str:
+    content = TRUNCATION_MARKER.sub("", article.get("content") or "")
+    return " ".join(
+        (article.get("title") or "", article.get("description") or "", content)
+    ).lower()
+
+
+def _signature(text: str, num_perm: int) -> Optional[List]:
+    words = WORD.findall(text)
+    if not words:
+        return None
+    if len(words) < SHINGLE_SIZE:
+        shingles = [tuple(words)]
+    else:
+        shingles = zip(*(words[offset:] for offset in range(SHINGLE_SIZE)))
+
+    # One-permutation hashing: a single hash per shingle picks the slot and
+    # the value, and each slot keeps its minimum.
+    signature = [EMPTY] * num_perm
+    for shingle in shingles:
+        value = hash(shingle) & 0xFFFFFFFFFFFF
+        slot, rank = value % num_perm, value // num_perm
+        if signature[slot] == EMPTY or rank < signature[slot]:
+            signature[slot] = rank
+
+    # Densify: fill each empty slot from the next filled slot (tagged with the
+    # distance) so that short texts still produce comparable signatures
+    # Walk right to left twice so the search wraps around the end
+    donor, distance = None, 0
+    for position in range(2 * num_perm - 1, -1, -1):
+        slot = position % num_perm
+        if signature[slot] != EMPTY:
+            donor, distance = signature[slot], 0
+            continue
+        distance += 1
+        if position < num_perm and donor is not None:
+            signature[slot] = (donor, distance)
+    return signature
+
+
+def _similarity(a: List, b: List) -> float:
+    return sum(map(eq, a, b)) / len(a)
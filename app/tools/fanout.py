@@ -0,0 +1,142 @@
+import time
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+from app.tools.news_extractor import get_live_articles, get_top_articles
+
+# NewsAPI never returns more than 100 articles per page
+MAX_PAGE_SIZE = 100
+
+
+def fan_out(
+    queries: Sequence[str] = (),
+    categories: Sequence[str] = (),
+    windows: Sequence[Tuple[str, str]] = ((None, None),),
+    language: str = "en",
+    country: str = "us",
+    sort_by: str = "popularity",
+    page_size: int = MAX_PAGE_SIZE,
+    max_pages: int = 1,
+    max_workers: int = 8,
+) -> Dict:
+    """
+    Fetch several queries, categories and date windows concurrently and merge the results.
+
+    Every query is searched in every date window through /everything, and every
+    category is fetched through /top-headlines. Each of these sources runs on a
+    bounded thread pool and follows pagination until a short page comes back or
+    `max_pages` is reached, so fetching ten topics costs roughly one round trip
+    of wall-clock time instead of ten.
+
+    Args:
+        queries (Sequence[str]): Search queries for /everything.
+        categories (Sequence[str]): Categories for /top-headlines.
+        windows (Sequence[Tuple[str, str]]): (from, to) date pairs formatted as "YYYY-MM-DD".
+            Use None for an open end.
+        language (str): Two-letter ISO 639-1 language code.
+        country (str): Two-letter ISO 3166-1 country code for /top-headlines.
+        sort_by (str): Sort order for /everything: popularity, relevancy or publishedAt.
+        page_size (int): Articles per page (1-100).
+        max_pages (int): Maximum number of pages to follow per source.
+        max_workers (int): Maximum number of concurrent sources.
+
+    Returns:
+        Dict: The merged articles under "articles" (deduplicated by URL, in source
+        order), per-source statistics under "sources" and the total wall-clock
+        time under "wall_seconds".
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    sources = [
+        {
+            "endpoint": "everything",
+            "params": {
+                "q": query,
+                "from_param": from_param,
+                "to": to,
+                "language": language,
+                "sort_by": sort_by,
+                "page_size": page_size,
+            },
+        }
+        for query in queries
+        for from_param, to in windows
+    ]
+    sources += [
+        {
+            "endpoint": "top_headlines",
+            "params": {
+                "category": category,
+                "language": language,
+                "country": country,
+                "page_size": page_size,
+            },
+        }
+        for category in categories
+    ]
+
+    started = time.perf_counter()
+    results = []
+    if sources:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources)))) as executor:
+            # Each source runs in its own copy of the caller's context so the
+            # rate limit lane carries over to the worker threads
+            contexts = [copy_context() for _ in sources]
+            results = list(
+                executor.map(
+                    lambda context, source: context.run(_fetch_source, source, max_pages),
+                    contexts,
+                    sources,
+                )
+            )
+    wall_seconds = time.perf_counter() - started
+
+    articles, seen = [], set()
+    for source_articles, _ in results:
+        for article in source_articles:
+            url = article.get("url")
+            if url in seen:
+                continue
+            seen.add(url)
+            articles.append(article)
+
+    return {
+        "articles": articles,
+        "sources": [stats for _, stats in results],
+        "wall_seconds": wall_seconds,
+    }
+
+
+def _fetch_source(source: Dict, max_pages: int) -> Tuple[List[Dict], Dict]:
+    fetch = get_live_articles if source["endpoint"] == "everything" else get_top_articles
+    params = source["params"]
+    stats = {
+        "endpoint": source["endpoint"],
+        "params": params,
+        "pages": 0,
+        "articles": 0,
+        "seconds": 0.0,
+        "error": None,
+    }
+
+    articles: List[Dict] = []
+    started = time.perf_counter()
+    for page in range(1, max_pages + 1):
+        try:
+            # The first page shares its cache entry with the plain tool calls
+            page_params = dict(params, page=page) if page > 1 else params
+            page_articles = fetch(**page_params)
+        except Exception as e:
+            # Keep whatever earlier pages returned; one failing source
+            # should not sink the whole newsletter
+            stats["error"] = str(e)
+            break
+        stats["pages"] += 1
+        articles.extend(page_articles)
+        if len(page_articles) < params["page_size"]:
+            break
+
+    stats["articles"] = len(articles)
+    stats["seconds"] = time.perf_counter() - started
+    return articles, stats
+
@@ -3,11 +3,54 @@ from newsapi import (
     NewsApiClient,
 )  # Ensure you have the newsapi-python package installed
 import os
-import json
+from app.tools.article_index import article_index
+from app.tools.cache import TieredCache
+from app.tools.compact import pack_articles
+from app.metrics import traced
+from app.ratelimit import NEWSAPI_REQUESTS, acquire
+from app.tools.dedup import cluster_articles
+from app.transport import get_session
 
 newsapi_key = os.getenv("newsapi_key")
 
+# Shared cache for NewsAPI responses, keyed on the normalized query parameters
+article_cache = TieredCache(
+    path=os.getenv("ARTICLE_CACHE_PATH", ".cache/articles.sqlite3") or None,
+    namespace="articles",
+    max_entries=int(os.getenv("ARTICLE_CACHE_MAX_ENTRIES", "256")),
+    max_disk_entries=int(os.getenv("ARTICLE_CACHE_MAX_DISK_ENTRIES", "5000")),
+    ttls={
+        "everything": float(os.getenv("ARTICLE_CACHE_TTL_EVERYTHING", "1800")),
+        "top_headlines": float(os.getenv("ARTICLE_CACHE_TTL_TOP_HEADLINES", "300")),
+    },
+    stale_ttl=float(os.getenv("ARTICLE_CACHE_STALE_TTL", "600")),
+)
 
+
+def _normalize_params(**params) -> dict:
+    """
+    Normalize NewsAPI query parameters so equivalent requests share a cache key.
+
+    Args:
+        **params: The raw query parameters.
+
+    Returns:
+        dict: Parameters with None values dropped and strings trimmed and lowercased.
+    """
+    normalized = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            # NewsAPI treats boolean operators case-sensitively, so keep the query as-is
+            if name != "q":
+                value = value.lower()
+        normalized[name] = value
+    return normalized
+
+
+@traced("tool")
 def extract_live_news(
     q: str = "Artificial Intelligence OR Data Science",
     from_param: str = (datetime.utcnow() - timedelta(days=7)).strftime("%Y-%m-%d"),
@@ -60,22 +103,23 @@ def extract_live_news(
             Example: 10
 
     Returns:
-        List[dict]:
-            A list of dictionaries where each dictionary represents a news article. Each article typically contains:
-              - source: Information about the source of the article.
-              - author: The author of the article.
+        str:
+            The articles in a compact tab-separated format (or minimal JSON when PROMPT_FORMAT=json),
+            one article per line after a header row. Each article contains:
               - title: The title of the article.
-              - description: A brief description or summary.
+              - source: The name of the news source.
+              - author: The author of the article, when known.
+              - published: The publication date (YYYY-MM-DD).
               - url: The URL to the full article.
-              - urlToImage: The URL to the article's image.
-              - publishedAt: The publication date and time.
-              - content: The main content of the article.
+              - summary: The description and content snippet, whitespace-normalized.
+              - also_in: Other outlets that carried the same story.
+            Near-duplicate copies of a story are collapsed into one article, and articles are
+            ranked and trimmed to fit the prompt token budget.
 
     Usage Examples:
         Example 1: Default usage to extract AI and Data Science articles from the past week:
             >>> articles = extract_live_news()
-            >>> for article in articles:
-            ...     print(article['title'])
+            >>> print(articles)
 
         Example 2: Extracting articles on Climate Change from the past 3 days, sorted by publication date:
             >>> custom_from = (datetime.utcnow() - timedelta(days=3)).strftime("%Y-%m-%d")
@@ -87,19 +131,14 @@ def extract_live_news(
             ...     sort_by="publishedAt",
             ...     page_size=5
             ... )
-            >>> for article in articles:
-            ...     print(article['title'])
+            >>> print(articles)
 
     Note:
         - Ensure you have a valid News API key and have installed the 'newsapi-python' package.
         - Date parameters use UTC time by default.
         - Customize the parameters as needed to suit your news retrieval needs.
     """
-    # Initialize the NewsApiClient with your API key.
-    newsapi = NewsApiClient(api_key=newsapi_key)
-
-    # Query for news articles based on the specified parameters.
-    response = newsapi.get_everything(
+    articles = get_live_articles(
         q=q,
         from_param=from_param,
         to=to,
@@ -107,12 +146,56 @@ def extract_live_news(
         sort_by=sort_by,  # Options: 'popularity', 'relevancy', 'publishedAt'
         page_size=page_size,  # Number of articles to retrieve per request
     )
+    # Collapse syndicated copies of the same story, then pack the rest into the
+    # prompt token budget in a compact format
+    articles = cluster_articles(articles)["articles"]
+    return pack_articles(articles, query=q)["text"]
+
+
+def get_live_articles(**params) -> list:
+    """
+    Return articles from NewsAPI's /everything endpoint, going through the article cache.
+
+    Cache misses are answered from the local article index, which only asks
+    NewsAPI for articles newer than the ones it already holds.
+
+    Args:
+        **params: Keyword arguments for `NewsApiClient.get_everything`.
+
+    Returns:
+        list: The matching articles.
+    """
+    params = _normalize_params(**params)
+    return article_cache.get_or_fetch(
+        "everything", params, lambda: _index_or_fetch("everything", params, _fetch_everything)
+    )
+
+
+def _fetch_everything(params: dict) -> list:
+    """
+    Query NewsAPI's /everything endpoint and return the list of articles.
+
+    Args:
+        params (dict): Normalized keyword arguments for `NewsApiClient.get_everything`.
+
+    Returns:
+        list: The articles from the response.
+    """
+    # Initialize the NewsApiClient with your API key, sending requests through
+    # the shared keep-alive session so connections are reused across calls.
+    newsapi = NewsApiClient(api_key=newsapi_key, session=get_session())
+
+    # Wait for a request from the NewsAPI quota (cache hits never get here).
+    acquire(NEWSAPI_REQUESTS)
+
+    # Query for news articles based on the specified parameters.
+    response = newsapi.get_everything(**params)
 
     # Extract and return the list of articles.
-    articles = response.get("articles", [])
-    return json.dumps(articles)
+    return response.get("articles", [])
 
 
+@traced("tool")
 def extract_top_stories(
     category: str = "technology",
     language: str = "en",
@@ -143,15 +226,17 @@ def extract_top_stories(
             Default: 1
 
     Returns:
-        str: JSON-formatted string containing list of articles. Each article includes:
-            - source: Dictionary with 'id' and 'name' of the news source
-            - author: String with article author's name
+        str: Compact tab-separated rows (or minimal JSON when PROMPT_FORMAT=json), one
+            article per line after a header row. Each article includes:
             - title: String with article headline
-            - description: String with article description/summary
+            - source: String with the name of the news source
+            - author: String with article author's name, when known
+            - published: String with the publication date (YYYY-MM-DD)
             - url: String with link to full article
-            - urlToImage: String with link to article's featured image
-            - publishedAt: String with ISO 8601 publication date/time
-            - content: String with article content snippet
+            - summary: String with the description and content snippet
+            - also_in: Other outlets that carried the same story; near-duplicate
+              copies are collapsed into one article
+            Articles are ranked and trimmed to fit the prompt token budget.
 
     Raises:
         NewsAPIException: If there's an error with the API request
@@ -167,13 +252,12 @@ def extract_top_stories(
         ...     country="de",
         ...     page_size=3
         ... )
-        >>> # Parse the returned JSON string
-        >>> import json
-        >>> news_items = json.loads(articles)
-        >>> for item in news_items:
-        ...     print(f"Title: {item['title']}")
-        ...     print(f"Source: {item['source']['name']}")
-        ...     print(f"URL: {item['url']}\n")
+        >>> # One tab-separated row per article after the header
+        >>> for row in articles.splitlines()[1:]:
+        ...     title, source, author, published, url, *_ = row.split("\t")
+        ...     print(f"Title: {title}")
+        ...     print(f"Source: {source}")
+        ...     print(f"URL: {url}\n")
 
     Notes:
         - The function requires a valid NewsAPI API key
@@ -184,17 +268,73 @@ def extract_top_stories(
         - The API might return fewer articles than requested if not enough
           are available for the specified criteria
     """
-    # Initialize the NewsApiClient with your API key.
-    newsapi = NewsApiClient(api_key=newsapi_key)
-
-    # Query for news articles based on the specified parameters.
-    response = newsapi.get_top_headlines(
+    articles = get_top_articles(
         language=language,
         category=category,
         country=country,
         page_size=page_size,  # Number of articles to retrieve per request
     )
+    # Collapse syndicated copies of the same story, then pack the rest into the
+    # prompt token budget in a compact format
+    articles = cluster_articles(articles)["articles"]
+    return pack_articles(articles, query=category)["text"]
+
+
+def get_top_articles(**params) -> list:
+    """
+    Return articles from NewsAPI's /top-headlines endpoint, going through the article cache.
+
+    Cache misses are answered from the local article index, which refetches
+    the headlines once its copy is older than ARTICLE_INDEX_REFRESH.
+
+    Args:
+        **params: Keyword arguments for `NewsApiClient.get_top_headlines`.
+
+    Returns:
+        list: The matching articles.
+    """
+    params = _normalize_params(**params)
+    return article_cache.get_or_fetch(
+        "top_headlines", params, lambda: _index_or_fetch("top_headlines", params, _fetch_top_headlines)
+    )
+
+
+def _index_or_fetch(endpoint: str, params: dict, fetch) -> list:
+    """
+    Answer a NewsAPI query from the article index, or from NewsAPI if the index is disabled.
+
+    Args:
+        endpoint (str): "everything" or "top_headlines".
+        params (dict): Normalized keyword arguments for the endpoint.
+        fetch (Callable): Queries NewsAPI with the given arguments.
+
+    Returns:
+        list: The matching articles.
+    """
+    if article_index is None:
+        return fetch(params)
+    return getattr(article_index, endpoint)(params, fetch)
+
+
+def _fetch_top_headlines(params: dict) -> list:
+    """
+    Query NewsAPI's /top-headlines endpoint and return the list of articles.
+
+    Args:
+        params (dict): Normalized keyword arguments for `NewsApiClient.get_top_headlines`.
+
+    Returns:
+        list: The articles from the response.
+    """
+    # Initialize the NewsApiClient with your API key, sending requests through
+    # the shared keep-alive session so connections are reused across calls.
+    newsapi = NewsApiClient(api_key=newsapi_key, session=get_session())
+
+    # Wait for a request from the NewsAPI quota (cache hits never get here).
+    acquire(NEWSAPI_REQUESTS)
+
+    # Query for news articles based on the specified parameters.
+    response = newsapi.get_top_headlines(**params)
 
     # Extract and return the list of articles.
-    articles = response.get("articles", [])
-    return json.dumps(articles)
+    return response.get("articles", [])
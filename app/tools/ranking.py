@@ -0,0 +1,319 @@
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+from app.tools.dedup import TRUNCATION_MARKER
+
+# sentence-transformers model to embed with, e.g. "all-MiniLM-L6-v2"; empty for hashed TF-IDF
+RANKING_MODEL = os.getenv("RANKING_MODEL", "")
+# Width of the hashed TF-IDF vectors
+RANKING_DIMENSIONS = int(os.getenv("RANKING_DIMENSIONS", "1024"))
+# Trade-off between relevance (1.0) and diversity (0.0) when picking articles
+RANKING_MMR_LAMBDA = float(os.getenv("RANKING_MMR_LAMBDA", "0.7"))
+# Articles fetched per source for the ranking to choose from
+RANKING_CANDIDATES = int(os.getenv("RANKING_CANDIDATES", "50"))
+RANKING_CACHE_MAX_ENTRIES = int(os.getenv("RANKING_CACHE_MAX_ENTRIES", "10000"))
+
+WORD = re.compile(r"\w+")
+# Words that say nothing about what an article or a newsletter request is about
+STOP_WORDS = frozenset(
+    """
+    a about after all also an and any are as at be been but by can create days for from
+    had has have he her his how i in into is it its last latest more most my new news
+    newsletter not of on or our out over past popular recent relevant she so some than
+    that the their them then there these they this to top up was we were what when
+    which who will with write you your
+    """.split()
+)
+
+# Running totals across every ranking
+_totals = {"rankings": 0, "candidates": 0, "selected": 0, "cache_hits": 0, "cache_misses": 0, "seconds": 0.0}
+_totals_lock = threading.Lock()
+
+
+class HashingEmbedder:
+    """
+    Embeds text as sublinear term frequencies hashed into a fixed number of dimensions.
+
+    Needs no vocabulary or model, so any text can be embedded independently and
+    cached. Inverse document frequencies depend on the whole candidate set, so
+    `rank_articles` applies them to each batch.
+
+    Args:
+        dimensions (int): Width of the vectors.
+    """
+
+    uses_idf = True
+
+    def __init__(self, dimensions: int = RANKING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts (Sequence[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: One float32 row per text.
+        """
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [word for word in WORD.findall(text.lower()) if word not in STOP_WORDS]
+            if words:
+                # crc32 rather than hash() so vectors are the same in every process
+                buckets = [zlib.crc32(word.encode("utf-8")) % self.dimensions for word in words]
+                matrix[row] = np.bincount(buckets, minlength=self.dimensions)
+        return np.log1p(matrix, out=matrix)
+
+
+class ModelEmbedder:
+    """
+    Embeds text with a local sentence-transformers model on the CPU.
+
+    Args:
+        name (str): The model name or path, e.g. "all-MiniLM-L6-v2".
+    """
+
+    uses_idf = False
+
+    def __init__(self, name: str):
+        # Only needed when a model is configured
+        from sentence_transformers import SentenceTransformer
+
+        self.name = name
+        self.model = SentenceTransformer(name, device="cpu")
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts (Sequence[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: One unit-length float32 row per text.
+        """
+        vectors = self.model.encode(list(texts), batch_size=32, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class EmbeddingCache:
+    """
+    An in-process LRU cache of article embeddings.
+
+    Args:
+        max_entries (int): Maximum number of embeddings held.
+    """
+
+    def __init__(self, max_entries: int = RANKING_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[Hashable]) -> List[Optional[np.ndarray]]:
+        """
+        Look up several embeddings at once.
+
+        Args:
+            keys (Sequence[Hashable]): The cache keys.
+
+        Returns:
+            List[Optional[np.ndarray]]: The embedding for each key, or None if it is missing.
+        """
+        with self._lock:
+            vectors = []
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                vectors.append(vector)
+            return vectors
+
+    def set_many(self, keys: Sequence[Hashable], vectors: np.ndarray) -> None:
+        """
+        Store several embeddings at once, evicting the least recently used.
+
+        Args:
+            keys (Sequence[Hashable]): The cache keys.
+            vectors (np.ndarray): One row per key.
+        """
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                # A copy, so a cached row does not keep its whole batch alive
+                self._entries[key] = vector.copy()
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """
+    Return the process-wide embedder, creating it on first use.
+
+    Returns:
+        HashingEmbedder | ModelEmbedder: The model named by RANKING_MODEL, or
+        hashed TF-IDF if none is configured.
+    """
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = ModelEmbedder(RANKING_MODEL) if RANKING_MODEL else HashingEmbedder()
+        return _embedder
+
+
+def embed_articles(articles: List[Dict], embedder=None, cache: Optional[EmbeddingCache] = None) -> np.ndarray:
+    """
+    Embed articles, reusing cached embeddings and embedding the rest in one batch.
+
+    Embeddings are cached per URL, together with a checksum of the article's
+    text so an article whose text changes is embedded again.
+
+    Args:
+        articles (List[Dict]): NewsAPI articles.
+        embedder (optional): Defaults to `get_embedder()`.
+        cache (EmbeddingCache, optional): Defaults to the shared `embedding_cache`.
+
+    Returns:
+        np.ndarray: One row per article.
+    """
+    embedder = embedder or get_embedder()
+    cache = embedding_cache if cache is None else cache
+    keys = [(embedder.name, article.get("url") or "", _checksum(article)) for article in articles]
+    vectors = cache.get_many(keys)
+    missing = [index for index, vector in enumerate(vectors) if vector is None]
+    if missing:
+        # Only articles missing from the cache are turned into text
+        embedded = embedder.embed([_article_text(articles[index]) for index in missing])
+        cache.set_many([keys[index] for index in missing], embedded)
+        for index, vector in zip(missing, embedded):
+            vectors[index] = vector
+
+    with _totals_lock:
+        _totals["cache_hits"] += len(articles) - len(missing)
+        _totals["cache_misses"] += len(missing)
+    return np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+
+def rank_articles(
+    articles: List[Dict],
+    query: str,
+    k: Optional[int] = None,
+    mmr_lambda: float = RANKING_MMR_LAMBDA,
+) -> Dict:
+    """
+    Pick the articles most relevant to a request, without picking the same story twice.
+
+    Articles and the query are embedded and scored by cosine similarity in a
+    single matrix product. Maximal marginal relevance then picks `k` articles
+    one at a time, each maximizing `mmr_lambda * relevance - (1 - mmr_lambda) *`
+    its highest similarity to an article already picked.
+
+    Args:
+        articles (List[Dict]): Candidate NewsAPI articles in ranking order. Ties keep this order.
+        query (str): What the newsletter is about, e.g. the user's request.
+        k (int, optional): Number of articles to pick. Defaults to all of them.
+        mmr_lambda (float): 1.0 ranks by relevance alone; lower values favour diversity.
+
+    Returns:
+        Dict: The picked articles under "articles", best first, their cosine
+        similarity to the query under "scores", plus "candidates" and "seconds".
+    """
+    started = time.perf_counter()
+    k = len(articles) if k is None else max(0, min(k, len(articles)))
+    if not articles:
+        return {"articles": [], "scores": [], "candidates": 0, "seconds": 0.0}
+
+    embedder = get_embedder()
+    documents = embed_articles(articles, embedder)
+    query_vector = embedder.embed([query])
+    if embedder.uses_idf:
+        # Inverse document frequency over this batch of candidates, smoothed as in scikit-learn
+        document_frequency = np.count_nonzero(documents, axis=0)
+        idf = (np.log((1 + len(articles)) / (1 + document_frequency)) + 1).astype(np.float32)
+        documents = documents * idf
+        query_vector = query_vector * idf
+    documents = _normalize(documents)
+    query_vector = _normalize(query_vector)[0]
+
+    relevance = documents @ query_vector
+    picked = _mmr(documents, relevance, k, mmr_lambda)
+    seconds = time.perf_counter() - started
+
+    with _totals_lock:
+        _totals["rankings"] += 1
+        _totals["candidates"] += len(articles)
+        _totals["selected"] += len(picked)
+        _totals["seconds"] += seconds
+    return {
+        "articles": [articles[index] for index in picked],
+        "scores": [float(relevance[index]) for index in picked],
+        "candidates": len(articles),
+        "seconds": seconds,
+    }
+
+
+def ranking_stats() -> Dict:
+    """
+    Report how many articles have been ranked and how often embeddings were cached.
+
+    Returns:
+        Dict: Rankings, candidates and selected totals, embedding cache hits,
+        misses and size, total seconds spent ranking and the embedder in use.
+    """
+    with _totals_lock:
+        stats = dict(_totals)
+    stats["cache_entries"] = len(embedding_cache)
+    stats["embedder"] = RANKING_MODEL or f"hashing-{RANKING_DIMENSIONS}"
+    return stats
+
+
+def _article_text(article: Dict) -> str:
+    # The title says most about what an article covers, so it counts twice
+    title = article.get("title") or ""
+    content = TRUNCATION_MARKER.sub("", article.get("content") or "")
+    return " ".join((title, title, article.get("description") or "", content))
+
+
+def _checksum(article: Dict) -> int:
+    fields = (article.get("title") or "", article.get("description") or "", article.get("content") or "")
+    return zlib.crc32("\0".join(fields).encode("utf-8"))
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _mmr(vectors: np.ndarray, relevance: np.ndarray, k: int, mmr_lambda: float) -> List[int]:
+    picked: List[int] = []
+    # Each candidate's highest similarity to an article already picked
+    redundancy = np.zeros(len(relevance), dtype=np.float32)
+    available = np.ones(len(relevance), dtype=bool)
+    for _ in range(k):
+        scores = np.where(available, mmr_lambda * relevance - (1 - mmr_lambda) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        np.maximum(redundancy, vectors @ vectors[best], out=redundancy)
+    return picked
+
+
+# Process-wide cache of article embeddings, keyed per URL
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,168 @@
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.metrics import span
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Per-host counters, shared by every session in the process
+_counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+_counters_lock = threading.Lock()
+
+_session: Optional["PooledSession"] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def _count(host: str, name: str) -> None:
+    with _counters_lock:
+        _counters[host][name] += 1
+
+
+class CountingRetry(Retry):
+    """
+    Retry policy that records every retry it grants, per host and reason.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        host = _pool.host if _pool is not None else "unknown"
+        if response is not None and response.status:
+            _count(host, f"retries_{response.status}")
+        else:
+            _count(host, "retries_error")
+        return super().increment(
+            method=method,
+            url=url,
+            response=response,
+            error=error,
+            _pool=_pool,
+            _stacktrace=_stacktrace,
+        )
+
+
+class PooledSession(requests.Session):
+    """
+    A `requests.Session` with keep-alive pools, timeouts and retries configured once.
+
+    Connections are pooled per host and reused across calls, so only the first
+    request to a host pays for the TCP and TLS handshakes. Idempotent requests
+    that fail with 429 or 5xx are retried with exponential backoff and jitter,
+    honoring `Retry-After`. The session's timeouts apply to every request,
+    including ones sent by client libraries that hard-code their own or set none.
+
+    Args:
+        connect_timeout (float): Seconds to wait for a connection.
+        read_timeout (float): Seconds to wait for a response.
+        retries (int): Maximum number of retries per request.
+        pool_connections (int): Number of per-host pools to keep.
+        pool_maxsize (int): Maximum number of keep-alive connections per host.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        retries: int = HTTP_RETRIES,
+        pool_connections: int = HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+    ):
+        super().__init__()
+        self.timeout = (connect_timeout, read_timeout)
+        retry = CountingRetry(
+            total=retries,
+            status_forcelist=RETRY_STATUSES,
+            backoff_factor=HTTP_BACKOFF_FACTOR,
+            backoff_max=HTTP_BACKOFF_MAX,
+            backoff_jitter=HTTP_BACKOFF_JITTER,
+            respect_retry_after_header=True,
+            # Hand the final response back to the caller instead of raising,
+            # so client libraries can surface the upstream error themselves
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+        self.mount("https://", self.adapter)
+        self.mount("http://", self.adapter)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        kwargs["timeout"] = self.timeout
+        host = urlsplit(request.url).hostname or "unknown"
+        _count(host, "requests")
+        with span("http", host) as attributes:
+            try:
+                response = super().send(request, **kwargs)
+            except requests.RequestException:
+                _count(host, "errors")
+                raise
+            attributes["status"] = response.status_code
+        _count(host, f"responses_{response.status_code // 100}xx")
+        return response
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Report connection reuse for each host pool.
+
+        Returns:
+            Dict: Per host, the connections opened, requests sent and idle
+            connections currently available.
+        """
+        stats = {}
+        for key in self.adapter.poolmanager.pools.keys():
+            pool = self.adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            # The pool's queue is padded with None placeholders up to its maxsize
+            idle = list(pool.pool.queue) if pool.pool is not None else []
+            stats[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle_connections": sum(1 for conn in idle if conn is not None),
+            }
+        return stats
+
+
+def get_session() -> PooledSession:
+    """
+    Return the process-wide pooled session shared by the NewsAPI and LinkedIn clients.
+
+    A new session is created after a fork so processes never share sockets.
+
+    Returns:
+        PooledSession: The shared session.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = PooledSession()
+            _session_pid = os.getpid()
+        return _session
+
+
+def transport_stats() -> Dict:
+    """
+    Report request, response, retry and pool metrics for the shared transport.
+
+    Returns:
+        Dict: Per-host request counters under "hosts" and pool usage under "pools".
+    """
+    with _counters_lock:
+        hosts = {host: dict(counters) for host, counters in _counters.items()}
+    return {"hosts": hosts, "pools": get_session().pool_stats()}
@@ -0,0 +1,147 @@
+"""
+Import-time profile and cold-start budget check for the app.
+
+Starts fresh interpreters that import the app and call `create_app`, the way a
+new worker or serverless instance does, and reports as JSON how long that takes,
+which modules dominate (from `python -X importtime`) and how long the deferred
+agent modules take to load on the first newsletter request. Exits with status 1
+if the median cold start exceeds the budget or a module that should load lazily
+was imported, so it can gate CI.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 5] [--budget-ms 600] [--top 15]
+        [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Maximum median cold start, in milliseconds
+BUDGET_MS = 600.0
+
+# Heavy dependencies that must not be imported until they are first needed
+DEFERRED_MODULES = (
+    "agno",
+    "google.generativeai",
+    "linkedin_api",
+    "markdown",
+    "numpy",
+    "newsapi",
+    "bs4",
+)
+
+# Separates the startup imports from the deferred ones in the importtime output
+MARKER = "-- first newsletter --"
+
+# Run in a fresh interpreter: time the cold start, then the deferred agent modules
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+app.create_app(start_background=False)
+cold_start = time.perf_counter() - started
+loaded = [name for name in {deferred!r} if name in sys.modules]
+sys.stderr.write("{marker}\\n")
+sys.stderr.flush()
+started = time.perf_counter()
+import app.agents.newsletter_generator
+deferred = time.perf_counter() - started
+print(json.dumps({{"cold_start": cold_start, "deferred": deferred, "loaded": loaded}}))
+"""
+
+
+def run_probe(importtime: bool) -> Dict:
+    env = dict(
+        os.environ,
+        # Agent warm-up and the scheduler would load the agents on purpose
+        AGENT_POOL_WARMUP="0",
+        NEWSLETTER_SCHEDULER_ENABLED="0",
+        PYTHONDONTWRITEBYTECODE="1",
+    )
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", PROBE.format(deferred=DEFERRED_MODULES, marker=MARKER)]
+    completed = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if importtime:
+        startup, _, deferred = completed.stderr.partition(MARKER)
+        result["startup_modules"] = parse_importtime(startup)
+        result["deferred_modules"] = parse_importtime(deferred)
+    return result
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return modules
+
+
+def slowest(modules: List[Dict], top: int) -> List[Dict]:
+    return sorted(modules, key=lambda module: module["cumulative_ms"], reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="maximum median cold start")
+    parser.add_argument("--top", type=int, default=15, help="modules to list by cumulative time")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    # A first run fills the filesystem cache; -X importtime slows imports down,
+    # so it is only used for the module profile, not the timings
+    profile = run_probe(importtime=True)
+    runs = [run_probe(importtime=False) for _ in range(args.runs)]
+
+    cold_start_ms = [run["cold_start"] * 1000 for run in runs]
+    deferred_ms = [run["deferred"] * 1000 for run in runs]
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    median = statistics.median(cold_start_ms)
+
+    report = {
+        "runs": args.runs,
+        "budget_ms": args.budget_ms,
+        "cold_start_ms": {"median": median, "min": min(cold_start_ms), "max": max(cold_start_ms)},
+        "deferred_agents_ms": {"median": statistics.median(deferred_ms)},
+        "deferred_modules_loaded": loaded,
+        "slowest_startup_modules": slowest(profile["startup_modules"], args.top),
+        "slowest_deferred_modules": slowest(profile["deferred_modules"], args.top),
+        "passed": median <= args.budget_ms and not loaded,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if median > args.budget_ms:
+        print(f"Cold start {median:.0f} ms exceeds the {args.budget_ms:.0f} ms budget", file=sys.stderr)
+    if loaded:
+        print(f"Imported at startup but should load lazily: {', '.join(loaded)}", file=sys.stderr)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Offline load benchmark for the full /newsletter -> /linkedin_post flow.
+
+Runs the Flask app against the local NewsAPI, Gemini and LinkedIn stand-ins in
+benchmarks/fakes.py, drives it with concurrent virtual users through the Flask
+test client, and reports throughput, latency percentiles and memory for each
+scenario as JSON, so runs can be compared across commits. Every flow signs in
+through /oauth first, so each virtual user posts as its own LinkedIn member.
+
+Scenarios:
+    cold   every flow asks for a different topic with nocache=1, so each one
+           fetches articles and calls the LLM
+    warm   every flow repeats the same request, served from the caches
+    post   only /linkedin_post, with a recorded newsletter, until it is published
+
+Usage:
+    python benchmarks/bench_load.py [--scenarios cold,warm,post] [--flows 20]
+        [--concurrency 4] [--mode pipeline] [--newsapi-latency 0.2]
+        [--gemini-latency 1.0] [--linkedin-latency 0.1] [--jitter 0.05]
+        [--error-rate 0.0] [--tracemalloc] [--output results.json]
+"""
+
+import argparse
+import contextlib
+import html
+import json
+import os
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The rendered newsletter is posted back from this hidden form field
+POST_FIELD = re.compile(r'name="post" value="([^"]*)"')
+# Seconds a flow waits for its post to be published
+PUBLISH_TIMEOUT = 60
+TOPICS = (
+    "AI/Data Science", "robotics", "quantum computing", "cybersecurity", "chips",
+    "climate tech", "biotech", "open source", "cloud computing", "startups",
+)
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = (len(values) - 1) * q
+    lower = int(index)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (index - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values) if values else 0.0,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values, default=0.0),
+    }
+
+
+def newsletter_flow(app, command: str, nocache: bool, post_only_html: str = None) -> Dict:
+    client = app.test_client()
+    timings, errors = {}, []
+
+    # Every virtual user signs in as their own LinkedIn member
+    started = time.perf_counter()
+    response = client.get("/oauth?code=bench-auth-code")
+    timings["sign_in"] = time.perf_counter() - started
+    if response.status_code != 302:
+        errors.append(f"/oauth {response.status_code}")
+        return {"timings": timings, "errors": errors}
+
+    if post_only_html is None:
+        started = time.perf_counter()
+        data = {"text": command}
+        if nocache:
+            data["nocache"] = "1"
+        response = client.post("/newsletter", data=data)
+        timings["newsletter"] = time.perf_counter() - started
+        match = POST_FIELD.search(response.get_data(as_text=True))
+        if response.status_code != 200 or match is None:
+            errors.append(f"/newsletter {response.status_code}")
+            return {"timings": timings, "errors": errors}
+        post_html = html.unescape(match.group(1))
+    else:
+        post_html = post_only_html
+
+    started = time.perf_counter()
+    response = client.post("/linkedin_post", data={"post": post_html})
+    timings["linkedin_post"] = time.perf_counter() - started
+    if response.status_code != 202:
+        errors.append(f"/linkedin_post {response.status_code}")
+        return {"timings": timings, "errors": errors}
+
+    # The post is queued; follow it until the outbox sender has published it
+    post = response.get_json()
+    while post["status"] not in ("published", "failed") and time.perf_counter() - started < PUBLISH_TIMEOUT:
+        time.sleep(0.01)
+        post = client.get(post["status_url"]).get_json()
+    timings["publish"] = time.perf_counter() - started
+    if post["status"] != "published" or "/feed/update/urn:li:" not in (post["url"] or ""):
+        errors.append(f"publish {post['status']}")
+    return {"timings": timings, "errors": errors}
+
+
+def run_scenario(app, name: str, flows: int, concurrency: int, trace_memory: bool) -> Dict:
+    if name == "cold":
+        commands = [
+            f"{5 + index % 5} popular news on {TOPICS[index % len(TOPICS)]} run {index} "
+            f"from the last 7 days"
+            for index in range(flows)
+        ]
+        jobs = [(command, True, None) for command in commands]
+    elif name == "warm":
+        command = "10 popular news on AI/Data Science from the last 7 days"
+        newsletter_flow(app, command, False)  # prime the caches
+        jobs = [(command, False, None) for _ in range(flows)]
+    elif name == "post":
+        from benchmarks.fakes import load_fixture
+        import markdown
+
+        post_html = markdown.markdown(load_fixture("gemini.json")["completions"][0])
+        jobs = [(None, False, post_html) for _ in range(flows)]
+    else:
+        raise ValueError(f"Unknown scenario {name!r}")
+
+    if trace_memory:
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(
+            executor.map(
+                lambda job: _timed_flow(app, *job),
+                jobs,
+            )
+        )
+    wall = time.perf_counter() - started
+
+    steps: Dict[str, List[float]] = {"flow": []}
+    errors: List[str] = []
+    for result in results:
+        errors.extend(result["errors"])
+        if not result["errors"]:
+            steps["flow"].append(result["seconds"])
+        for step, seconds in result["timings"].items():
+            steps.setdefault(step, []).append(seconds)
+
+    report = {
+        "flows": flows,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "wall_seconds": wall,
+        "throughput_flows_per_second": flows / wall if wall else 0.0,
+        "latency_seconds": {step: summarize(values) for step, values in steps.items()},
+        "memory": {"max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024},
+    }
+    if trace_memory:
+        report["memory"]["python_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+    return report
+
+
+def _timed_flow(app, command, nocache, post_html) -> Dict:
+    started = time.perf_counter()
+    result = newsletter_flow(app, command, nocache, post_html)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", default="cold,warm,post")
+    parser.add_argument("--flows", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mode", choices=("pipeline", "agentic"), default="pipeline")
+    parser.add_argument("--newsapi-latency", type=float, default=0.2)
+    parser.add_argument("--gemini-latency", type=float, default=1.0)
+    parser.add_argument("--linkedin-latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rate-limits", action="store_true", help="keep the client-side rate limits")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report Python heap peaks (slower)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    # Everything the app reads at import time must be set before it is imported
+    workdir = tempfile.mkdtemp(prefix="bench-load-")
+    os.environ.update(
+        {
+            "NEWSLETTER_MODE": args.mode,
+            "ARTICLE_CACHE_PATH": os.path.join(workdir, "articles.sqlite3"),
+            "ARTICLE_INDEX_PATH": os.path.join(workdir, "article_index.sqlite3"),
+            "NEWSLETTER_CACHE_PATH": os.path.join(workdir, "newsletters.sqlite3"),
+            "SESSION_STORE_PATH": os.path.join(workdir, "sessions.sqlite3"),
+            "PUBLISH_OUTBOX_PATH": os.path.join(workdir, "outbox.sqlite3"),
+            "RATE_LIMIT_STATE_PATH": os.path.join(workdir, "ratelimits.sqlite3"),
+            "SECRET_KEY": "bench-secret-key",
+            "NEWSLETTER_WORKERS": str(max(args.concurrency, 1)),
+            "NEWSLETTER_SCHEDULER_ENABLED": "0",
+            # Injected errors should be retried straight away
+            "HTTP_BACKOFF_FACTOR": "0",
+            "HTTP_BACKOFF_JITTER": "0",
+            "PUBLISH_BACKOFF_BASE": "0",
+        }
+    )
+    if not args.rate_limits:
+        for budget in (
+            "NEWSAPI_REQUESTS_PER_DAY",
+            "GEMINI_REQUESTS_PER_MINUTE",
+            "GEMINI_TOKENS_PER_MINUTE",
+            "LINKEDIN_POSTS_PER_DAY",
+        ):
+            os.environ[budget] = "0"
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    from benchmarks.fakes import install_fakes
+
+    fakes = install_fakes(
+        newsapi_latency=args.newsapi_latency,
+        gemini_latency=args.gemini_latency,
+        linkedin_latency=args.linkedin_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+    import app as application
+
+    app = application.create_app()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "config": vars(args),
+        "scenarios": {},
+    }
+    # The app and agno print debug output; keep stdout for the report
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for name in [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]:
+                report["scenarios"][name] = run_scenario(
+                    app, name, args.flows, args.concurrency, args.tracemalloc
+                )
+        report["upstream"] = fakes.stats()
+    finally:
+        fakes.stop()
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Benchmark and golden-output check for `app.formatting.parse_html`.
+
+Generates newsletters of increasing size (headers, bold text, links, deeply
+nested lists and tables), converts them with the current single-pass parser
+and with the original BeautifulSoup implementation kept below as the
+reference, checks that both produce identical text, and reports timings.
+
+`--write-golden` records the reference output for a set of generated and
+adversarial inputs, which tests/test_formatting.py checks the parser against.
+
+Usage:
+    python benchmarks/bench_parse_html.py [--seed 0] [--cases 200] [--json]
+    python benchmarks/bench_parse_html.py --write-golden tests/fixtures/parse_html_golden.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+import markdown
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.formatting import parse_html  # noqa: E402
+
+WORDS = (
+    "AI model data science release open source research startup funding chip "
+    "agents benchmark GPU training inference 2025 LLM Gemini policy robotics"
+).split()
+
+# Inputs the generator does not produce: malformed markup, entities, stray
+# list items and tags the reference treats specially
+ADVERSARIAL = [
+    "",
+    "   \n\t  ",
+    "plain text without tags",
+    "<p></p><p></p>",
+    "<br><br/><br />text<br>",
+    "<h1>Title</h1><h2>Sub</h2><h3>x</h3><h4>y</h4><p>body</p>",
+    "<h1>Title <em>with</em> emphasis</h1>",
+    "<h2><a href='https://example.com'>Linked header</a></h2>",
+    "<strong>bold</strong> then <strong></strong> empty",
+    "<p>Caf&eacute; &amp; bar &lt;tag&gt; &#x1F600; &nbsp;end</p>",
+    "<li>orphan item</li><li>another</li>",
+    "<ul><li>one<ul><li>two<ol><li>three<ul><li>four</li></ul></li></ol></li></ul></li></ul>",
+    "<ul><li>unclosed<li>siblings<li>three</ul>",
+    "<ol><li><p>paragraph item</p></li><li><strong>bold item</strong></li></ol>",
+    "<p>unclosed paragraph<p>second",
+    "<div><span>nested <b>b</b> <i>i</i></span></div>",
+    "<!-- comment --><p>after comment</p><!-- trailing -->",
+    "<!DOCTYPE html><html><head><title>T</title></head><body><p>b</p></body></html>",
+    "<script>var x = '<p>';</script><p>after script</p>",
+    "<style>p { color: red; }</style><p>styled</p>",
+    "<table><tr><td>a</td><td>b</td></tr><tr><th>c</th></tr></table>",
+    "<table><thead><tr><th>h</th></tr></thead><tbody><tr><td>d</td></tr></tbody></table>",
+    "<td>cell without table</td><tr>row without table</tr>",
+    "<p>a <br> b <br/><br/> c</p>",
+    "<h3>Header</h3>text right after header<strong>x</strong>",
+    "<p><img src='a.png' alt='image'> caption</p><hr><p>after rule</p>",
+    "<p attr=\"a>b\">attribute with angle bracket</p>",
+    "</p></li></ul>stray end tags",
+    "<UL><LI>Upper case tags</LI></UL><P>Para</P>",
+    "<p>Unicode: \u00fcber \u65e5\u672c \U0001d5d4 already bold</p>",
+    "<blockquote><p>quoted</p></blockquote><pre><code>code  block\n  indented</code></pre>",
+    "<ul>\n<li>\nwhitespace\n</li>\n\n<li>  padded  </li>\n</ul>",
+]
+
+
+def reference_bold_text(text: str) -> str:
+    normal = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+    bold = "𝗔𝗕𝗖𝗗𝗘𝗙𝗚𝗛𝗜𝗝𝗞𝗟𝗠𝗡𝗢𝗣𝗤𝗥𝗦𝗧𝗨𝗩𝗪𝗫𝗬𝗭𝗮𝗯𝗰𝗱𝗲𝗳𝗴𝗵𝗶𝗝𝗸𝗹𝗺𝗻𝗼𝗽𝗾𝗿𝘀𝘁𝘂𝘃𝘄𝘅𝘆𝘇𝟬𝟭𝟮𝟯𝟰𝟱𝟲𝟳𝟴𝟵"
+    bold_mapping = str.maketrans(normal, bold)
+    return text.translate(bold_mapping)
+
+
+def reference_parse_html(html: str) -> str:
+    """The original BeautifulSoup-based implementation from app/routes.py."""
+    soup = BeautifulSoup(html, features="html.parser")
+    text = []
+    prev_element = None
+
+    for element in soup.descendants:
+        if isinstance(element, str):
+            stripped_text = element.strip()
+            if stripped_text:
+                if prev_element in ["h1", "h2", "h3", "h4", "strong"]:
+                    text.append(reference_bold_text(stripped_text))
+                else:
+                    text.append(stripped_text)
+        elif element.name in ["br", "p", "h1", "h2", "h3", "h4"]:
+            if prev_element not in ["br", "p", "h1", "h2", "h3", "h4"]:
+                text.append("\n\n")
+        elif element.name == "li":
+            depth = len(element.find_parents("ul")) + len(element.find_parents("ol"))
+            text.append("\n" + "  " * (depth - 1) + "- ")
+        elif element.name in ["tr"]:
+            text.append("\n")
+        elif element.name in ["th", "td"]:
+            text.append("\t")
+
+        prev_element = element.name
+
+    return "".join(text).strip()
+
+
+def sentence(rng: random.Random, length: int = 8) -> str:
+    words = rng.choices(WORDS, k=length)
+    if rng.random() < 0.3:
+        index = rng.randrange(length)
+        words[index] = f"**{words[index]}**"
+    if rng.random() < 0.2:
+        words.append("[source](https://example.com/a?b=1&c=2)")
+    return " ".join(words)
+
+
+def nested_list(rng: random.Random, depth: int, max_depth: int) -> list:
+    lines = []
+    marker = "1." if rng.random() < 0.5 else "-"
+    for _ in range(rng.randint(1, 4)):
+        lines.append("    " * depth + f"{marker} {sentence(rng, 5)}")
+        if depth + 1 < max_depth and rng.random() < 0.5:
+            lines.extend(nested_list(rng, depth + 1, max_depth))
+    return lines
+
+
+def generate_newsletter(rng: random.Random, articles: int, max_depth: int = 4) -> str:
+    """Generate newsletter HTML the way the app does: markdown rendered to HTML."""
+    blocks = [f"# {sentence(rng, 4)}", sentence(rng, 20)]
+    for index in range(articles):
+        blocks.append(f"## {index + 1}. [{sentence(rng, 6)}](https://example.com/{index})")
+        blocks.append(sentence(rng, 30) + "  \n" + sentence(rng, 10))
+        blocks.append("\n".join(nested_list(rng, 0, max_depth)))
+        if rng.random() < 0.2:
+            blocks.append(f"### {sentence(rng, 3)}\n\n> {sentence(rng, 12)}")
+        if rng.random() < 0.1:
+            cells = "".join(f"<td>{word}</td>" for word in rng.choices(WORDS, k=3))
+            blocks.append(f"<table><tr><th>Source</th><th>Date</th><th>Topic</th></tr><tr>{cells}</tr></table>")
+    html = markdown.markdown("\n\n".join(blocks))
+    if rng.random() < 0.1:
+        html = "<!-- generated -->\n" + html.replace("<p>", "<p><br/>", 1)
+    return html
+
+
+def check_equivalence(seed: int, cases: int) -> int:
+    rng = random.Random(seed)
+    inputs = [generate_newsletter(rng, rng.randint(1, 15), rng.randint(1, 6)) for _ in range(cases)]
+    for case, html in enumerate(inputs + ADVERSARIAL):
+        expected = reference_parse_html(html)
+        actual = parse_html(html)
+        if actual != expected:
+            raise AssertionError(f"Output differs from the reference for case {case}:\n{html}")
+    return len(inputs) + len(ADVERSARIAL)
+
+
+def write_golden(path: str, seed: int, cases: int) -> int:
+    rng = random.Random(seed)
+    inputs = [
+        generate_newsletter(rng, rng.randint(1, 4), rng.randint(1, 6)) for _ in range(cases)
+    ] + ADVERSARIAL
+    golden = [{"html": html, "text": reference_parse_html(html)} for html in inputs]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(golden, f, indent=1, ensure_ascii=False)
+        f.write("\n")
+    return len(golden)
+
+
+def benchmark(seed: int) -> list:
+    rng = random.Random(seed)
+    results = []
+    for articles in (10, 100, 500):
+        html = generate_newsletter(rng, articles, max_depth=6)
+        number = max(1, 200 // articles)
+        reference = min(timeit.repeat(lambda: reference_parse_html(html), number=number, repeat=3))
+        current = min(timeit.repeat(lambda: parse_html(html), number=number, repeat=3))
+        results.append(
+            {
+                "articles": articles,
+                "html_bytes": len(html),
+                "reference_ms": reference / number * 1000,
+                "current_ms": current / number * 1000,
+                "speedup": reference / current,
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--write-golden", metavar="PATH", help="write golden outputs for the tests and exit")
+    args = parser.parse_args()
+
+    if args.write_golden:
+        count = write_golden(args.write_golden, args.seed, 30)
+        print(f"Wrote {count} golden outputs to {args.write_golden}")
+        return
+
+    cases = check_equivalence(args.seed, args.cases)
+    results = benchmark(args.seed)
+
+    if args.json:
+        print(json.dumps({"equivalent_cases": cases, "results": results}, indent=2))
+        return
+
+    print(f"Golden output: {cases} newsletters identical to the reference")
+    print(f"{'articles':>8} {'bytes':>9} {'reference ms':>13} {'current ms':>11} {'speedup':>8}")
+    for result in results:
+        print(
+            f"{result['articles']:>8} {result['html_bytes']:>9} "
+            f"{result['reference_ms']:>13.2f} {result['current_ms']:>11.2f} "
+            f"{result['speedup']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark and relevance check for `app.tools.ranking.rank_articles`.
+
+Builds a candidate set of any size from the recorded NewsAPI articles (each
+copy with its own URL and a shuffled description), ranks it against a
+newsletter request with an empty embedding cache and again with a warm one,
+and reports the timings as JSON together with how many of the picked articles
+are on topic, compared with taking the first `k` in NewsAPI's order.
+
+Usage:
+    python benchmarks/bench_ranking.py [--articles 2000] [--k 10] [--runs 5]
+        [--topic "vector database"] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import load_fixture  # noqa: E402
+from app.tools import ranking  # noqa: E402
+
+
+def build_candidates(count: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    recorded = (
+        load_fixture("newsapi_everything.json")["articles"]
+        + load_fixture("newsapi_top_headlines.json")["articles"]
+    )
+    candidates = []
+    for index in range(count):
+        article = dict(recorded[index % len(recorded)])
+        words = (article.get("description") or "").split()
+        rng.shuffle(words)
+        article["description"] = " ".join(words)
+        article["url"] = f"{article['url']}?copy={index}"
+        candidates.append(article)
+    # NewsAPI's popularity order knows nothing about the request's topic
+    rng.shuffle(candidates)
+    return candidates
+
+
+def on_topic(articles: List[Dict], topic: str) -> int:
+    return sum(topic.lower() in (article.get("title") or "").lower() for article in articles)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=2000, help="candidate articles to rank")
+    parser.add_argument("--k", type=int, default=10, help="articles to pick")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--topic", default="vector database")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    candidates = build_candidates(args.articles, args.seed)
+    command = f"{args.k} popular news on {args.topic} from the last 7 days"
+
+    cold_ms, warm_ms = [], []
+    for _ in range(args.runs):
+        ranking.embedding_cache = ranking.EmbeddingCache(max(args.articles, 1))
+        started = time.perf_counter()
+        ranked = ranking.rank_articles(candidates, command, k=args.k)
+        cold_ms.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        ranking.rank_articles(candidates, command, k=args.k)
+        warm_ms.append((time.perf_counter() - started) * 1000)
+
+    picked_titles = [article["title"] for article in ranked["articles"]]
+    report = {
+        "articles": args.articles,
+        "k": args.k,
+        "runs": args.runs,
+        "embedder": ranking.ranking_stats()["embedder"],
+        "cold_ms": {"median": statistics.median(cold_ms), "max": max(cold_ms)},
+        "warm_ms": {"median": statistics.median(warm_ms), "max": max(warm_ms)},
+        "on_topic": {
+            "ranked": on_topic(ranked["articles"], args.topic),
+            "newsapi_order": on_topic(candidates[: args.k], args.topic),
+        },
+        "distinct_titles": len(set(picked_titles)),
+        "picked": picked_titles,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Local stand-ins for NewsAPI, Gemini and LinkedIn, for offline benchmarks.
+
+NewsAPI and LinkedIn are real HTTP servers on localhost, so requests still go
+through the app's pooled transport; Gemini is replaced at the model client,
+below agno and the rate limiter. All three replay the recorded responses in
+benchmarks/fixtures with configurable latency and error injection.
+
+Usage:
+    from benchmarks.fakes import install_fakes
+
+    fakes = install_fakes(newsapi_latency=0.2, gemini_latency=1.5, error_rate=0.01)
+    ...  # import and drive the app
+    print(fakes.stats())
+    fakes.stop()
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name: str) -> Dict:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _parse_time(value: str) -> datetime:
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def recent(recorded: Dict) -> Dict:
+    # Move the recorded articles forward so the newest was published just now,
+    # keeping their spacing, as if they had been fetched today
+    shift = datetime.now(timezone.utc) - max(_parse_time(a["publishedAt"]) for a in recorded["articles"])
+    articles = [
+        dict(a, publishedAt=(_parse_time(a["publishedAt"]) + shift).strftime("%Y-%m-%dT%H:%M:%SZ"))
+        for a in recorded["articles"]
+    ]
+    return dict(recorded, articles=articles)
+
+
+class Faults:
+    """Latency and error injection shared by a stand-in's requests."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> None:
+        with self._lock:
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+
+class StandInServer(ThreadingHTTPServer):
+    """A threaded keep-alive HTTP server that counts requests by path and status."""
+
+    daemon_threads = True
+
+    def __init__(self, handler, faults: Faults):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.faults = faults
+        self.counters: Dict[str, int] = {}
+        self.counters_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def count(self, name: str) -> None:
+        with self.counters_lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: Optional[Dict], headers: Optional[Dict] = None) -> None:
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.server.count(f"{self.command} {urlsplit(self.path).path} {status}")
+
+    def inject_fault(self) -> bool:
+        self.server.faults.delay()
+        if not self.server.faults.should_fail():
+            return False
+        # Alternate between a throttle and a server error, as both are retried
+        if self.server.faults._random.random() < 0.5:
+            self.send_json(
+                429,
+                {"status": "error", "code": "rateLimited", "message": "Injected rate limit."},
+                {"Retry-After": "0"},
+            )
+        else:
+            self.send_json(500, {"status": "error", "code": "unexpectedError", "message": "Injected failure."})
+        return True
+
+
+class NewsAPIHandler(_Handler):
+    """Serves /v2/everything and /v2/top-headlines from the recorded responses."""
+
+    everything = recent(load_fixture("newsapi_everything.json"))
+    top_headlines = recent(load_fixture("newsapi_top_headlines.json"))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/v2/everything":
+            recorded, seed = self.everything, params.get("q", "")
+        elif url.path == "/v2/top-headlines":
+            recorded, seed = self.top_headlines, params.get("category", "")
+        else:
+            self.send_json(404, {"status": "error", "code": "notFound", "message": url.path})
+            return
+        if self.inject_fault():
+            return
+
+        # Rotate the recorded articles by query so different requests see
+        # different (but stable) article sets, then page through them
+        articles = recorded["articles"]
+        offset = zlib.crc32(seed.encode("utf-8")) % len(articles)
+        articles = articles[offset:] + articles[:offset]
+        # Dates cover the whole day, as they do for NewsAPI
+        if params.get("from"):
+            start = _parse_time(params["from"] + ("T00:00:00" if len(params["from"]) == 10 else ""))
+            articles = [a for a in articles if _parse_time(a["publishedAt"]) >= start]
+        if params.get("to"):
+            end = _parse_time(params["to"] + ("T23:59:59" if len(params["to"]) == 10 else ""))
+            articles = [a for a in articles if _parse_time(a["publishedAt"]) <= end]
+        page_size = int(params.get("pageSize", 20))
+        page = int(params.get("page", 1))
+        self.send_json(
+            200,
+            {
+                "status": "ok",
+                "totalResults": len(articles),
+                "articles": articles[(page - 1) * page_size : page * page_size],
+            },
+        )
+
+
+class LinkedInHandler(_Handler):
+    """
+    Issues access tokens, accepts UGC posts and comments on them, and answers
+    /userinfo like the LinkedIn v2 API. Every access token belongs to its own member.
+    """
+
+    post_ids = count(1)
+    comment_ids = count(1)
+    token_ids = count(1)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/v2/userinfo":
+            self.send_json(404, {"message": "Not found"})
+            return
+        if self.inject_fault():
+            return
+        member = self.headers.get("Authorization", "").rsplit("-", 1)[-1]
+        self.send_json(
+            200, {"sub": f"bench-member-{member}", "name": "Bench User", "email": "bench@example.com"}
+        )
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path = urlsplit(self.path).path
+        if path == "/oauth/v2/accessToken":
+            if not self.inject_fault():
+                self.send_json(
+                    200,
+                    {
+                        "access_token": f"bench-access-token-{next(self.token_ids)}",
+                        "expires_in": 5184000,
+                        "scope": "openid,profile,w_member_social",
+                    },
+                )
+        elif path == "/v2/ugcPosts":
+            if not self.inject_fault():
+                self.send_json(201, None, {"x-restli-id": f"urn:li:share:{next(self.post_ids)}"})
+        elif path.startswith("/v2/socialActions/") and path.endswith("/comments"):
+            if not self.inject_fault():
+                self.send_json(201, None, {"x-restli-id": f"urn:li:comment:{next(self.comment_ids)}"})
+        else:
+            self.send_json(404, {"message": "Not found"})
+
+    def send_json(self, status: int, body: Optional[Dict], headers: Optional[Dict] = None) -> None:
+        # Count comments under one name, whatever post they are on
+        if urlsplit(self.path).path.startswith("/v2/socialActions/"):
+            self.path = "/v2/socialActions/{id}/comments"
+        super().send_json(status, body, headers)
+
+
+class FakeGenerativeModel:
+    """
+    Stands in for `google.generativeai.GenerativeModel`.
+
+    If the calling model declares functions and has not called one yet in the
+    conversation, the recorded call for the first declared function is
+    returned; otherwise a recorded completion is replayed. Token counts are
+    estimated at four characters per token.
+    """
+
+    def __init__(self, model, recorded: Dict, faults: Faults, counters: Dict[str, int], lock: threading.Lock):
+        self.model = model
+        self.recorded = recorded
+        self.faults = faults
+        self.counters = counters
+        self.lock = lock
+
+    def generate_content(self, contents: List[Dict], stream: bool = False, **kwargs):
+        from google.api_core import exceptions
+        from google.generativeai import protos
+        from google.generativeai.types.generation_types import GenerateContentResponse
+
+        self.faults.delay()
+        if self.faults.should_fail():
+            self._count("errors")
+            raise exceptions.ServiceUnavailable("Injected Gemini failure.")
+
+        prompt_tokens = sum(len(str(part)) for content in contents for part in content["parts"]) // 4
+        call = self._tool_call(contents)
+        if call is not None:
+            self._count("tool_calls")
+            parts = [[protos.Part(function_call=protos.FunctionCall(name=call[0], args=call[1]))]]
+            completion = json.dumps(call[1])
+        else:
+            self._count("completions")
+            completions = self.recorded["completions"]
+            completion = completions[zlib.crc32(str(contents[-1]).encode("utf-8")) % len(completions)]
+            # Stream in paragraph-sized chunks, like the real API
+            chunks = completion.split("\n\n") if stream else [completion]
+            parts = [
+                [protos.Part(text=chunk + ("\n\n" if index < len(chunks) - 1 else ""))]
+                for index, chunk in enumerate(chunks)
+            ]
+
+        completion_tokens = len(completion) // 4
+        responses = []
+        for index, chunk_parts in enumerate(parts):
+            usage = None
+            if index == len(parts) - 1:
+                usage = protos.GenerateContentResponse.UsageMetadata(
+                    prompt_token_count=prompt_tokens,
+                    candidates_token_count=completion_tokens,
+                    total_token_count=prompt_tokens + completion_tokens,
+                )
+            responses.append(
+                GenerateContentResponse.from_response(
+                    protos.GenerateContentResponse(
+                        candidates=[protos.Candidate(content=protos.Content(role="model", parts=chunk_parts))],
+                        usage_metadata=usage,
+                    )
+                )
+            )
+        return iter(responses) if stream else responses[0]
+
+    def _tool_call(self, contents: List[Dict]):
+        declared = [declaration.name for declaration in self.model.function_declarations or []]
+        # agno sends function results back as plain text, so look for the
+        # model's own earlier call instead of a function response
+        called = any(
+            getattr(part, "function_call", None) and part.function_call.name
+            for content in contents
+            if content["role"] == "model"
+            for part in content["parts"]
+            if not isinstance(part, str)
+        )
+        if called:
+            return None
+        for name in declared:
+            if name in self.recorded["tool_calls"]:
+                return name, self.recorded["tool_calls"][name]
+        return None
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+
+class Fakes:
+    """Handle to the running stand-ins."""
+
+    def __init__(self, newsapi: StandInServer, linkedin: StandInServer, gemini_counters: Dict[str, int]):
+        self.newsapi = newsapi
+        self.linkedin = linkedin
+        self.gemini_counters = gemini_counters
+
+    def stats(self) -> Dict:
+        return {
+            "newsapi": dict(self.newsapi.counters),
+            "linkedin": dict(self.linkedin.counters),
+            "gemini": dict(self.gemini_counters),
+        }
+
+    def stop(self) -> None:
+        for server in (self.newsapi, self.linkedin):
+            server.shutdown()
+            server.server_close()
+
+
+def install_fakes(
+    newsapi_latency: float = 0.0,
+    gemini_latency: float = 0.0,
+    linkedin_latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+) -> Fakes:
+    """
+    Start the NewsAPI and LinkedIn stand-ins and point every client at the fakes.
+
+    Must be called before the app is imported, so the fake API keys are picked up.
+
+    Args:
+        newsapi_latency (float): Seconds each NewsAPI request takes.
+        gemini_latency (float): Seconds each Gemini call takes.
+        linkedin_latency (float): Seconds each LinkedIn request takes.
+        jitter (float): Extra random latency of up to this many seconds per call.
+        error_rate (float): Probability that a call fails with an injected error.
+        seed (int): Seed for jitter and error injection.
+
+    Returns:
+        Fakes: Handle for stats and shutdown.
+    """
+    import linkedin_api.common.constants as linkedin_constants
+    from newsapi import const as newsapi_constants
+
+    os.environ.setdefault("newsapi_key", "fake-newsapi-key")
+    os.environ.setdefault("GOOGLE_API_KEY", "fake-google-api-key")
+
+    newsapi = StandInServer(NewsAPIHandler, Faults(newsapi_latency, jitter, error_rate, seed))
+    linkedin = StandInServer(LinkedInHandler, Faults(linkedin_latency, jitter, error_rate, seed + 1))
+    for server in (newsapi, linkedin):
+        server.thread.start()
+
+    newsapi_constants.EVERYTHING_URL = f"{newsapi.base_url}/v2/everything"
+    newsapi_constants.TOP_HEADLINES_URL = f"{newsapi.base_url}/v2/top-headlines"
+    linkedin_constants.NON_VERSIONED_BASE_URL = f"{linkedin.base_url}/v2"
+    linkedin_constants.OAUTH_BASE_URL = f"{linkedin.base_url}/oauth/v2"
+
+    from app.agents.models import RateLimitedGemini
+
+    recorded = load_fixture("gemini.json")
+    gemini_faults = Faults(gemini_latency, jitter, error_rate, seed + 2)
+    gemini_counters: Dict[str, int] = {}
+    gemini_lock = threading.Lock()
+
+    def get_client(model):
+        if model.client is None:
+            model.client = FakeGenerativeModel(model, recorded, gemini_faults, gemini_counters, gemini_lock)
+        return model.client
+
+    RateLimitedGemini.get_client = get_client
+    return Fakes(newsapi, linkedin, gemini_counters)
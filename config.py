@@ -10,3 +10,67 @@ class Config:
     CLIENT_SECRET=os.getenv('CLIENT_SECRET')
     OAUTH2_REDIRECT_URL=os.getenv('OAUTH2_REDIRECT_URL')
     lifecycleState=os.getenv('lifecycleState')
+    ARTICLE_CACHE_PATH=os.getenv('ARTICLE_CACHE_PATH', '.cache/articles.sqlite3')
+    ARTICLE_CACHE_MAX_ENTRIES=int(os.getenv('ARTICLE_CACHE_MAX_ENTRIES', '256'))
+    ARTICLE_CACHE_MAX_DISK_ENTRIES=int(os.getenv('ARTICLE_CACHE_MAX_DISK_ENTRIES', '5000'))
+    ARTICLE_CACHE_TTL_EVERYTHING=float(os.getenv('ARTICLE_CACHE_TTL_EVERYTHING', '1800'))
+    ARTICLE_CACHE_TTL_TOP_HEADLINES=float(os.getenv('ARTICLE_CACHE_TTL_TOP_HEADLINES', '300'))
+    ARTICLE_CACHE_STALE_TTL=float(os.getenv('ARTICLE_CACHE_STALE_TTL', '600'))
+    ARTICLE_INDEX_PATH=os.getenv('ARTICLE_INDEX_PATH', '.cache/article_index.sqlite3')
+    ARTICLE_INDEX_REFRESH=float(os.getenv('ARTICLE_INDEX_REFRESH', '600'))
+    ARTICLE_INDEX_FETCH_SIZE=int(os.getenv('ARTICLE_INDEX_FETCH_SIZE', '100'))
+    ARTICLE_INDEX_MAX_PAGES=int(os.getenv('ARTICLE_INDEX_MAX_PAGES', '5'))
+    ARTICLE_INDEX_RETENTION_DAYS=float(os.getenv('ARTICLE_INDEX_RETENTION_DAYS', '30'))
+    RANKING_MODEL=os.getenv('RANKING_MODEL', '')
+    RANKING_DIMENSIONS=int(os.getenv('RANKING_DIMENSIONS', '1024'))
+    RANKING_MMR_LAMBDA=float(os.getenv('RANKING_MMR_LAMBDA', '0.7'))
+    RANKING_CANDIDATES=int(os.getenv('RANKING_CANDIDATES', '50'))
+    RANKING_CACHE_MAX_ENTRIES=int(os.getenv('RANKING_CACHE_MAX_ENTRIES', '10000'))
+    NEWSLETTER_WORKERS=int(os.getenv('NEWSLETTER_WORKERS', '4'))
+    NEWSLETTER_MAX_PENDING=int(os.getenv('NEWSLETTER_MAX_PENDING', '32'))
+    NEWSLETTER_JOB_TIMEOUT=float(os.getenv('NEWSLETTER_JOB_TIMEOUT', '300'))
+    AGENT_POOL_WARMUP=int(os.getenv('AGENT_POOL_WARMUP', '1'))
+    AGENT_POOL_MAX_IDLE=int(os.getenv('AGENT_POOL_MAX_IDLE', '8'))
+    NEWSLETTER_MODE=os.getenv('NEWSLETTER_MODE', 'agentic')
+    PROMPT_TOKEN_BUDGET=int(os.getenv('PROMPT_TOKEN_BUDGET', '6000'))
+    PROMPT_FORMAT=os.getenv('PROMPT_FORMAT', 'tsv')
+    NEWSLETTER_CACHE_PATH=os.getenv('NEWSLETTER_CACHE_PATH', '.cache/newsletters.sqlite3')
+    NEWSLETTER_CACHE_MAX_ENTRIES=int(os.getenv('NEWSLETTER_CACHE_MAX_ENTRIES', '128'))
+    NEWSLETTER_CACHE_MAX_DISK_ENTRIES=int(os.getenv('NEWSLETTER_CACHE_MAX_DISK_ENTRIES', '1000'))
+    NEWSLETTER_CACHE_TTL=float(os.getenv('NEWSLETTER_CACHE_TTL', '604800'))
+    NEWSLETTER_CACHE_WINDOW=float(os.getenv('NEWSLETTER_CACHE_WINDOW', '1800'))
+    HTTP_POOL_CONNECTIONS=int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+    HTTP_POOL_MAXSIZE=int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+    HTTP_CONNECT_TIMEOUT=float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+    HTTP_READ_TIMEOUT=float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+    HTTP_RETRIES=int(os.getenv('HTTP_RETRIES', '3'))
+    HTTP_BACKOFF_FACTOR=float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+    HTTP_BACKOFF_MAX=float(os.getenv('HTTP_BACKOFF_MAX', '30'))
+    HTTP_BACKOFF_JITTER=float(os.getenv('HTTP_BACKOFF_JITTER', '0.5'))
+    NEWSAPI_REQUESTS_PER_DAY=float(os.getenv('NEWSAPI_REQUESTS_PER_DAY', '100'))
+    GEMINI_REQUESTS_PER_MINUTE=float(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '15'))
+    GEMINI_TOKENS_PER_MINUTE=float(os.getenv('GEMINI_TOKENS_PER_MINUTE', '1000000'))
+    GEMINI_OUTPUT_TOKEN_ESTIMATE=int(os.getenv('GEMINI_OUTPUT_TOKEN_ESTIMATE', '1024'))
+    RATE_LIMIT_BATCH_RESERVE=float(os.getenv('RATE_LIMIT_BATCH_RESERVE', '0.2'))
+    RATE_LIMIT_INTERACTIVE_MAX_WAIT=float(os.getenv('RATE_LIMIT_INTERACTIVE_MAX_WAIT', '10'))
+    RATE_LIMIT_BATCH_MAX_WAIT=float(os.getenv('RATE_LIMIT_BATCH_MAX_WAIT', '300'))
+    RATE_LIMIT_STATE_PATH=os.getenv('RATE_LIMIT_STATE_PATH', '.cache/ratelimits.sqlite3')
+    NEWSLETTER_SCHEDULER_ENABLED=os.getenv('NEWSLETTER_SCHEDULER_ENABLED', '0') == '1'
+    NEWSLETTER_PRESETS=os.getenv('NEWSLETTER_PRESETS', '10 popular news on AI/Data Science from the last 7 days')
+    NEWSLETTER_SCHEDULE=os.getenv('NEWSLETTER_SCHEDULE', '0 4 * * *')
+    NEWSLETTER_SCHEDULE_SPREAD=float(os.getenv('NEWSLETTER_SCHEDULE_SPREAD', '3600'))
+    NEWSLETTER_PRESET_TTL=float(os.getenv('NEWSLETTER_PRESET_TTL', '90000'))
+    TRACE_HISTORY=int(os.getenv('TRACE_HISTORY', '100'))
+    SECRET_KEY=os.getenv('SECRET_KEY')
+    SESSION_COOKIE_SAMESITE='Lax'
+    SESSION_STORE=os.getenv('SESSION_STORE', 'sqlite')
+    SESSION_STORE_PATH=os.getenv('SESSION_STORE_PATH')
+    LINKEDIN_USERINFO_TTL=float(os.getenv('LINKEDIN_USERINFO_TTL', '3600'))
+    LINKEDIN_TOKEN_REFRESH_MARGIN=float(os.getenv('LINKEDIN_TOKEN_REFRESH_MARGIN', '86400'))
+    LINKEDIN_POSTS_PER_DAY=float(os.getenv('LINKEDIN_POSTS_PER_DAY', '150'))
+    PUBLISH_OUTBOX_PATH=os.getenv('PUBLISH_OUTBOX_PATH', '.cache/outbox.sqlite3')
+    PUBLISH_MAX_ATTEMPTS=int(os.getenv('PUBLISH_MAX_ATTEMPTS', '5'))
+    PUBLISH_BACKOFF_BASE=float(os.getenv('PUBLISH_BACKOFF_BASE', '30'))
+    PUBLISH_BACKOFF_MAX=float(os.getenv('PUBLISH_BACKOFF_MAX', '3600'))
+    PUBLISH_POLL_INTERVAL=float(os.getenv('PUBLISH_POLL_INTERVAL', '5'))
+    PUBLISH_CLAIM_TIMEOUT=float(os.getenv('PUBLISH_CLAIM_TIMEOUT', '300'))
@@ -0,0 +1,88 @@
+"""
+Gunicorn settings for serving the app in production.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import fcntl
+import gc
+import importlib
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:3000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+# Requests mostly wait on NewsAPI and Gemini, so each worker serves several at once
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+worker_class = "gthread"
+# Streams and synchronous /newsletter calls can outlast the default 30 seconds
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# Time a stopping worker gets to finish requests and drain newsletter jobs
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "300"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+# Import the app once in the master; workers inherit the loaded modules
+# copy-on-write and start instantly
+preload_app = True
+# The app loads its agents and heavy dependencies on first use; import them in
+# the master anyway so workers share them instead of each loading its own copy
+PRELOAD_MODULES = (
+    "app.agents.newsletter_generator",
+    "agno.agent",
+    "agno.models.google",
+    "google.generativeai",
+    "markdown",
+    "newsapi",
+    "linkedin_api.clients.restli.client",
+)
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+
+# Held by the one worker that runs the newsletter scheduler
+SCHEDULER_LOCK = os.getenv("NEWSLETTER_SCHEDULER_LOCK", ".cache/scheduler.lock")
+_scheduler_lock = None
+
+
+def when_ready(server):
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    # Move everything loaded so far out of the garbage collector's reach, so
+    # collections in the workers do not touch (and so copy) the shared pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app import start_background_work
+    from app.ratelimit import share_budgets
+    from wsgi import app
+
+    # Budgets are shared through RATE_LIMIT_STATE_PATH; if they are kept in
+    # memory instead, every worker spends an equal share of the upstream quotas
+    share_budgets(workers)
+    start_background_work(app, run_scheduler=_claim_scheduler())
+
+
+def worker_exit(server, worker):
+    from app import stop_background_work
+
+    # Let queued and running newsletter jobs finish before the worker exits
+    stop_background_work(timeout=graceful_timeout)
+
+
+def _claim_scheduler() -> bool:
+    # The first worker to lock the file runs the scheduler; the lock is released
+    # when that worker exits, so its replacement takes over
+    global _scheduler_lock
+    os.makedirs(os.path.dirname(SCHEDULER_LOCK) or ".", exist_ok=True)
+    handle = open(SCHEDULER_LOCK, "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _scheduler_lock = handle
+    return True
@@ -0,0 +1,23 @@
+import json
+import os
+
+import pytest
+
+from app.formatting import bold_text, parse_html
+
+# Reference output of the original BeautifulSoup implementation; regenerate with
+# python benchmarks/bench_parse_html.py --write-golden tests/fixtures/parse_html_golden.json
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "parse_html_golden.json")
+
+with open(GOLDEN_PATH, encoding="utf-8") as f:
+    GOLDEN = json.load(f)
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids=[f"case{index}" for index in range(len(GOLDEN))])
+def test_parse_html_matches_reference(case):
+    assert parse_html(case["html"]) == case["text"]
+
+
+def test_headers_are_bold_and_list_items_indented():
+    html = "<h2>Top story</h2><ul><li>first<ul><li>nested</li></ul></li></ul>"
+    assert parse_html(html) == f"{bold_text('Top story')}\n- first\n  - nested"
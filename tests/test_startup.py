@@ -0,0 +1,15 @@
+import statistics
+
+from benchmarks.bench_import import BUDGET_MS, DEFERRED_MODULES, run_probe
+
+
+def test_cold_start_within_budget():
+    # The first run fills the filesystem cache
+    run_probe(importtime=False)
+    cold_start_ms = [run_probe(importtime=False)["cold_start"] * 1000 for _ in range(3)]
+    assert statistics.median(cold_start_ms) <= BUDGET_MS
+
+
+def test_heavy_modules_load_on_first_use():
+    assert {"agno", "google.generativeai", "linkedin_api", "markdown"} <= set(DEFERRED_MODULES)
+    assert run_probe(importtime=False)["loaded"] == []
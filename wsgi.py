@@ -0,0 +1,5 @@
+from app import create_app
+
+# Background work (agent warm-up, scheduler) is started in each worker after the
+# fork by gunicorn.conf.py, so nothing started here is shared between processes
+app = create_app(start_background=False)